@@ -1,39 +1,61 @@
+import asyncio
 import os
 import streamlit as st
 
-from typing import List
-from dotenv import load_dotenv
+from typing import Any, Dict
 
 from src.constants import *
 
-from src.vdb import VectorDB
-from src.vdb_qdrant import QdrantVectorDB
+from src.api_client import AstroMindClient
 
-from src.llm import LLM
-from src.llm_openai import OpenAILLM
-
-from src.embedder import BAAIEmbedder
+from src.context_builder import ContextBuilder
 
 from src.embedding_pipeline import EmbeddingPipeline
 
-from src.ships.ships_embedding_pipeline import ShipsEmbeddingPipeline
-
-#=== Ask ===#
-@st.cache_resource
-def run_pipelines(_pipelines):
-    for pipeline in _pipelines:
-        result = pipeline.start()
+from src.hybrid_search import SEARCH_HYBRID, SEARCH_MODES
 
-        if result == EmbeddingPipeline.FAILURE:
-            st.error(f"Failed to embed the dataset")
+from src.rag_service import RAGService, load_environment
 
-def chat_ui(llm: LLM, vdb: VectorDB, pipelines: List[EmbeddingPipeline]):
+#=== Ask ===#
+def embed_documents(service: RAGService):
+    if service.start() == EmbeddingPipeline.FAILURE:
+        st.error(f"Failed to embed the dataset")
+
+    for progress in service.stats()["pipelines"]:
+        if progress["failed_files"]:
+            st.warning(f"{progress['name']}: skipped {len(progress['failed_files'])} files that failed to index ({', '.join(sorted(progress['failed_files']))})")
+
+def turn_options() -> Dict[str, Any]:
+    return {
+        "topic": st.session_state.get('topic'),
+        "mode": st.session_state.get('search_mode', SEARCH_HYBRID),
+        "rerank": st.session_state.get('rerank', True),
+        "token_budget": st.session_state.get('context_budget', ContextBuilder.TOKEN_BUDGET)
+    }
+
+def ask_service(service: RAGService, user_query: str) -> Dict[str, Any]:
+    prepared = asyncio.run(service.prepare(user_query, **turn_options()))
+
+    if prepared.answer is not None:
+        st.markdown(prepared.answer)
+    else:
+        # Render tokens as they arrive, write_stream returns the full text.
+        service.finish(prepared, st.write_stream(service.stream(prepared)))
+    return prepared.summary()
+
+def ask_api(client: AstroMindClient, user_query: str) -> Dict[str, Any]:
+    # Same as ask_service, the API streams the tokens as the LLM writes them.
+    answer = client.stream(user_query, **turn_options())
+    st.write_stream(answer)
+    return answer.turn
+
+def chat_ui(backend):
     st.title("Astro Mind")
     st.write("This chatbot is there to help you get information about the different ships of Elite Dangerous")
 
     if 'conversation_history' not in st.session_state:
         st.session_state.conversation_history = []
-    
+
     for message in st.session_state.conversation_history:
         with st.chat_message("user" if message.startswith("User:") else "assistant"):
             st.markdown(message.replace("User: ", "").replace("Assistant: ", ""))
@@ -43,133 +65,138 @@ def chat_ui(llm: LLM, vdb: VectorDB, pipelines: List[EmbeddingPipeline]):
     if user_query:
         with st.chat_message("user"):
             st.markdown(user_query)
-        
-        st.session_state.conversation_history.append(f"User: {user_query}")
 
-        topic = ""
-        if 'topic' not in st.session_state:
-            topic = llm.ask(
-                user_query,
-                """What ship are they talking about?
-                Reply only with the name of the ship using the following format:
-                
-                The query relates to the ship: <shipname>.
-                
-                Replace <shipname> by the actual shipname the user are talking about.
-                """
-            )
-            st.session_state.topic = topic
-        else:
-            topic = st.session_state.topic
-
-        context = vdb.search(f"{user_query}\n{topic}", SHIPS_COLLECTION_NAME)
-        context.append(topic)
-
-        response = llm.ask(context, user_query)
-
-        st.session_state.conversation_history.append(f"Assistant: {response}")
+        st.session_state.conversation_history.append(f"User: {user_query}")
 
         with st.chat_message("assistant"):
-            st.markdown(response)
-    
+            try:
+                if isinstance(backend, AstroMindClient):
+                    turn = ask_api(backend, user_query)
+                else:
+                    turn = ask_service(backend, user_query)
+            except (asyncio.TimeoutError, RuntimeError) as e:
+                message = "Searching the ship documents took too long, please try again." if isinstance(e, asyncio.TimeoutError) else str(e)
+                st.error(message)
+                turn = {"answer": message}
+
+        # Ships are detected on every turn. A follow-up that names no ship
+        # ("and its cargo?") keeps talking about the previous ones.
+        if turn.get("topic"):
+            st.session_state.topic = turn["topic"]
+        st.session_state.last_turn = turn
+        st.session_state.conversation_history.append(f"Assistant: {turn['answer']}")
+
     with st.sidebar:
         st.header("Debug", divider=True)
-        
-        st.button(
-            "Embed documents",
-            on_click=run_pipelines,
-            key="embed_button"
-        )
-        
+
+        st.selectbox("Retrieval", SEARCH_MODES, index=SEARCH_MODES.index(SEARCH_HYBRID), key="search_mode")
+        st.checkbox("Rerank results", value=True, key="rerank")
+        st.number_input("Context token budget", min_value=100, value=ContextBuilder.TOKEN_BUDGET, step=100, key="context_budget")
+        st.checkbox("Show turn timings", value=False, key="show_timings")
+
+        stats = backend.stats()
+        for progress in stats["pipelines"]:
+            st.caption(f"{progress['name']}: {progress['status']}, {progress['files_done']}/{progress['files_total']} files, {len(progress['failed_files'])} failed")
+
+        if stats.get("reranker"):
+            reranker = stats["reranker"]
+            st.caption(f"Reranker: {reranker['reranked']} reranked, {reranker['skipped']} skipped, last retrieve {reranker['last_retrieve_ms']:.0f} ms, last rerank {reranker['last_rerank_ms']:.0f} ms (avg {reranker['avg_rerank_ms']:.0f} ms)")
+
+        if stats.get("embedding"):
+            embedding = stats["embedding"]
+            st.caption(f"Query embeddings: {embedding['requests']} in {embedding['batches']} batches (avg {embedding['avg_batch_size']:.1f}), queue {embedding['queue_depth']} (max {embedding['max_queue_depth']}), wait {embedding['avg_wait_ms']:.1f} ms")
+
+        if stats.get("query_cache"):
+            query_cache = stats["query_cache"]
+            st.caption(f"Query embedding cache: {query_cache['hits']} hits, {query_cache['misses']} misses ({query_cache['hit_rate']:.0%})")
+
+        answer_cache = stats["answer_cache"]
+        st.caption(f"Answer cache: {answer_cache['hits']} hits, {answer_cache['misses']} misses ({answer_cache['hit_rate']:.0%}), {answer_cache['size']} stored")
+
+        turn = st.session_state.get('last_turn')
+        if turn and turn.get("context_chunks"):
+            st.caption(f"Last context: {turn['context_tokens']} tokens from {turn['context_chunks']} chunks, {turn['context_dropped']} duplicates or over budget dropped")
+        if turn and turn.get("usage"):
+            st.caption(f"Last LLM call: {turn['usage']['prompt_tokens']} prompt + {turn['usage']['completion_tokens']} completion tokens")
+        if turn and turn.get("timings") and st.session_state.get('show_timings'):
+            # Spans of the last turn by start time, nested ones are indented.
+            lines = []
+            ends = []
+            for timing in turn["timings"]:
+                while ends and timing["start_ms"] >= ends[-1]:
+                    ends.pop()
+                lines.append(f"{'  ' * len(ends)}{timing['name']:<22} +{timing['start_ms']:>7.1f} ms {timing['duration_ms']:>8.1f} ms")
+                ends.append(timing["start_ms"] + timing["duration_ms"])
+            st.code("\n".join(lines), language=None)
+
+        if isinstance(backend, RAGService):
+            st.button(
+                "Embed documents",
+                on_click=embed_documents,
+                args=(backend,),
+                key="embed_button"
+            )
+
         # Add reset button
         if st.button("⚠️ Reset All Resources", key="reset_button"):
             # Clear cached resources
             st.cache_resource.clear()
             # Close vector database connection
-            if hasattr(vdb, 'close'):
-                vdb.close()
+            backend.close()
             # Clear session state
             st.session_state.clear()
             # Rerun the app to reinitialize resources
             st.rerun()
 
-def ui(pipelines: List[EmbeddingPipeline], llm: LLM, vdb: VectorDB):
-    chat_ui(llm, vdb, pipelines)
+def ui(backend):
+    chat_ui(backend)
 
 #=== Setup ===#
 def setup_environment():
     if "env_setup" in st.session_state:
         return
 
-    load_dotenv()
-
-    os.environ["HF_TOKEN"] = os.getenv(EMBEDDER_LLM_API_KEY)
+    load_environment()
 
     st.session_state["env_setup"] = True
 
 @st.cache_resource
-def setup_inference_llm():
-    inference_llm = OpenAILLM(
-        provider=os.getenv(INFERENCE_LLM_PROVIDER),
-        api_key=os.getenv(INFERENCE_LLM_API_KEY),
-        model=os.getenv(INFERENCE_LLM_MODEL),
-        url=os.getenv(INFERENCE_LLM_URL)
-    )
-
-    inference_llm.user_prompt = """
-    Use the following pieces of information enclosed in <context> tags to provide an answer to the question enclosed in <question> tags.
-
-    <context>
-    {context}
-    </context>
-
-    <question>
-    {query}
-    </question>
-    """
-
-    return inference_llm
-
-@st.cache_resource
-def setup_llm():
-    inference_llm = setup_inference_llm()
-    return inference_llm
+def setup_service():
+    service = RAGService.create()
+    embed_documents(service)
+    # The models load while the page renders and the user types.
+    service.warm_up(rerank=True)
+    return service
 
 @st.cache_resource
-def setup_vector_db():
-    vector_db: VectorDB = QdrantVectorDB(embedder=BAAIEmbedder(), db_path=LOCAL_VECTOR_DB_FILE)
-    return vector_db
+def setup_api_client(url: str):
+    return AstroMindClient(url)
 
 #=== Main ===#
 def main():
     #--- Setup ---#
     setup_environment()
-    
-    try:
-        vdb = setup_vector_db()
-        llm = setup_llm()
-    except RuntimeError as e:
-        st.error(f"Resource conflict error: {str(e)}")
-        st.error("Please reset the resources using the 'Reset All Resources' button.")
-        # Show only the reset button
-        if st.button("⚠️ Reset All Resources"):
-            st.cache_resource.clear()
-            st.session_state.clear()
-            st.rerun()
-        return
-
-    #--- Embedding ---#
-    ships_embedding_pipeline = ShipsEmbeddingPipeline(vdb)
-    pipelines = [ships_embedding_pipeline]
 
-    run_pipelines(pipelines)
+    # With an API url the models and the vector DB live in the API service
+    # and this app is only a client of it.
+    api_url = os.getenv(ASTRO_MIND_API_URL)
+    if api_url:
+        backend = setup_api_client(api_url)
+    else:
+        try:
+            backend = setup_service()
+        except RuntimeError as e:
+            st.error(f"Resource conflict error: {str(e)}")
+            st.error("Please reset the resources using the 'Reset All Resources' button.")
+            # Show only the reset button
+            if st.button("⚠️ Reset All Resources"):
+                st.cache_resource.clear()
+                st.session_state.clear()
+                st.rerun()
+            return
 
     #--- Ask ---#
-    ui(
-        pipelines,
-        llm,
-        vdb
-    )
+    ui(backend)
 
 if __name__ == "__main__":
     main()
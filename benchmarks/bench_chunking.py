@@ -0,0 +1,119 @@
+# Compares ChunkStrategy with SentenceChunkStrategy on the ship dataset:
+# chunk counts and sizes, chunking and ingest time, and a known-item
+# retrieval hit rate where a sentence taken from every section is the
+# query and a hit is any of the top k chunks containing it. Retrieval
+# uses BM25 by default, --dense embeds the chunks with BAAIEmbedder into
+# an in-memory Qdrant collection instead. A synthetic long section shows
+# how both strategies scale with section length.
+#
+#   python -m benchmarks.bench_chunking [--dense] [-k 3]
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+from src.bm25 import BM25Index
+from src.chunking import ChunkStrategy, ContentChunk, SentenceChunkStrategy, split_sentences
+from src.constants import SHIPS_DATA_DIR, RAW_DATA_FOLDER_NAME
+from src.ships.ships_html_processor import parse_ship_file
+from src.tokens import TOKENIZER, count_tokens
+
+QUERY_SAMPLE = 400
+
+def normalize(text):
+    return " ".join(text.split())
+
+def known_item_queries(pages):
+    # The middle sentence of every section that has a few of them.
+    queries = []
+    for chunks in pages:
+        for chunk in chunks:
+            sentences = split_sentences(chunk.raw_text)
+            if len(sentences) >= 3:
+                queries.append(normalize(sentences[len(sentences) // 2]))
+
+    step = max(1, len(queries) // QUERY_SAMPLE)
+    return queries[::step][:QUERY_SAMPLE]
+
+class KeywordRetriever:
+    def __init__(self, chunks):
+        self.index = BM25Index()
+        self.index.add(chunks)
+        self.texts = {chunk.chunk_id: normalize(chunk.raw_text) for chunk in chunks}
+
+    def search(self, query, limit):
+        return [self.texts[doc_id] for doc_id, _ in self.index.search(query, limit=limit)]
+
+class DenseRetriever:
+    COLLECTION = "bench_chunking"
+
+    def __init__(self, chunks):
+        from src.embedder import BAAIEmbedder
+        from src.vdb_qdrant import QdrantVectorDB
+
+        self.vdb = QdrantVectorDB(BAAIEmbedder(), ":memory:")
+        self.vdb.init_collection(self.COLLECTION)
+        self.vdb.add(chunks, self.COLLECTION)
+
+    def search(self, query, limit):
+        return [normalize(result.payload["text"]) for result in self.vdb.search_results(query, self.COLLECTION, limit=limit)]
+
+def time_split(strategy, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = [chunk for raw_chunks in pages for chunk in strategy.split_chunks(raw_chunks)]
+    return chunks, (time.perf_counter() - start) / repeat
+
+def long_section(sentences):
+    text = " ".join(f"Sentence number {index} describes the hull of a very long ship page." for index in range(sentences))
+    return [ContentChunk("ship", "Long Ship", "other", ["Long"], text, "")]
+
+def main(dense: bool = False, k: int = 3, repeat: int = 5) -> int:
+    dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    filenames = [filename for filename in sorted(os.listdir(dataset_dir)) if filename.endswith((".html", ".htm"))]
+    pages = [parse_ship_file(os.path.join(dataset_dir, filename)) for filename in filenames]
+    queries = known_item_queries(pages)
+
+    strategies = {
+        "legacy": ChunkStrategy,
+        "sentence": SentenceChunkStrategy()
+    }
+    retriever_type = DenseRetriever if dense else KeywordRetriever
+
+    print(f"pages: {len(pages)}, queries: {len(queries)}, retrieval: {'dense' if dense else 'bm25'}, tokenizer: {TOKENIZER}")
+    for name, strategy in strategies.items():
+        chunks, split_seconds = time_split(strategy, pages, repeat)
+        for chunk in chunks:
+            chunk.chunk_id = str(uuid.uuid4())
+        tokens = sorted(count_tokens(chunk.raw_text) for chunk in chunks)
+        small = sum(1 for chunk in chunks if len(chunk.raw_text.strip()) < ChunkStrategy.MIN_CHUNK_SIZE)
+
+        start = time.perf_counter()
+        retriever = retriever_type(chunks)
+        index_seconds = time.perf_counter() - start
+
+        hits = sum(1 for query in queries if any(query in text for text in retriever.search(query, k)))
+
+        print(f"{name:>9}: {len(chunks)} chunks ({small} under {ChunkStrategy.MIN_CHUNK_SIZE} chars), tokens median {tokens[len(tokens) // 2]} max {tokens[-1]}")
+        print(f"{'':>9}  split {split_seconds * 1000:.1f} ms, ingest {(split_seconds + index_seconds) * 1000:.1f} ms, hit@{k} {hits / len(queries):.1%}")
+
+    print("long section split time:")
+    for sentences in (1000, 4000, 16000):
+        section = long_section(sentences)
+        timings = []
+        for strategy in strategies.values():
+            start = time.perf_counter()
+            strategy.split_chunks(section)
+            timings.append(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"{sentences:>9} sentences: " + ", ".join(f"{name} {timing}" for name, timing in zip(strategies, timings)))
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dense", action="store_true", help="retrieve with BAAIEmbedder instead of BM25")
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(main(dense=args.dense, k=args.k))
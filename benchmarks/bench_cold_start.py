@@ -0,0 +1,127 @@
+# Measures the time from a fresh process to the first answer, the way a new
+# container starts: create the service, bring the index up, answer one
+# question. Every run gets a working directory holding only the dataset.
+#
+#   first launch    no index, the service ingests the whole dataset
+#   build_index     `python -m src.build_index`, the image build step
+#   prebuilt index  the service started on what build_index wrote
+#
+# Runs offline: the LLM is benchmarks.llm_stub, the models have to be in the
+# local cache already (build_index would download them otherwise).
+#
+#   python -m benchmarks.bench_cold_start [--embedder torch] [--vdb qdrant] [--runs 3]
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.llm_stub import StubLLMServer
+
+from src.constants import (
+    DATASET_DIR,
+    EMBEDDER_BACKEND,
+    INFERENCE_LLM_API_KEY,
+    INFERENCE_LLM_MODEL,
+    INFERENCE_LLM_PROVIDER,
+    INFERENCE_LLM_URL,
+    VECTOR_DB_BACKEND
+)
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUESTION = "How good is the Anaconda at combat?"
+
+def child() -> int:
+    # Runs in the working directory, prints its timings as one JSON line.
+    timings = {}
+    start = time.perf_counter()
+    from src.rag_service import RAGService
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service = RAGService.create()
+    timings["create"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service.start()
+    timings["start"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prepared = asyncio.run(service.ask(QUESTION))
+    timings["first_answer"] = time.perf_counter() - start
+    service.close()
+
+    timings["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    timings["origin"] = prepared.origin
+    print(json.dumps(timings))
+    return 0
+
+def run(arguments, directory: str, env):
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, *arguments], cwd=directory, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{completed.stdout}\n{completed.stderr}")
+    return wall, completed.stdout
+
+def working_directory(root: str, name: str) -> str:
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    os.symlink(os.path.join(REPOSITORY_DIR, DATASET_DIR), os.path.join(directory, DATASET_DIR))
+    return directory
+
+def main(embedder_backend: str = "torch", vdb_backend: str = "qdrant", runs: int = 3) -> int:
+    root = tempfile.mkdtemp(prefix="bench_cold_start")
+    child_arguments = ["-m", "benchmarks.bench_cold_start", "--child"]
+    rows = []
+
+    with StubLLMServer() as url:
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": os.pathsep.join(filter(None, [REPOSITORY_DIR, env.get("PYTHONPATH")])),
+            INFERENCE_LLM_URL: url,
+            INFERENCE_LLM_API_KEY: "stub",
+            INFERENCE_LLM_MODEL: "stub",
+            INFERENCE_LLM_PROVIDER: "stub",
+            EMBEDDER_BACKEND: embedder_backend,
+            VECTOR_DB_BACKEND: vdb_backend
+        })
+
+        try:
+            for index in range(runs):
+                wall, output = run(child_arguments, working_directory(root, f"first-{index}"), env)
+                rows.append(("first launch", wall, json.loads(output.strip().splitlines()[-1])))
+
+            prebuilt = working_directory(root, "prebuilt")
+            wall, _ = run(["-m", "src.build_index"], prebuilt, env)
+            rows.append(("build_index", wall, None))
+
+            for _ in range(runs):
+                wall, output = run(child_arguments, prebuilt, env)
+                rows.append(("prebuilt index", wall, json.loads(output.strip().splitlines()[-1])))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print(f"embedder: {embedder_backend}, vector DB: {vdb_backend}, question: {QUESTION!r}")
+    print(f"{'run':>14} | {'wall s':>7} | {'import':>6} {'create':>6} {'start':>6} {'answer':>6} | {'RSS MB':>6} | origin")
+    for name, wall, timings in rows:
+        if timings is None:
+            print(f"{name:>14} | {wall:>7.2f} |")
+            continue
+        print(f"{name:>14} | {wall:>7.2f} | {timings['import']:>6.2f} {timings['create']:>6.2f} {timings['start']:>6.2f} {timings['first_answer']:>6.2f} | {timings['max_rss_mb']:>6.0f} | {timings['origin']}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embedder", default="torch")
+    parser.add_argument("--vdb", default="qdrant")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.exit(child() if args.child else main(args.embedder, args.vdb, args.runs))
@@ -0,0 +1,60 @@
+# Measures query embedding throughput and latency with a growing number of
+# concurrent users, each embedding queries back to back, once calling
+# BAAIEmbedder.embed_text directly and once through EmbeddingScheduler.
+#
+#   python -m benchmarks.bench_embedding_scheduler [--queries 256] [--max-wait-ms 5] [--max-batch-size 32]
+
+import argparse
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.embedder import BAAIEmbedder
+from src.embedding_scheduler import EmbeddingScheduler
+
+USERS = [1, 2, 4, 8, 16, 32]
+
+def run(embedder, users: int, queries: int):
+    texts = [f"What is the jump range of ship number {index}?" for index in range(queries)]
+    latencies = []
+
+    def embed(text):
+        start = time.perf_counter()
+        embedder.embed_text(text)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(embed, texts))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return queries / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+def main(queries: int = 256, max_wait_ms: float = 5.0, max_batch_size: int = 32) -> int:
+    embedder = BAAIEmbedder()
+    # Loads the weights and warms up the first encode.
+    embedder.embed_text("warm up")
+
+    print(f"queries per run: {queries}, max wait: {max_wait_ms} ms, max batch size: {max_batch_size}")
+    print(f"{'users':>5} | {'direct q/s':>10} {'p50 ms':>7} {'p95 ms':>7} | {'batched q/s':>11} {'p50 ms':>7} {'p95 ms':>7} {'avg batch':>9}")
+    for users in USERS:
+        direct = run(embedder, users, queries)
+
+        scheduler = EmbeddingScheduler(embedder, max_batch_size=max_batch_size, max_wait_seconds=max_wait_ms / 1000)
+        batched = run(scheduler, users, queries)
+        average_batch = scheduler.stats()["avg_batch_size"]
+        scheduler.close()
+
+        print(f"{users:>5} | {direct[0]:>10.1f} {direct[1]:>7.1f} {direct[2]:>7.1f} | {batched[0]:>11.1f} {batched[1]:>7.1f} {batched[2]:>7.1f} {average_batch:>9.1f}")
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+    sys.exit(main(args.queries, args.max_wait_ms, args.max_batch_size))
@@ -0,0 +1,149 @@
+# Compares the single-pass infobox extraction against the original
+# per-field CSS query implementation and checks both produce the same
+# values for every page of the ship dataset.
+#
+#   python -m benchmarks.bench_infobox
+
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from src.constants import SHIPS_DATA_DIR, RAW_DATA_FOLDER_NAME
+from src.ships.ships_html_processor import (
+    ExtractedShipInfoBox,
+    ExtractedShipInfoBoxHardpoints,
+    ExtractedShipInfoBoxOutfitting,
+    ExtractedShipInfoBoxOverview,
+    ExtractedShipInfoBoxSpecifications,
+    NotDefined,
+    extract_infobox
+)
+
+OVERVIEW_SOURCES = {
+    "manufacturer": "manufacturer",
+    "years_produced": "yearsproduced",
+    "ship_type": "type",
+    "cost": "cost",
+    "insurance": "insurance",
+    "expansion": "expansion"
+}
+
+SPECIFICATION_SOURCES = {
+    "landing_pad_size": "landingpad",
+    "dimensions": "dimensions",
+    "pilot_seats": "seats",
+    "multicrew": "multicrew",
+    "fighter_hangar": "fighterhangar",
+    "hull_mass": "hullmass",
+    "mass_lock_factor": "masslock",
+    "armour": "armour",
+    "armour_hardness": "armourhardness",
+    "shields": "shields",
+    "heat_capacity": "heatcapacity",
+    "fuel_capacity": "fuelcapacity",
+    "manoeuvrability": "manoeuvrability",
+    "top_speed": "topspeed",
+    "boost_speed": "boostspeed",
+    "unladen_jump_range": "unladen",
+    "cargo_capacity": "cargocapacity"
+}
+
+SPECIFICATION_LABELS = {
+    "top_speed": "Top Speed",
+    "boost_speed": "Boost Speed",
+    "unladen_jump_range": "Unladen Jump Range",
+    "cargo_capacity": "Cargo Capacity"
+}
+
+OUTFITTING_LABELS = {
+    "hardpoints": "Hardpoints",
+    "internal_compartments": "Internal Compartments",
+    "reserved_compartments": "Reserved Compartments"
+}
+
+HARDPOINT_LABELS = {
+    "utility_mount": "Utility Mount",
+    "weapon_mounts": "Weapon Mounts"
+}
+
+def has_aside_section(soup, name: str) -> bool:
+    return bool(soup.select_one(f"aside section h2:-soup-contains('{name}')"))
+
+def get_aside_value(soup, data_source: str) -> str:
+    div = soup.select_one(f"aside div[data-source='{data_source}'] div.pi-data-value.pi-font")
+    if div:
+        text = div.get_text()
+        return text if text else NotDefined
+    return NotDefined
+
+def get_value_for_label(soup, label):
+    # Find h3 label in aside, then get next sibling div with class pi-data-value
+    for h3 in soup.select("aside h3.pi-data-label"):
+        if label in h3.get_text():
+            value_divs = []
+            sib = h3.find_next_sibling()
+            while sib and 'pi-data-value' in sib.get('class', []):
+                value_divs.append(sib.get_text())
+                sib = sib.find_next_sibling()
+            if not value_divs:
+                return NotDefined
+            text = "\n".join([v.replace("×", "x") for v in value_divs if v])
+            return text
+    return NotDefined
+
+def legacy_extract_infobox(soup) -> ExtractedShipInfoBox:
+    overview = ExtractedShipInfoBoxOverview(**{
+        field: get_aside_value(soup, source) for field, source in OVERVIEW_SOURCES.items()
+    })
+
+    specs = ExtractedShipInfoBoxSpecifications(**{
+        field: get_aside_value(soup, source) for field, source in SPECIFICATION_SOURCES.items()
+    })
+    for field, label in SPECIFICATION_LABELS.items():
+        setattr(specs, field, get_value_for_label(soup, label))
+
+    outfitting = None
+    if has_aside_section(soup, "Outfitting"):
+        outfitting = ExtractedShipInfoBoxOutfitting(**{
+            field: get_value_for_label(soup, label) for field, label in OUTFITTING_LABELS.items()
+        })
+
+    hardpoints = None
+    if has_aside_section(soup, "Hardpoints"):
+        hardpoints = ExtractedShipInfoBoxHardpoints(**{
+            field: get_value_for_label(soup, label) for field, label in HARDPOINT_LABELS.items()
+        })
+
+    return ExtractedShipInfoBox(overview, specs, outfitting, hardpoints)
+
+def main(repeat: int = 3) -> int:
+    dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    soups = []
+    for filename in sorted(os.listdir(dataset_dir)):
+        with open(os.path.join(dataset_dir, filename), "r", encoding="utf-8") as file:
+            soups.append((filename, BeautifulSoup(file.read(), "html.parser")))
+
+    mismatches = [filename for filename, soup in soups if legacy_extract_infobox(soup) != extract_infobox(soup)]
+
+    timings = {}
+    for name, extract in (("legacy", legacy_extract_infobox), ("single-pass", extract_infobox)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, soup in soups:
+                extract(soup)
+        timings[name] = (time.perf_counter() - start) / (repeat * len(soups))
+
+    print(f"pages: {len(soups)}")
+    for name, per_page in timings.items():
+        print(f"{name:>12}: {per_page * 1000:.2f} ms/page")
+    print(f"{'speedup':>12}: {timings['legacy'] / timings['single-pass']:.1f}x")
+
+    if mismatches:
+        print(f"[ERROR]: Infobox output differs for {len(mismatches)} page(s): {', '.join(mismatches)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# Compares the PyTorch BAAIEmbedder with ONNXEmbedder (float and int8) on
+# the ship dataset chunks: model load time (imports included), peak memory,
+# single query latency and document throughput. Each backend runs in a fresh
+# process so load time and memory are not hidden by an earlier import.
+#
+# Doubles as the parity check of the ONNX backends: every document vector
+# is compared with the PyTorch one and the run fails when the lowest cosine
+# similarity is under the backend threshold.
+#
+#   python -m benchmarks.bench_onnx_embedder [--documents 512] [--threads 4]
+
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import time
+
+import numpy as np
+
+from src.chunking import SentenceChunkStrategy
+from src.constants import RAW_DATA_FOLDER_NAME, SHIPS_DATA_DIR
+from src.ships.ships_html_processor import parse_ship_file
+
+QUERIES = [
+    "What is the jump range of the Anaconda?",
+    "Which ships can land on planets with thin atmospheres?",
+    "Compare the shields of the Python and the Krait Mk II",
+    "How much cargo can a Type-9 Heavy carry?",
+    "What are the hardpoints of the Federal Corvette?"
+]
+
+# Lowest cosine similarity with the PyTorch vector accepted per backend.
+PARITY_THRESHOLDS = {
+    "onnx": 0.999,
+    "onnx-int8": 0.95
+}
+
+def documents(count: int):
+    dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    strategy = SentenceChunkStrategy()
+    texts = []
+    for filename in sorted(os.listdir(dataset_dir)):
+        if filename.endswith((".html", ".htm")):
+            texts.extend(chunk.raw_text for chunk in strategy.split_chunks(parse_ship_file(os.path.join(dataset_dir, filename))))
+    return texts[:count]
+
+def measure(backend: str, threads: int, texts, results):
+    # Runs in a child process, the imports are part of the load time.
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if backend == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+        from src.embedder import BAAIEmbedder
+
+        embedder = BAAIEmbedder()
+    else:
+        from src.embedder_onnx import ONNXEmbedder
+
+        embedder = ONNXEmbedder(quantize=backend == "onnx-int8", threads=threads)
+    embedder.embed_text("warm up")
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(4):
+        for query in QUERIES:
+            start = time.perf_counter()
+            embedder.embed_text(query)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    start = time.perf_counter()
+    vectors = embedder.embed_document(texts, batch_size=32)
+    document_seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        "load_seconds": load_seconds,
+        "peak_mb": peak / 1024,
+        "model_mb": (peak - before) / 1024,
+        "query_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "documents_per_second": len(texts) / document_seconds,
+        "vectors": np.asarray(vectors, dtype=np.float32)
+    })
+
+def run(backend: str, threads: int, texts):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=measure, args=(backend, threads, texts, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"The {backend} run exited with code {process.exitcode}")
+    process.join()
+    return result
+
+def main(count: int = 512, threads: int = 4) -> int:
+    texts = documents(count)
+    print(f"documents: {len(texts)}, threads: {threads}")
+    print(f"{'backend':>9} | {'load s':>6} {'peak MB':>7} {'model MB':>8} | {'query p50 ms':>12} {'docs/s':>7} | {'min cos':>7} {'mean cos':>8}")
+
+    reference = None
+    failed = False
+    for backend in ["torch", "onnx", "onnx-int8"]:
+        result = run(backend, threads, texts)
+        vectors = result["vectors"]
+
+        parity = ""
+        if reference is None:
+            reference = vectors
+        else:
+            # Both sides are L2 normalized, the dot product is the cosine.
+            cosines = np.sum(reference * vectors, axis=1)
+            parity = f"{cosines.min():>7.4f} {cosines.mean():>8.4f}"
+            if cosines.min() < PARITY_THRESHOLDS[backend]:
+                parity += f"  FAIL (< {PARITY_THRESHOLDS[backend]})"
+                failed = True
+
+        print(f"{backend:>9} | {result['load_seconds']:>6.2f} {result['peak_mb']:>7.0f} {result['model_mb']:>8.0f} | {result['query_p50_ms']:>12.1f} {result['documents_per_second']:>7.1f} | {parity}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    sys.exit(main(args.documents, args.threads))
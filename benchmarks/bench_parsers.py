@@ -0,0 +1,59 @@
+# Times ShipHTMLProcessor on every parser backend, with and without pruning
+# the page down to the article, and checks each backend extracts the same
+# sections, headers, text and infobox as the html.parser baseline.
+#
+#   python -m benchmarks.bench_parsers
+
+import os
+import sys
+import time
+
+from bs4 import FeatureNotFound
+
+from src.constants import SHIPS_DATA_DIR, RAW_DATA_FOLDER_NAME
+from src.html_processor import PARSERS, PARSER_HTML
+from src.ships.ships_html_processor import ShipHTMLProcessor
+
+def normalize(chunks):
+    # Parsers disagree on whitespace and on how they serialize the HTML
+    # snippets, not on what the chunks contain.
+    return [
+        (chunk.entity_name, chunk.section_type, chunk.headers, " ".join(chunk.raw_text.split()), chunk.infobox)
+        for chunk in chunks
+    ]
+
+def main() -> int:
+    dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    pages = []
+    for filename in sorted(os.listdir(dataset_dir)):
+        with open(os.path.join(dataset_dir, filename), "r", encoding="utf-8") as file:
+            pages.append((filename, file.read()))
+
+    failed = False
+    for prune in (False, True):
+        baseline = None
+        for parser in PARSERS:
+            try:
+                start = time.perf_counter()
+                results = [ShipHTMLProcessor(html, parser=parser, prune=prune).extract_chunks() for _, html in pages]
+                elapsed = time.perf_counter() - start
+            except (ImportError, FeatureNotFound) as e:
+                print(f"{parser:>12} prune={prune!s:<5}: skipped ({e})")
+                continue
+
+            results = [normalize(chunks) for chunks in results]
+            if parser == PARSER_HTML:
+                baseline = results
+
+            mismatches = [filename for (filename, _), result, expected in zip(pages, results, baseline) if result != expected]
+            chunk_count = sum(len(result) for result in results)
+            print(f"{parser:>12} prune={prune!s:<5}: {elapsed / len(pages) * 1000:7.2f} ms/page, {chunk_count} chunks, {len(mismatches)} mismatching page(s)")
+
+            if mismatches:
+                failed = True
+                print(f"[ERROR]: {parser} differs from {PARSER_HTML} on: {', '.join(mismatches)}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# End to end benchmark of the ships RAG pipeline on dataset/Ships/raw_data.
+#
+# Times every stage (parse, chunk, embed, upsert, keyword index, query
+# embed, search per mode, prompt build and the LLM round trip) and scores
+# retrieval against benchmarks/golden_questions.json: a question is answered
+# when a chunk of its ship (and section, when given) is in the top k.
+# Reported per search mode as recall@k, MRR and ship-only recall@k.
+#
+# Runs offline: the LLM is benchmarks.llm_stub on localhost, only the
+# embedding model has to be in the local cache. Results are written as JSON
+# (commit, config, corpus, stages, retrieval) to compare across commits,
+# --baseline prints the differences with an earlier run and fails when the
+# retrieval quality dropped.
+#
+#   python -m benchmarks.bench_rag [-k 5] [--embedder torch] [--vdb qdrant] [--output bench_rag.json] [--baseline old.json]
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from benchmarks.llm_stub import StubLLMServer
+
+from src.bm25 import BM25Index
+from src.chunking import SentenceChunkStrategy
+from src.constants import RAW_DATA_FOLDER_NAME, SHIPS_COLLECTION_NAME, SHIPS_DATA_DIR
+from src.context_builder import ContextBuilder
+from src.embedder import Embedder
+from src.hybrid_search import HybridRetriever, SEARCH_HYBRID, SEARCH_MODES
+from src.llm_openai import OpenAILLM
+from src.rag_service import ANSWER_PROMPT, EMBEDDER_BACKENDS, EMBEDDER_TORCH, VECTOR_DB_BACKENDS, VECTOR_DB_NUMPY, VECTOR_DB_QDRANT, create_embedder
+from src.ships.ships_html_processor import parse_ship_file
+from src.tokens import TOKENIZER
+from src.vdb_numpy import NumpyVectorDB
+from src.vdb_qdrant import QdrantVectorDB
+
+GOLDEN_QUESTIONS_FILE = os.path.join(os.path.dirname(__file__), "golden_questions.json")
+# Drop in a retrieval metric, against --baseline, that fails the run.
+QUALITY_TOLERANCE = 0.02
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    @contextmanager
+    def __call__(self, stage: str):
+        start = time.perf_counter()
+        yield
+        self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        stages = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            stages[stage] = {
+                "count": len(ordered),
+                "total_ms": sum(ordered) * 1000,
+                "mean_ms": sum(ordered) * 1000 / len(ordered),
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[int(len(ordered) * 0.95)] * 1000
+            }
+        return stages
+
+class TimedEmbedder(Embedder):
+    # Splits the vector DB add() time between embedding and upserting.
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+        self.MODEL_NAME = embedder.MODEL_NAME
+        self.document_seconds = 0.0
+
+    def dimension(self) -> int:
+        return self.embedder.dimension()
+
+    def embed_text(self, text: str):
+        return self.embedder.embed_text(text)
+
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        start = time.perf_counter()
+        vectors = self.embedder.embed_document(document, batch_size=batch_size)
+        self.document_seconds += time.perf_counter() - start
+        return vectors
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def is_relevant(payload, question) -> bool:
+    if payload.get("entity_name") != question["entity_name"]:
+        return False
+    return not question.get("section_type") or payload.get("section_type") == question["section_type"]
+
+def retrieval_metrics(ranks, entity_hits, k: int):
+    # ranks holds the 1-based rank of the first relevant chunk, or None.
+    return {
+        f"recall@{k}": sum(1 for rank in ranks if rank is not None) / len(ranks),
+        "mrr": sum(1 / rank for rank in ranks if rank is not None) / len(ranks),
+        f"entity_recall@{k}": sum(entity_hits) / len(entity_hits)
+    }
+
+def compare(report, baseline) -> bool:
+    print(f"compared with {baseline.get('commit', '?')}:")
+    for stage, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and previous["mean_ms"]:
+            change = (current["mean_ms"] - previous["mean_ms"]) / previous["mean_ms"]
+            print(f"  {stage:>18}: {previous['mean_ms']:>9.2f} -> {current['mean_ms']:>9.2f} ms ({change:+.0%})")
+
+    degraded = False
+    for mode, metrics in report["retrieval"].items():
+        for name, value in metrics.items():
+            previous = baseline.get("retrieval", {}).get(mode, {}).get(name)
+            if previous is None:
+                continue
+            drop = previous - value > QUALITY_TOLERANCE
+            degraded = degraded or drop
+            print(f"  {mode:>8} {name:>18}: {previous:.3f} -> {value:.3f}{'  REGRESSION' if drop else ''}")
+    return not degraded
+
+def main(k: int = 5, embedder_backend: str = EMBEDDER_TORCH, vdb_backend: str = VECTOR_DB_QDRANT, output: str = "bench_rag.json", baseline_path: str = None) -> int:
+    timer = StageTimer()
+    with open(GOLDEN_QUESTIONS_FILE, "r", encoding="utf-8") as file:
+        questions = json.load(file)
+
+    # Read first, the baseline may be the file this run overwrites.
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    filenames = [filename for filename in sorted(os.listdir(dataset_dir)) if filename.endswith((".html", ".htm"))]
+
+    # Parsing and chunking, sequential and without the parse cache.
+    strategy = SentenceChunkStrategy()
+    raw_chunk_count = 0
+    chunks = []
+    for filename in filenames:
+        with timer("parse"):
+            raw_chunks = parse_ship_file(os.path.join(dataset_dir, filename))
+        with timer("chunk"):
+            file_chunks = strategy.split_chunks(raw_chunks)
+        raw_chunk_count += len(raw_chunks)
+        for chunk in file_chunks:
+            chunk.chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{filename}/{chunk.content_hash()}"))
+        chunks.extend(file_chunks)
+
+    with timer("model_load"):
+        embedder = TimedEmbedder(create_embedder(embedder_backend))
+
+    directory = tempfile.mkdtemp(prefix="bench_rag")
+    if vdb_backend == VECTOR_DB_NUMPY:
+        vdb = NumpyVectorDB(embedder, directory)
+    else:
+        vdb = QdrantVectorDB(embedder, ":memory:")
+    vdb.init_collection(SHIPS_COLLECTION_NAME)
+
+    start = time.perf_counter()
+    vdb.add(chunks, SHIPS_COLLECTION_NAME)
+    vdb.flush(SHIPS_COLLECTION_NAME)
+    timer.add("embed", embedder.document_seconds)
+    timer.add("upsert", time.perf_counter() - start - embedder.document_seconds)
+
+    keyword_index = BM25Index()
+    with timer("keyword_index"):
+        keyword_index.add(chunks)
+    retriever = HybridRetriever(vdb, {SHIPS_COLLECTION_NAME: keyword_index})
+
+    ranks = {mode: [] for mode in SEARCH_MODES}
+    entity_hits = {mode: [] for mode in SEARCH_MODES}
+    with StubLLMServer() as url:
+        llm = OpenAILLM(provider="stub", api_key="stub", model="stub", url=url)
+        llm.user_prompt = ANSWER_PROMPT
+        prompt_tokens = []
+
+        for question in questions:
+            with timer("query_embed"):
+                query_vector = vdb.embed_query(question["question"])
+
+            results_by_mode = {}
+            for mode in SEARCH_MODES:
+                with timer(f"search_{mode}"):
+                    results = results_by_mode[mode] = retriever.search_results(question["question"], SHIPS_COLLECTION_NAME, limit=k, query_vector=query_vector, mode=mode)
+
+                rank = next((index + 1 for index, result in enumerate(results) if is_relevant(result.payload, question)), None)
+                ranks[mode].append(rank)
+                entity_hits[mode].append(any(result.payload.get("entity_name") == question["entity_name"] for result in results))
+
+            # The prompt and the answer use the hybrid results, as the app does.
+            with timer("prompt_build"):
+                context = ContextBuilder().build(results_by_mode[SEARCH_HYBRID])
+            with timer("llm"):
+                answer = llm.ask(context.text, question["question"])
+            prompt_tokens.append(answer.usage["prompt_tokens"] if answer.usage else 0)
+
+    vdb.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "k": k,
+            "embedder": embedder_backend,
+            "model": embedder.MODEL_NAME,
+            "vdb": vdb_backend,
+            "chunk_strategy": strategy.signature(),
+            "tokenizer": TOKENIZER,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count()
+        },
+        "corpus": {
+            "files": len(filenames),
+            "raw_chunks": raw_chunk_count,
+            "chunks": len(chunks),
+            "questions": len(questions),
+            "avg_prompt_tokens": sum(prompt_tokens) / len(prompt_tokens) if prompt_tokens else 0
+        },
+        "stages": timer.summary(),
+        "retrieval": {mode: retrieval_metrics(ranks[mode], entity_hits[mode], k) for mode in SEARCH_MODES}
+    }
+
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=1)
+
+    print(f"commit {report['commit']}, {len(filenames)} files, {len(chunks)} chunks, {len(questions)} questions, k={k}")
+    print(f"{'stage':>18} | {'count':>5} {'total ms':>9} {'mean ms':>8} {'p95 ms':>8}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:>18} | {stats['count']:>5} {stats['total_ms']:>9.1f} {stats['mean_ms']:>8.2f} {stats['p95_ms']:>8.2f}")
+    for mode, metrics in report["retrieval"].items():
+        print(f"{mode:>18} | " + ", ".join(f"{name} {value:.3f}" for name, value in metrics.items()))
+    print(f"written to {output}")
+
+    if baseline is not None and not compare(report, baseline):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--embedder", choices=EMBEDDER_BACKENDS, default=EMBEDDER_TORCH)
+    parser.add_argument("--vdb", choices=VECTOR_DB_BACKENDS, default=VECTOR_DB_QDRANT)
+    parser.add_argument("--output", default="bench_rag.json")
+    parser.add_argument("--baseline", help="earlier bench_rag JSON output to compare with")
+    args = parser.parse_args()
+    sys.exit(main(args.k, args.embedder, args.vdb, args.output, args.baseline))
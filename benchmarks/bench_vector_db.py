@@ -0,0 +1,137 @@
+# Compares QdrantVectorDB (local mode) with NumpyVectorDB in float32,
+# float16 and int8 on a synthetic collection: ingest time, disk size, cold
+# open time in a fresh process (open plus the first search), search latency
+# with and without an entity filter, and recall@k against exact float32
+# search. Vectors are random so the embedding model is not part of the
+# timings, every backend stores the same ones.
+#
+#   python -m benchmarks.bench_vector_db [--points 20000] [--dimension 384] [--queries 200] [-k 10]
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from src.chunking import ContentChunk
+from src.embedder import Embedder
+from src.vdb_numpy import NumpyVectorDB, VECTOR_DTYPES
+from src.vdb_qdrant import QdrantVectorDB
+
+COLLECTION = "bench_vector_db"
+ENTITIES = 100
+
+class RandomEmbedder(Embedder):
+    # Returns the vector stored for each text, the chunks carry it in their text.
+    MODEL_NAME = "random"
+
+    def __init__(self, dimension: int, vectors=None):
+        self._dimension = dimension
+        self.vectors = vectors or {}
+
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed_text(self, text: str):
+        return self.vectors[text]
+
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        return [self.vectors[text] for text in document]
+
+def open_db(backend: str, path: str, embedder: Embedder):
+    if backend == "qdrant":
+        return QdrantVectorDB(embedder, path)
+    return NumpyVectorDB(embedder, path, dtype=backend.split("-")[1], read_only=True)
+
+def cold_open(backend: str, path: str, dimension: int, query, results):
+    # Runs in a child process, imports are already done by the spawn.
+    start = time.perf_counter()
+    vdb = open_db(backend, path, RandomEmbedder(dimension))
+    vdb.search_results("", COLLECTION, limit=10, query_vector=query)
+    results.put(time.perf_counter() - start)
+    vdb.close()
+
+def directory_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def latencies(vdb, queries, filters):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        vdb.search_results("", COLLECTION, limit=10, query_vector=query, filters=filters)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+def main(points: int = 20000, dimension: int = 384, query_count: int = 200, k: int = 10) -> int:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((points, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = [vector.tolist() for vector in rng.standard_normal((query_count, dimension)).astype(np.float32)]
+
+    chunks = []
+    for index in range(points):
+        chunk = ContentChunk("ship", f"Ship {index % ENTITIES}", "overview", ["Overview"], f"chunk {index}", "")
+        chunk.chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, chunk.raw_text))
+        chunks.append(chunk)
+    embedder = RandomEmbedder(dimension, {chunk.raw_text: vectors[index].tolist() for index, chunk in enumerate(chunks)})
+    filters = {"entity_name": "Ship 7"}
+
+    # Exact top k, the reference of the recall column.
+    expected = [set(np.argsort(-(vectors @ np.asarray(query)))[:k]) for query in queries]
+    rows = {chunk.chunk_id: index for index, chunk in enumerate(chunks)}
+
+    directory = tempfile.mkdtemp(prefix="bench_vector_db")
+    context = multiprocessing.get_context("spawn")
+    print(f"points: {points}, dimension: {dimension}, queries: {query_count}, filter selects {points // ENTITIES} points")
+    print(f"{'backend':>13} | {'ingest s':>8} {'disk MB':>7} {'cold open ms':>12} | {'p50 ms':>6} {'p95 ms':>6} | {'filtered p50':>12} {'p95':>6} | {f'recall@{k}':>9}")
+    try:
+        for backend in ["qdrant"] + [f"numpy-{dtype}" for dtype in VECTOR_DTYPES]:
+            path = os.path.join(directory, backend)
+
+            start = time.perf_counter()
+            if backend == "qdrant":
+                vdb = QdrantVectorDB(embedder, path)
+            else:
+                vdb = NumpyVectorDB(embedder, path, dtype=backend.split("-")[1])
+            vdb.init_collection(COLLECTION)
+            vdb.add(chunks, COLLECTION)
+            vdb.flush(COLLECTION)
+            ingest_seconds = time.perf_counter() - start
+            vdb.close()
+
+            # Local Qdrant locks its directory, the writer is closed first.
+            results = context.Queue()
+            process = context.Process(target=cold_open, args=(backend, path, dimension, queries[0], results))
+            process.start()
+            open_seconds = results.get()
+            process.join()
+
+            vdb = open_db(backend, path, embedder)
+            p50, p95 = latencies(vdb, queries, None)
+            filtered_p50, filtered_p95 = latencies(vdb, queries, filters)
+            found = [{rows[result.id] for result in vdb.search_results("", COLLECTION, limit=k, query_vector=query)} for query in queries]
+            recall = np.mean([len(hits & exact) / k for hits, exact in zip(found, expected)])
+            vdb.close()
+
+            print(f"{backend:>13} | {ingest_seconds:>8.2f} {directory_size(path) / 2 ** 20:>7.1f} {open_seconds * 1000:>12.1f} | {p50:>6.2f} {p95:>6.2f} | {filtered_p50:>12.2f} {filtered_p95:>6.2f} | {recall:>9.3f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(main(args.points, args.dimension, args.queries, args.k))
@@ -0,0 +1,142 @@
+# A local OpenAI compatible chat completions server for benchmarks and
+# offline runs. Answers are deterministic: the first sentence of the
+# <context> block of the prompt, or a fixed sentence when there is none.
+# Usage is reported like the real API (count_tokens of the prompt and of
+# the answer), streaming included. --latency-ms adds a fixed delay before
+# each answer to stand in for generation time. --reject-stream-options
+# answers streams that ask for stream_options with a 400, as some
+# providers do.
+#
+#   python -m benchmarks.llm_stub [--port 8001] [--latency-ms 0] [--reject-stream-options]
+#
+# then point the app at it with INFERENCE_LLM_URL=http://127.0.0.1:8001/v1.
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.tokens import count_tokens
+
+NO_CONTEXT_ANSWER = "I could not find this in the ship documents."
+
+# The tags on lines of their own, the instructions above the block also
+# mention "<context> tags".
+CONTEXT_BLOCK = re.compile(r"^\s*<context>\s*$(.*?)^\s*</context>\s*$", re.DOTALL | re.MULTILINE)
+
+def stub_answer(prompt: str) -> str:
+    match = CONTEXT_BLOCK.search(prompt)
+    context = " ".join(match.group(1).split()) if match else ""
+    if not context:
+        return NO_CONTEXT_ANSWER
+    return re.split(r"(?<=[.!?])\s", context, maxsplit=1)[0]
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        return
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = "\n".join(message.get("content") or "" for message in request.get("messages", []))
+        answer = stub_answer(prompt)
+        usage = {
+            "prompt_tokens": count_tokens(prompt),
+            "completion_tokens": count_tokens(answer),
+            "total_tokens": count_tokens(prompt) + count_tokens(answer)
+        }
+        if self.server.latency_seconds:
+            time.sleep(self.server.latency_seconds)
+
+        model = request.get("model") or "stub"
+        if request.get("stream_options") and self.server.reject_stream_options:
+            self._send_json({"error": {"message": "Unrecognized request argument supplied: stream_options", "type": "invalid_request_error"}}, 400)
+            return
+        if request.get("stream"):
+            self._stream(model, answer, usage, request.get("stream_options") or {})
+        else:
+            self._send_json({
+                "id": "stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+    def _send_json(self, body, status: int = 200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model: str, answer: str, usage, stream_options):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        def send(choices, chunk_usage=None):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": model, "choices": choices}
+            if chunk_usage:
+                chunk["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        for token in re.findall(r"\S+\s*", answer):
+            send([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+        send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if stream_options.get("include_usage"):
+            send([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+class StubLLMServer:
+    # Serves on a free localhost port from a daemon thread, also usable as a
+    # context manager: with StubLLMServer() as url: ...
+    def __init__(self, port: int = 0, latency_ms: float = 0.0, reject_stream_options: bool = False):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency_seconds = latency_ms / 1000
+        self.server.reject_stream_options = reject_stream_options
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--reject-stream-options", action="store_true")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency_ms, args.reject_stream_options)
+    print(f"Stub LLM serving on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
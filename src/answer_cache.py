@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+@dataclass
+class CachedAnswer:
+    vector: List[float]
+    answer: str
+    created_at: float
+
+class SemanticAnswerCache:
+    # Returns a previous answer when a new question embeds within
+    # SIMILARITY_THRESHOLD (cosine) of a cached one and retrieval returned
+    # the same chunks, so the LLM round-trip can be skipped entirely.
+    SIMILARITY_THRESHOLD = 0.95
+    TTL_SECONDS = 24 * 60 * 60
+    CAPACITY = 512
+
+    def __init__(self, similarity_threshold: float = SIMILARITY_THRESHOLD, ttl_seconds: float = TTL_SECONDS, capacity: int = CAPACITY):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.capacity = max(1, capacity)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Entries are grouped by the ids of the retrieved chunks, only
+        # questions answered from the same context are compared.
+        self._entries: Dict[Tuple[str, ...], List[CachedAnswer]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, vector: List[float], context_ids: List[str]) -> Optional[str]:
+        key = self._key(context_ids)
+        now = time.monotonic()
+
+        with self._lock:
+            best_entry = None
+            best_similarity = self.similarity_threshold
+            for entry in self._entries.get(key, []):
+                if now - entry.created_at > self.ttl_seconds:
+                    continue
+
+                similarity = cosine_similarity(vector, entry.vector)
+                if similarity >= best_similarity:
+                    best_entry, best_similarity = entry, similarity
+
+            if best_entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return best_entry.answer
+
+    def put(self, vector: List[float], context_ids: List[str], answer: str):
+        key = self._key(context_ids)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+            self._entries.setdefault(key, []).append(CachedAnswer(list(vector), answer, now))
+            self._size += 1
+
+            while self._size > self.capacity:
+                self._evict_oldest()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._size,
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _key(self, context_ids: List[str]) -> Tuple[str, ...]:
+        return tuple(sorted(context_ids))
+
+    def _evict_expired(self, now: float):
+        for key in list(self._entries):
+            entries = self._entries[key]
+            kept = [entry for entry in entries if now - entry.created_at <= self.ttl_seconds]
+            self._drop(key, entries, kept)
+
+    def _evict_oldest(self):
+        key, entries = min(self._entries.items(), key=lambda item: item[1][0].created_at)
+        self._drop(key, entries, entries[1:])
+
+    def _drop(self, key: Tuple[str, ...], entries: List[CachedAnswer], kept: List[CachedAnswer]):
+        removed = len(entries) - len(kept)
+        if not removed:
+            return
+
+        self.evictions += removed
+        self._size -= removed
+        if kept:
+            self._entries[key] = kept
+        else:
+            del self._entries[key]
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
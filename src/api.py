@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Iterator, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from .context_builder import ContextBuilder, payload_text
+from .embedding_pipeline import EmbeddingPipeline
+from .hybrid_search import SEARCH_HYBRID
+from .rag_service import PreparedAnswer, RAGService
+from .telemetry import METRICS
+
+# Blocking work (embedding, Qdrant, BM25, the reranker) runs in the default
+# executor. Its usual size of cpu_count + 4 threads would cap how many
+# queries can wait on the same embedding batch.
+WORKER_THREADS = 64
+
+class AskRequest(BaseModel):
+    query: str
+    topic: List[str] = Field(default_factory=list)
+    mode: str = SEARCH_HYBRID
+    rerank: bool = True
+    token_budget: int = Field(default=ContextBuilder.TOKEN_BUDGET, ge=100)
+
+class SearchRequest(BaseModel):
+    query: str
+    topic: List[str] = Field(default_factory=list)
+    mode: str = SEARCH_HYBRID
+    rerank: bool = True
+    limit: int = Field(default=RAGService.RESULTS_PER_SHIP, ge=1, le=50)
+
+def create_app(service: Optional[RAGService] = None) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=WORKER_THREADS))
+
+        app.state.service = service or RAGService.create()
+        if app.state.service.start() == EmbeddingPipeline.FAILURE:
+            print("[WARNING]: Failed to embed the dataset, answers may be incomplete")
+        # Load the models now rather than on the first request, without
+        # holding up the startup.
+        app.state.service.warm_up(rerank=True)
+        yield
+        await app.state.service.aclose()
+
+    app = FastAPI(title="Astro Mind", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.service.stats()
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        # Prometheus text exposition format, /stats has the same as JSON.
+        return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/ask")
+    async def ask(request: AskRequest, stream: bool = False):
+        # With ?stream=true the answer comes as server-sent events: one
+        # "token" event per piece of text, then "done" with the summary.
+        service = app.state.service
+        try:
+            if stream:
+                prepared = await service.prepare(request.query, request.topic, request.mode, request.rerank, request.token_budget)
+            else:
+                prepared = await service.ask(request.query, request.topic, request.mode, request.rerank, request.token_budget)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Searching the ship documents took too long")
+
+        if stream:
+            # A sync generator, Starlette iterates it in a worker thread.
+            return StreamingResponse(answer_events(service, prepared), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+        return prepared.summary()
+
+    @app.post("/search")
+    async def search(request: SearchRequest):
+        try:
+            results = await app.state.service.search(request.query, request.topic, request.mode, request.rerank, request.limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Searching the ship documents took too long")
+
+        return {
+            "results": [
+                {
+                    "id": result.id,
+                    "score": result.score,
+                    "entity_name": result.payload.get("entity_name"),
+                    "section_type": result.payload.get("section_type"),
+                    "headers": result.payload.get("headers", []),
+                    "text": payload_text(result.payload)
+                }
+                for result in results
+            ]
+        }
+
+    return app
+
+def answer_events(service: RAGService, prepared: PreparedAnswer) -> Iterator[str]:
+    try:
+        if prepared.answer is None:
+            tokens = []
+            for token in service.stream(prepared):
+                tokens.append(token)
+                yield server_sent_event("token", token)
+            service.finish(prepared, "".join(tokens))
+        else:
+            yield server_sent_event("token", prepared.answer)
+    except Exception as e:
+        # The status line is already sent, the client gets the error as an event.
+        print(f"[ERROR]: Failed to stream the answer: {e}")
+        yield server_sent_event("error", {"detail": str(e)})
+        return
+    yield server_sent_event("done", prepared.summary())
+
+def server_sent_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# uvicorn src.api:app --host 0.0.0.0 --port 8000
+app = create_app()
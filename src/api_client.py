@@ -0,0 +1,88 @@
+import json
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+class AnswerStream:
+    # The tokens of a streamed answer. `turn` holds the PreparedAnswer
+    # summary once the stream has been consumed.
+    def __init__(self, events: Iterator[Tuple[str, Any]]):
+        self._events = events
+        self.turn: Optional[Dict[str, Any]] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for event, data in self._events:
+            if event == "token":
+                yield data
+            elif event == "done":
+                self.turn = data
+            elif event == "error":
+                raise RuntimeError(f"Astro Mind API error: {data.get('detail')}")
+        if self.turn is None:
+            raise RuntimeError("Astro Mind API error: the answer stream ended early")
+
+class AstroMindClient:
+    # Talks to the API in src/api.py, with the same arguments as RAGService.
+    # Answers come back as PreparedAnswer.summary() dicts.
+    TIMEOUT = 90.0
+
+    def __init__(self, base_url: str, timeout: float = TIMEOUT):
+        self.client = httpx.Client(base_url=base_url.rstrip("/"), timeout=timeout)
+
+    def ask(self, query: str, topic: Optional[List[str]] = None, mode: Optional[str] = None, rerank: bool = True, token_budget: Optional[int] = None) -> Dict[str, Any]:
+        return self._post("/ask", self._ask_body(query, topic, mode, rerank, token_budget))
+
+    def stream(self, query: str, topic: Optional[List[str]] = None, mode: Optional[str] = None, rerank: bool = True, token_budget: Optional[int] = None) -> AnswerStream:
+        # Nothing is sent until the stream is iterated.
+        return AnswerStream(self._events("/ask", self._ask_body(query, topic, mode, rerank, token_budget)))
+
+    def search(self, query: str, topic: Optional[List[str]] = None, mode: Optional[str] = None, rerank: bool = True, limit: int = 3) -> List[Dict[str, Any]]:
+        body = {"query": query, "topic": topic or [], "rerank": rerank, "limit": limit}
+        if mode:
+            body["mode"] = mode
+        return self._post("/search", body)["results"]
+
+    def stats(self) -> Dict[str, Any]:
+        response = self.client.get("/stats")
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.client.close()
+
+    def _ask_body(self, query: str, topic: Optional[List[str]], mode: Optional[str], rerank: bool, token_budget: Optional[int]) -> Dict[str, Any]:
+        body = {"query": query, "topic": topic or [], "rerank": rerank}
+        if mode:
+            body["mode"] = mode
+        if token_budget:
+            body["token_budget"] = token_budget
+        return body
+
+    def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.post(path, json=body)
+        self._raise_for_status(response)
+        return response.json()
+
+    def _events(self, path: str, body: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        # Server-sent events, see answer_events in src/api.py.
+        with self.client.stream("POST", path, params={"stream": "true"}, json=body) as response:
+            if response.status_code >= 400:
+                response.read()
+                self._raise_for_status(response)
+
+            event = None
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    yield event, json.loads(line[len("data: "):])
+
+    def _raise_for_status(self, response: httpx.Response):
+        if response.status_code < 400:
+            return
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        raise RuntimeError(f"Astro Mind API error {response.status_code}: {detail}")
@@ -0,0 +1,207 @@
+import math
+import os
+import re
+import threading
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .chunking import ContentChunk
+from .telemetry import traced
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "has", "have", "how",
+    "i", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "what", "which", "with"
+}
+
+def tokenize(text: str) -> List[str]:
+    # Module classes ("6a"), numbers ("32.96") and numerals ("iii") are kept
+    # whole, those exact tokens are what dense retrieval struggles with.
+    return [token for token in re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", text.lower()) if token not in STOPWORDS]
+
+def chunk_text(chunk: ContentChunk) -> str:
+    return "\n".join([chunk.entity_name, *chunk.headers, chunk.raw_text])
+
+class BM25Index:
+    # Okapi BM25 over the chunks of one collection.
+    #
+    # Documents are kept doc-major (term ids and frequencies per chunk) so the
+    # pipeline can add and delete chunks as files change. Search uses a
+    # term-major CSR view rebuilt lazily with NumPy, so a query only touches
+    # the postings of its own terms. Both are persisted in a single .npz file
+    # that is only read on first use.
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._loaded = path is None
+        # Set when documents changed since the last save.
+        self.dirty = False
+        self._vocabulary: Dict[str, int] = {}
+        self._documents: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._fields: Dict[str, Dict[str, str]] = {}
+        self._postings = None
+        # Concurrent searches share the lazy load and the search view build.
+        self._lock = threading.Lock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        self._ensure_loaded()
+        return doc_id in self._documents
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._documents)
+
+    def add(self, chunks: Iterable[ContentChunk]):
+        self._ensure_loaded()
+        for chunk in chunks:
+            counts = Counter(tokenize(chunk_text(chunk)))
+            term_ids = np.array([self._vocabulary.setdefault(term, len(self._vocabulary)) for term in counts], dtype=np.int32)
+            self._documents[chunk.chunk_id] = (term_ids, np.array(list(counts.values()), dtype=np.int32))
+            self._fields[chunk.chunk_id] = {
+                "entity_type": chunk.entity_type,
+                "entity_name": chunk.entity_name,
+                "section_type": chunk.section_type
+            }
+            self.dirty = True
+        self._postings = None
+
+    def delete(self, doc_ids: Iterable[str]):
+        self._ensure_loaded()
+        for doc_id in doc_ids:
+            if self._documents.pop(doc_id, None) is not None:
+                self._fields.pop(doc_id, None)
+                self.dirty = True
+        self._postings = None
+
+    def clear(self):
+        self._loaded = True
+        self._vocabulary = {}
+        self._documents = {}
+        self._fields = {}
+        self._postings = None
+        self.dirty = True
+
+    @traced("keyword_search")
+    def search(self, query: str, limit: int = 10, filters: Optional[Dict[str, List[Any]]] = None) -> List[Tuple[str, float]]:
+        self._ensure_loaded()
+        term_ids = [self._vocabulary[term] for term in set(tokenize(query)) if term in self._vocabulary]
+        if not term_ids or not self._documents:
+            return []
+
+        doc_ids, doc_lengths, offsets, posting_docs, posting_freqs, fields = self._search_view()
+        average_length = doc_lengths.mean()
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+
+        for term_id in term_ids:
+            if term_id + 1 >= len(offsets):
+                continue
+            start, end = offsets[term_id], offsets[term_id + 1]
+            if start == end:
+                continue
+
+            docs = posting_docs[start:end]
+            freqs = posting_freqs[start:end]
+            idf = math.log(1 + (len(doc_ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.K1 * (1 - self.B + self.B * doc_lengths[docs] / average_length)
+            scores[docs] += idf * freqs * (self.K1 + 1) / (freqs + norm)
+
+        for field, values in (filters or {}).items():
+            scores[~np.isin(fields[field], values)] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(doc_ids[index], float(scores[index])) for index in candidates]
+
+    def save(self):
+        if self.path is None:
+            return
+
+        self._ensure_loaded()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        doc_ids = sorted(self._documents)
+        lengths = np.array([len(self._documents[doc_id][0]) for doc_id in doc_ids], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        empty = np.array([], dtype=np.int32)
+
+        vocabulary = sorted(self._vocabulary, key=self._vocabulary.get)
+        arrays = {
+            "vocabulary": np.array(vocabulary, dtype=str),
+            "doc_ids": np.array(doc_ids, dtype=str),
+            "doc_offsets": offsets,
+            "doc_terms": np.concatenate([self._documents[doc_id][0] for doc_id in doc_ids]) if doc_ids else empty,
+            "doc_freqs": np.concatenate([self._documents[doc_id][1] for doc_id in doc_ids]) if doc_ids else empty
+        }
+        for field in ("entity_type", "entity_name", "section_type"):
+            arrays[field] = np.array([self._fields[doc_id][field] for doc_id in doc_ids], dtype=str)
+
+        # np.savez appends .npz to names without it, write to a matching tmp.
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING]: Ignoring unreadable BM25 index {self.path}: {e}")
+            return
+
+        self._vocabulary = {str(term): index for index, term in enumerate(arrays["vocabulary"])}
+        offsets = arrays["doc_offsets"]
+        for index, doc_id in enumerate(arrays["doc_ids"]):
+            start, end = offsets[index], offsets[index + 1]
+            self._documents[str(doc_id)] = (arrays["doc_terms"][start:end], arrays["doc_freqs"][start:end])
+            self._fields[str(doc_id)] = {
+                field: str(arrays[field][index]) for field in ("entity_type", "entity_name", "section_type")
+            }
+
+    def _search_view(self):
+        if self._postings is not None:
+            return self._postings
+
+        with self._lock:
+            if self._postings is not None:
+                return self._postings
+
+            doc_ids = list(self._documents)
+            terms = [self._documents[doc_id][0] for doc_id in doc_ids]
+            freqs = [self._documents[doc_id][1] for doc_id in doc_ids]
+
+            doc_lengths = np.array([freq.sum() for freq in freqs], dtype=np.float64)
+            all_terms = np.concatenate(terms)
+            all_freqs = np.concatenate(freqs).astype(np.float64)
+            all_docs = np.repeat(np.arange(len(doc_ids), dtype=np.int32), [len(term) for term in terms])
+
+            # Sort the (term, doc) pairs by term to get one contiguous posting
+            # list per term.
+            order = np.argsort(all_terms, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(all_terms, minlength=len(self._vocabulary)))])
+            fields = {
+                field: np.array([self._fields[doc_id][field] for doc_id in doc_ids], dtype=str)
+                for field in ("entity_type", "entity_name", "section_type")
+            }
+            self._postings = (doc_ids, doc_lengths, offsets, all_docs[order], all_freqs[order], fields)
+        return self._postings
@@ -0,0 +1,72 @@
+# Builds the indexes ahead of time, e.g. while building the Docker image:
+# runs every embedding pipeline, loads the embedder and the cross-encoder so
+# their weights land in the model caches, then writes the index artifact.
+# The app finds the artifact at startup and skips the pipelines it covers.
+#
+#   python -m src.build_index [--no-reranker]
+#
+# Uses the same EMBEDDER_BACKEND and VECTOR_DB_BACKEND variables as the app,
+# an index is only reused by an app configured the same way.
+
+import argparse
+import os
+import sys
+import time
+
+from .constants import EMBEDDER_BACKEND, LOCAL_INDEX_ARTIFACT_FILE
+from .embedding_pipeline import EmbeddingPipeline, STATUS_DONE
+from .embedding_scheduler import EmbeddingScheduler
+from .index_artifact import IndexArtifact
+from .pipeline_registry import run_pipelines
+from .rag_service import EMBEDDER_TORCH, create_embedder, create_indexes, load_environment
+
+def build_index(artifact_path: str = LOCAL_INDEX_ARTIFACT_FILE, reranker: bool = True) -> bool:
+    load_environment()
+
+    start = time.perf_counter()
+    embedder = create_embedder(os.getenv(EMBEDDER_BACKEND, EMBEDDER_TORCH))
+    # Fetches the weights even when there is nothing to embed.
+    embedder.dimension()
+    print(f"Loaded {embedder.MODEL_NAME} in {time.perf_counter() - start:.1f} s")
+
+    if reranker:
+        from .reranker import BAAIReranker
+
+        start = time.perf_counter()
+        BAAIReranker()
+        print(f"Loaded {BAAIReranker.MODEL_NAME} in {time.perf_counter() - start:.1f} s")
+
+    embedder = EmbeddingScheduler(embedder)
+    vdb, _, pipelines = create_indexes(embedder)
+    artifact = IndexArtifact(artifact_path)
+    start = time.perf_counter()
+    try:
+        result = run_pipelines(pipelines)
+        print(f"Pipelines done in {time.perf_counter() - start:.1f} s")
+
+        for pipeline in pipelines:
+            progress = pipeline.progress()
+            if progress["status"] != STATUS_DONE:
+                print(f"[ERROR]: {pipeline.name} failed, the index artifact is not written")
+                continue
+            if progress["failed_files"]:
+                # Left out of the artifact, so the app retries those files.
+                print(f"[WARNING]: {pipeline.name} skipped {len(progress['failed_files'])} files: {', '.join(sorted(progress['failed_files']))}")
+                continue
+            artifact.set_pipeline(pipeline.name, pipeline.index_state())
+            print(f"{pipeline.name} done, {progress['files_done']} files")
+    finally:
+        vdb.close()
+        embedder.close()
+
+    if result == EmbeddingPipeline.SUCCESS:
+        artifact.save()
+        print(f"Index artifact written to {artifact_path}")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifact", default=LOCAL_INDEX_ARTIFACT_FILE)
+    parser.add_argument("--no-reranker", action="store_true", help="do not cache the cross-encoder weights")
+    args = parser.parse_args()
+    sys.exit(0 if build_index(args.artifact, not args.no_reranker) else 1)
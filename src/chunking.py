@@ -1,5 +1,15 @@
+import hashlib
+import json
+import re
+
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
+
+from .telemetry import traced
+from .tokens import TOKENIZER, count_tokens
+
+# Placeholder the processors store for infobox fields a page does not define.
+UNDEFINED_INFOBOX_VALUE = "N/A"
 
 @dataclass
 class ContentChunk:
@@ -10,12 +20,52 @@ class ContentChunk:
     raw_text: str
     source: str
     infobox: Optional[Dict[str, Any]] = None
+    chunk_id: Optional[str] = None
+
+    def content_hash(self) -> str:
+        content = json.dumps([
+            self.entity_type,
+            self.entity_name,
+            self.section_type,
+            self.headers,
+            self.raw_text,
+            self.source,
+            self.infobox
+        ], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def infobox_text(self) -> str:
+        # One "Group: label value, ..." line per infobox group, leaving out
+        # the fields the page does not define.
+        if not self.infobox:
+            return ""
+
+        lines = []
+        for group, values in self.infobox.items():
+            if not isinstance(values, dict):
+                values = {group: values}
+                group = ""
+
+            fields = [
+                f"{label.replace('_', ' ')} {' '.join(str(value).split())}"
+                for label, value in values.items()
+                if value not in (None, "", UNDEFINED_INFOBOX_VALUE)
+            ]
+            if fields:
+                prefix = f"{group.replace('_', ' ').capitalize()}: " if group else ""
+                lines.append(prefix + ", ".join(fields))
+        return "\n".join(lines)
 
 class ChunkStrategy:
     MAX_CHUNK_SIZE = 1500
     MIN_CHUNK_SIZE = 300
 
     @classmethod
+    def signature(cls) -> str:
+        return f"chunks-{cls.MIN_CHUNK_SIZE}-{cls.MAX_CHUNK_SIZE}"
+
+    @classmethod
+    @traced("split_chunks")
     def split_chunks(cls, chunks: List[ContentChunk]) -> List[ContentChunk]:
         optimized = []
         for chunk in chunks:
@@ -49,3 +99,180 @@ class ChunkStrategy:
                     infobox=chunk.infobox
                 ))
         return optimized
+
+# Candidate sentence ends: terminal punctuation (with closing quotes or
+# brackets) followed by whitespace, or a line break between paragraphs.
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+# Words whose trailing period does not end a sentence ("Mk. II", "e.g. the").
+ABBREVIATIONS = {"mk", "mr", "mrs", "dr", "st", "vs", "no", "e.g", "i.e", "etc", "approx", "ca"}
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    start = 0
+    # End of the previous candidate. Candidates end on whitespace, so the
+    # word before a candidate starts after it: each character is scanned once.
+    previous = 0
+    for match in SENTENCE_END.finditer(text):
+        end = match.end()
+        scan_from, previous = previous, end
+        if "\n" not in match.group() and end < len(text):
+            # A lowercase continuation, an abbreviation or an initial is not a
+            # sentence boundary.
+            if not text[end].isupper() and not text[end].isdigit():
+                continue
+            words = text[scan_from:match.start()].rsplit(None, 1) or text[start:match.start()].rsplit(None, 1)
+            last_word = words[-1].lower() if words else ""
+            if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                continue
+
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+
+    sentence = text[start:].strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+class SentenceChunkStrategy(ChunkStrategy):
+    # Sections shorter than MIN_CHUNK_SIZE characters are merged into the
+    # next section of the same entity, then any section longer than
+    # max_tokens is cut on sentence boundaries into windows that repeat up
+    # to overlap_tokens of the previous window. Sizes are tracked
+    # incrementally, every sentence is counted once.
+    MAX_CHUNK_TOKENS = 320
+    OVERLAP_TOKENS = 48
+    # Bump whenever a change alters the chunks, the signature then triggers
+    # a rebuild of the indexes.
+    VERSION = 2
+
+    def __init__(
+        self,
+        max_tokens: int = MAX_CHUNK_TOKENS,
+        overlap_tokens: int = OVERLAP_TOKENS,
+        min_chunk_size: int = ChunkStrategy.MIN_CHUNK_SIZE,
+        count_tokens: Callable[[str], int] = count_tokens
+    ):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(f"overlap_tokens must be in [0, {max_tokens}), got {overlap_tokens}")
+
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_chunk_size = min_chunk_size
+        self.count_tokens = count_tokens
+
+    def signature(self) -> str:
+        return f"sentences-v{self.VERSION}-{self.min_chunk_size}-{self.max_tokens}-{self.overlap_tokens}-{TOKENIZER}"
+
+    @traced("split_chunks")
+    def split_chunks(self, chunks: List[ContentChunk]) -> List[ContentChunk]:
+        optimized = []
+        for chunk in self.merge_chunks(chunks):
+            if self.count_tokens(chunk.raw_text) <= self.max_tokens:
+                optimized.append(chunk)
+                continue
+
+            for text in self._windows(chunk.raw_text):
+                optimized.append(ContentChunk(
+                    entity_type=chunk.entity_type,
+                    entity_name=chunk.entity_name,
+                    section_type=chunk.section_type,
+                    headers=chunk.headers,
+                    raw_text=text,
+                    source=chunk.source,
+                    infobox=chunk.infobox
+                ))
+        return optimized
+
+    def merge_chunks(self, chunks: List[ContentChunk]) -> List[ContentChunk]:
+        merged = []
+        pending = None
+        for chunk in chunks:
+            if pending is not None:
+                if self._same_entity(pending, chunk):
+                    chunk = self._combine(pending, chunk)
+                else:
+                    merged.append(pending)
+                pending = None
+
+            if len(chunk.raw_text.strip()) < self.min_chunk_size:
+                pending = chunk
+            else:
+                merged.append(chunk)
+
+        if pending is not None:
+            # A short last section joins the one before it instead.
+            if merged and self._same_entity(merged[-1], pending):
+                merged[-1] = self._combine(merged[-1], pending)
+            else:
+                merged.append(pending)
+        return merged
+
+    def _windows(self, text: str) -> List[str]:
+        sentences = []
+        tokens = []
+        for sentence in split_sentences(text):
+            sentence_tokens = self.count_tokens(sentence)
+            if sentence_tokens <= self.max_tokens:
+                sentences.append(sentence)
+                tokens.append(sentence_tokens)
+                continue
+
+            for piece in self._split_words(sentence):
+                sentences.append(piece)
+                tokens.append(self.count_tokens(piece))
+
+        windows = []
+        start = 0
+        size = 0
+        for end, sentence_tokens in enumerate(tokens):
+            if size + sentence_tokens > self.max_tokens and end > start:
+                windows.append(" ".join(sentences[start:end]))
+
+                # Step back over the last sentences of the window that fit in
+                # the overlap, always moving forward by at least one.
+                next_start = end
+                size = 0
+                while next_start > start + 1 and size + tokens[next_start - 1] <= self.overlap_tokens:
+                    next_start -= 1
+                    size += tokens[next_start]
+                start = next_start
+            size += sentence_tokens
+
+        windows.append(" ".join(sentences[start:]))
+        return windows
+
+    def _split_words(self, sentence: str) -> List[str]:
+        # Sentences longer than a window (tables flattened to text, lists
+        # without punctuation) are cut between words.
+        pieces = []
+        words = []
+        size = 0
+        for word in sentence.split():
+            word_tokens = self.count_tokens(f" {word}")
+            if words and size + word_tokens > self.max_tokens:
+                pieces.append(" ".join(words))
+                words = []
+                size = 0
+            words.append(word)
+            size += word_tokens
+        if words:
+            pieces.append(" ".join(words))
+        return pieces
+
+    def _same_entity(self, first: ContentChunk, second: ContentChunk) -> bool:
+        return (first.entity_type, first.entity_name) == (second.entity_type, second.entity_name)
+
+    def _combine(self, first: ContentChunk, second: ContentChunk) -> ContentChunk:
+        separator = "" if not first.raw_text or first.raw_text.endswith("\n") else "\n"
+        return ContentChunk(
+            entity_type=first.entity_type,
+            entity_name=first.entity_name,
+            # Filed under the section it starts with, whatever the lengths.
+            section_type=first.section_type,
+            headers=first.headers + second.headers,
+            raw_text=first.raw_text + separator + second.raw_text,
+            source=first.source + second.source,
+            infobox=first.infobox or second.infobox
+        )
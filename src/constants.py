@@ -7,8 +7,21 @@ ENGINEERING_DATA_DIR = f"{DATASET_DIR}/Engineering"
 RAW_DATA_FOLDER_NAME = "raw_data"
 
 SHIPS_COLLECTION_NAME = "ships"
+EQUIPMENT_COLLECTION_NAME = "equipment"
+WEAPONS_COLLECTION_NAME = "weapons"
+ENGINEERING_COLLECTION_NAME = "engineering"
 
 LOCAL_VECTOR_DB_FILE = "./astro-mind-vector.db"
+LOCAL_NUMPY_VECTOR_DB_DIR = "./astro-mind-vectors"
+LOCAL_INDEX_MANIFEST_FILE = "./astro-mind-index.json"
+LOCAL_INDEX_ARTIFACT_FILE = "./astro-mind-artifact.json"
+# Manifest of the domains other than ships, see PipelineDomain.
+LOCAL_DOMAIN_INDEX_MANIFEST_FILE = "./astro-mind-index-{collection_name}.json"
+LOCAL_PARSE_CACHE_DIR = "./astro-mind-cache/parsed"
+LOCAL_QUERY_CACHE_FILE = "./astro-mind-cache/queries.sqlite"
+LOCAL_SHIP_SPECS_FILE = "./astro-mind-cache/ship-specs.npz"
+LOCAL_KEYWORD_INDEX_DIR = "./astro-mind-cache/bm25"
+LOCAL_ONNX_MODEL_DIR = "./astro-mind-cache/onnx"
 
 ERROR_ENV_KEY_NOT_FOUND = "ERROR_ENV_KEY_NOT_FOUND"
 
@@ -24,3 +37,21 @@ INFERENCE_LLM_PROVIDER = "INFERENCE_LLM_PROVIDER"
 INFERENCE_LLM_API_KEY = "INFERENCE_LLM_API_KEY"
 INFERENCE_LLM_MODEL = "INFERENCE_LLM_MODEL"
 INFERENCE_LLM_URL = "INFERENCE_LLM_URL"
+# "0" stops asking the provider for the usage of streamed answers, see OpenAILLM.
+INFERENCE_LLM_STREAM_USAGE = "INFERENCE_LLM_STREAM_USAGE"
+
+# Qdrant server shared by several API workers, the local file is used when unset.
+QDRANT_URL = "QDRANT_URL"
+# Limits of the query embedding micro-batches, see EmbeddingScheduler.
+EMBEDDING_MAX_BATCH_SIZE = "EMBEDDING_MAX_BATCH_SIZE"
+EMBEDDING_MAX_WAIT_MS = "EMBEDDING_MAX_WAIT_MS"
+# Base URL of the Astro Mind API, Streamlit becomes a client of it when set.
+ASTRO_MIND_API_URL = "ASTRO_MIND_API_URL"
+# Query and document embedder: "torch" (default), "onnx" or "onnx-int8".
+EMBEDDER_BACKEND = "EMBEDDER_BACKEND"
+# Intra-op threads of the ONNX embedder, see ONNXEmbedder.THREADS.
+EMBEDDER_THREADS = "EMBEDDER_THREADS"
+# Vector DB: "qdrant" (default) or "numpy", and the NumPy vectors dtype
+# ("float32", "float16" or "int8"), see NumpyVectorDB.
+VECTOR_DB_BACKEND = "VECTOR_DB_BACKEND"
+VECTOR_DB_DTYPE = "VECTOR_DB_DTYPE"
@@ -0,0 +1,96 @@
+import html
+import re
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set
+
+from .telemetry import traced
+from .tokens import count_tokens
+from .vdb import SearchResult
+
+def payload_text(payload: Dict[str, Any]) -> str:
+    if "text" in payload:
+        return payload["text"].strip()
+
+    # Points indexed before the clean text was stored only carry the HTML.
+    text = re.sub(r"<[^>]+>", " ", payload.get("html_snippet", ""))
+    return " ".join(html.unescape(text).split())
+
+@dataclass
+class BuiltContext:
+    text: str
+    tokens: int
+    chunk_ids: List[str] = field(default_factory=list)
+    duplicates: int = 0
+    over_budget: int = 0
+
+class ContextBuilder:
+    # Packs search results, in rank order, into a plain text context that fits
+    # in `token_budget` tokens. Each entity's infobox is rendered once, and a
+    # chunk whose word shingles mostly appear in already packed chunks (the
+    # overlap between neighbouring windows, or the same text from another
+    # section) is dropped. Chunks that no longer fit are skipped so a smaller,
+    # lower ranked one can still use the remaining budget.
+    TOKEN_BUDGET = 1500
+    SHINGLE_SIZE = 5
+    DUPLICATE_OVERLAP = 0.8
+
+    def __init__(self, token_budget: int = TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    @traced("context_build")
+    def build(self, results: List[SearchResult], topic: str = "") -> BuiltContext:
+        blocks = []
+        tokens = 0
+        if topic:
+            blocks.append(topic)
+            tokens = count_tokens(topic)
+
+        context = BuiltContext(text="", tokens=0)
+        seen_shingles: Set[tuple] = set()
+        rendered_infoboxes: Set[str] = set()
+
+        for result in results:
+            payload = result.payload
+            entity_name = payload.get("entity_name", "")
+            parts = []
+
+            infobox = payload.get("infobox_text", "")
+            if infobox and entity_name not in rendered_infoboxes:
+                parts.append(infobox)
+
+            text = payload_text(payload)
+            shingles = self._shingles(text)
+            if shingles and len(shingles & seen_shingles) >= self.DUPLICATE_OVERLAP * len(shingles):
+                text = ""
+            if text:
+                parts.append(text)
+
+            if not parts:
+                context.duplicates += 1
+                continue
+
+            headers = payload.get("headers") or []
+            title = " - ".join(name for name in [entity_name, headers[0] if headers else ""] if name)
+            block = "\n".join([f"## {title}", *parts])
+            block_tokens = count_tokens(block)
+            if tokens + block_tokens > self.token_budget:
+                context.over_budget += 1
+                continue
+
+            blocks.append(block)
+            tokens += block_tokens
+            context.chunk_ids.append(result.id)
+            seen_shingles |= shingles
+            if infobox:
+                rendered_infoboxes.add(entity_name)
+
+        context.text = "\n\n".join(blocks)
+        context.tokens = count_tokens(context.text)
+        return context
+
+    def _shingles(self, text: str) -> Set[tuple]:
+        words = text.lower().split()
+        if len(words) <= self.SHINGLE_SIZE:
+            return {tuple(words)} if words else set()
+        return {tuple(words[index:index + self.SHINGLE_SIZE]) for index in range(len(words) - self.SHINGLE_SIZE + 1)}
@@ -0,0 +1,327 @@
+import hashlib
+import multiprocessing
+import os
+import time
+import uuid
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+
+from .bm25 import BM25Index
+from .chunking import ChunkStrategy, ContentChunk, SentenceChunkStrategy
+from .constants import LOCAL_PARSE_CACHE_DIR, RAW_DATA_FOLDER_NAME
+from .embedding_pipeline import EmbeddingPipeline, STATUS_DONE, STATUS_FAILED
+from .html_processor import BaseHTMLProcessor, PARSER_HTML, parse_html_file
+from .index_manifest import IndexManifest
+from .parse_cache import ParsedChunkCache
+from .telemetry import METRICS, record
+from .vdb import VectorDB
+
+class DomainEmbeddingPipeline(EmbeddingPipeline):
+    # Indexes the HTML pages of one domain (the files in
+    # {data_dir}/raw_data) into one collection: parse with `processor`,
+    # chunk, embed and upsert what changed since the last run, keep the
+    # keyword index in sync and record everything in the index manifest.
+    #
+    # A file that cannot be read, parsed or indexed is reported in
+    # progress() and left out of the manifest, so the next run retries it.
+    # Only a collection that cannot be initialized fails the whole run.
+    #
+    # Subclasses keep extra per-file stores up to date through the _load_*,
+    # _file_* and _save_* hooks, see ShipsEmbeddingPipeline.
+    def __init__(
+        self,
+        vdb: VectorDB,
+        name: str,
+        data_dir: str,
+        processor: Type[BaseHTMLProcessor],
+        collection_name: str,
+        manifest_path: str,
+        parse_workers: int = os.cpu_count() or 1,
+        parse_cache_dir: str = LOCAL_PARSE_CACHE_DIR,
+        html_parser: str = PARSER_HTML,
+        prune_html: bool = False,
+        keyword_index: Optional[BM25Index] = None,
+        chunk_strategy: Optional[ChunkStrategy] = None
+    ):
+        super().__init__(vdb)
+
+        self.name = name
+        self.dataset_dir = f"{data_dir}/{RAW_DATA_FOLDER_NAME}"
+        self.processor = processor
+        self.collection_name = collection_name
+        self.manifest_path = manifest_path
+        # 1 parses the files sequentially in the current process.
+        self.parse_workers = parse_workers
+        self.parse_cache = ParsedChunkCache(parse_cache_dir)
+        self.html_parser = html_parser
+        # Only keep the article body, dropping the page chrome around it.
+        self.prune_html = prune_html
+        self.processor_variant = processor.variant(html_parser, prune_html)
+        # Kept in sync with the vector DB for hybrid keyword search.
+        self.keyword_index = keyword_index
+        self.chunk_strategy = chunk_strategy or SentenceChunkStrategy()
+
+    def start(self):
+        self._begin_run()
+        manifest = IndexManifest.load(self.manifest_path)
+        self._load_stores()
+        signature = self._index_signature()
+
+        try:
+            if manifest.signature(self.collection_name) != signature or not self.vdb.has_collection(self.collection_name):
+                self.vdb.init_collection(self.collection_name)
+                manifest.reset(self.collection_name, signature)
+                manifest.save()
+                if self.keyword_index is not None:
+                    self.keyword_index.clear()
+        except Exception as e:
+            print(f"[ERROR]: Failed to initialize vector DB collection {self.collection_name}: {e}")
+            self.set_status(STATUS_FAILED)
+            return EmbeddingPipeline.FAILURE
+
+        filenames = self._list_dataset_files()
+        self._add_files(len(filenames))
+
+        for filename in manifest.files(self.collection_name):
+            if filename in filenames:
+                continue
+
+            try:
+                point_ids = manifest.point_ids(self.collection_name, filename)
+                self.vdb.delete(point_ids, self.collection_name)
+                if self.keyword_index is not None:
+                    self.keyword_index.delete(point_ids)
+                manifest.remove_file(self.collection_name, filename)
+                manifest.save()
+                METRICS.inc("pipeline_files_total", pipeline=self.name, status="removed")
+            except Exception as e:
+                print(f"[ERROR]: Failed to remove {filename} from the index: {e}")
+                METRICS.inc("pipeline_files_total", pipeline=self.name, status="failed")
+                self._add_files(1)
+                self._file_done(filename, e)
+
+        self._files_removed(filenames)
+
+        file_hashes = []
+        pending = []
+        for filename in filenames:
+            file_path = os.path.join(self.dataset_dir, filename)
+
+            try:
+                file_hash = self._file_hash(file_path)
+            except Exception as e:
+                print(f"[ERROR]: Failed to read {filename}: {e}")
+                METRICS.inc("pipeline_files_total", pipeline=self.name, status="failed")
+                self._file_done(filename, e)
+                continue
+
+            file_hashes.append(file_hash)
+            if not self._is_current(manifest, filename, file_hash):
+                cached_chunks = self.parse_cache.get(self.processor.ENTITY_TYPE, self.processor_variant, file_hash)
+                METRICS.inc("parse_cache_total", pipeline=self.name, result="miss" if cached_chunks is None else "hit")
+                pending.append((filename, file_hash, file_path, cached_chunks))
+            else:
+                METRICS.inc("pipeline_files_total", pipeline=self.name, status="unchanged")
+                self._file_done(filename)
+
+        # Parsing runs ahead in the worker processes while this loop embeds and
+        # upserts each file's chunks in dataset order. Files already in the
+        # parse cache skip the HTML stage entirely.
+        results = self._parse_files([file_path for _, _, file_path, cached_chunks in pending if cached_chunks is None])
+        try:
+            for filename, file_hash, _, cached_chunks in pending:
+                try:
+                    if cached_chunks is None:
+                        raw_chunks, error = next(results)
+                        if error is not None:
+                            raise RuntimeError(error)
+                        self.parse_cache.put(self.processor.ENTITY_TYPE, self.processor_variant, file_hash, raw_chunks)
+                    else:
+                        raw_chunks = cached_chunks
+
+                    chunks = self.chunk_strategy.split_chunks(raw_chunks)
+                    self._sync_file(manifest, filename, file_hash, chunks)
+                    self._file_indexed(filename, raw_chunks)
+                    METRICS.inc("pipeline_files_total", pipeline=self.name, status="indexed")
+                    self._file_done(filename)
+                except Exception as e:
+                    print(f"[ERROR]: Failed to index {filename}, skipping it: {e}")
+                    METRICS.inc("pipeline_files_total", pipeline=self.name, status="failed")
+                    self._file_done(filename, e)
+        finally:
+            results.close()
+            self._save_stores()
+
+        try:
+            self.parse_cache.prune(self.processor.ENTITY_TYPE, self.processor_variant, file_hashes)
+        except OSError as e:
+            print(f"[WARNING]: Failed to prune the parse cache: {e}")
+
+        self.set_status(STATUS_DONE)
+        return EmbeddingPipeline.SUCCESS
+
+    def index_state(self) -> Dict[str, str]:
+        # A store that is gone (or holds another vector dtype) leaves the
+        # state unknown, so the pipeline runs and rebuilds it.
+        stores = self._store_paths()
+        if self.keyword_index is not None and self.keyword_index.path:
+            stores.append(self.keyword_index.path)
+        if not all(os.path.isfile(path) for path in stores) or not self.vdb.has_collection(self.collection_name):
+            return {}
+
+        dataset = hashlib.sha256()
+        for filename in self._list_dataset_files():
+            dataset.update(f"{filename}\0{self._file_hash(os.path.join(self.dataset_dir, filename))}\0".encode("utf-8"))
+        return {
+            "signature": self._index_signature(),
+            "store": type(self.vdb).__name__,
+            "dataset": dataset.hexdigest()
+        }
+
+    def entity_names(self) -> List[str]:
+        return IndexManifest.load(self.manifest_path).entity_names(self.collection_name)
+
+    #--- Hooks ---#
+    def _load_stores(self):
+        pass
+
+    def _store_paths(self) -> List[str]:
+        # Files that must exist for the index to be complete.
+        return [self.manifest_path]
+
+    def _is_file_current(self, filename: str) -> bool:
+        return True
+
+    def _files_removed(self, filenames: List[str]):
+        # Called with the files still in the dataset.
+        pass
+
+    def _file_indexed(self, filename: str, raw_chunks: List[ContentChunk]):
+        pass
+
+    def _save_extra_stores(self):
+        pass
+
+    #--- Internals ---#
+    def _is_current(self, manifest: IndexManifest, filename: str, file_hash: str) -> bool:
+        if not manifest.is_current(self.collection_name, filename, file_hash) or not self._is_file_current(filename):
+            return False
+
+        point_ids = manifest.point_ids(self.collection_name, filename)
+        if self.vdb.missing(point_ids, self.collection_name):
+            return False
+
+        if self.keyword_index is not None:
+            return all(point_id in self.keyword_index for point_id in point_ids)
+        return True
+
+    def _file_hash(self, file_path: str) -> str:
+        with open(file_path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    def _list_dataset_files(self) -> List[str]:
+        filenames = []
+        for filename in sorted(os.listdir(self.dataset_dir)):
+            file_path = os.path.join(self.dataset_dir, filename)
+
+            if not os.path.isfile(file_path) or not filename.lower().endswith((".html", ".htm")):
+                continue
+
+            filenames.append(filename)
+        return filenames
+
+    def _index_signature(self) -> str:
+        return "|".join([
+            self.vdb.embedder.MODEL_NAME,
+            f"payload-v{self.vdb.PAYLOAD_VERSION}",
+            f"{self.processor.ENTITY_TYPE}-v{self.processor_variant}",
+            self.chunk_strategy.signature()
+        ])
+
+    def _sync_file(self, manifest: IndexManifest, filename: str, file_hash: str, chunks: List[ContentChunk]):
+        # Point ids are derived from the chunk content, so chunks that did not
+        # change keep their id and do not need to be embedded again.
+        indexed_ids = set(manifest.point_ids(self.collection_name, filename))
+        # Points the manifest lists but a buffering store lost before it
+        # could flush them are embedded again.
+        indexed_ids.difference_update(self.vdb.missing(list(indexed_ids), self.collection_name))
+        chunk_hashes = {}
+        unique_chunks = []
+        new_chunks = []
+
+        for chunk in chunks:
+            chunk_hash = chunk.content_hash()
+            chunk.chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.collection_name}/{filename}/{chunk_hash}"))
+
+            if chunk.chunk_id in chunk_hashes:
+                continue
+
+            chunk_hashes[chunk.chunk_id] = chunk_hash
+            unique_chunks.append(chunk)
+            if chunk.chunk_id not in indexed_ids:
+                new_chunks.append(chunk)
+
+        if new_chunks:
+            self.vdb.add(new_chunks, self.collection_name)
+            METRICS.inc("pipeline_chunks_embedded_total", len(new_chunks), pipeline=self.name)
+
+        stale_ids = [point_id for point_id in indexed_ids if point_id not in chunk_hashes]
+        self.vdb.delete(stale_ids, self.collection_name)
+
+        if self.keyword_index is not None:
+            self.keyword_index.add([chunk for chunk in unique_chunks if chunk.chunk_id not in self.keyword_index])
+            self.keyword_index.delete(stale_ids)
+
+        entity_names = sorted({chunk.entity_name for chunk in chunks if chunk.entity_name != self.processor.UNKNOWN_ENTITY})
+        manifest.set_file(self.collection_name, filename, file_hash, chunk_hashes, entity_names)
+        manifest.save()
+
+    def _save_stores(self):
+        try:
+            self.vdb.flush(self.collection_name)
+        except OSError as e:
+            print(f"[WARNING]: Failed to save the vector DB: {e}")
+
+        self._save_extra_stores()
+
+        try:
+            if self.keyword_index is not None and self.keyword_index.dirty:
+                self.keyword_index.save()
+        except OSError as e:
+            print(f"[WARNING]: Failed to save the keyword index: {e}")
+
+    def _parse_files(self, file_paths: List[str]) -> Iterator[Tuple[Optional[List[ContentChunk]], Optional[str]]]:
+        # Yields (chunks, None) or (None, error) per file, a file that fails
+        # to parse does not end the iteration. Workers report how long each
+        # file took, their own metrics stay in their process.
+        parse = partial(_timed_parse, partial(parse_html_file, self.processor, parser=self.html_parser, prune=self.prune_html))
+
+        if self.parse_workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield self._parsed(*parse(file_path))
+            return
+
+        # Spawned workers only import the HTML processing modules, not the
+        # embedding model already loaded in this process.
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.parse_workers, len(file_paths)),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            for chunks, error, seconds in executor.map(parse, file_paths):
+                yield self._parsed(chunks, error, seconds)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _parsed(self, chunks: Optional[List[ContentChunk]], error: Optional[str], seconds: float):
+        record("html_parse", seconds, pipeline=self.name)
+        return chunks, error
+
+def _timed_parse(parse, file_path: str) -> Tuple[Optional[List[ContentChunk]], Optional[str], float]:
+    start = time.perf_counter()
+    try:
+        return parse(file_path), None, time.perf_counter() - start
+    except Exception as e:
+        return None, repr(e), time.perf_counter() - start
@@ -1,25 +1,71 @@
-from abc import ABC, abstractmethod
+import threading
 
-from sentence_transformers import SentenceTransformer
+from abc import ABC, abstractmethod
+from typing import Callable
 
 class Embedder(ABC):
+    MODEL_NAME = ""
+
     def __init__(self):
         return
     
+    @abstractmethod
+    def dimension(self) -> int:
+        return
+
     @abstractmethod
     def embed_text(self, text: str):
         return
 
     @abstractmethod
-    def embed_document(self, document: list[str]):
+    def embed_document(self, document: list[str], batch_size: int = 32):
         return
 
 class BAAIEmbedder(Embedder):
+    MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
     def __init__(self):
-        self.model = SentenceTransformer("BAAI/bge-small-en-v1.5")
+        # Imported here, torch is only loaded when this backend is used.
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.MODEL_NAME)
+
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
     
     def embed_text(self, text: str):
-        return self.model.encode([text], normalize_embedding=True).tolist()[0]
+        return self.model.encode([text], normalize_embeddings=True).tolist()[0]
     
-    def embed_document(self, document: list[str]):
-        return self.model.encode(document, normalize_embeddings=True).tolist()
\ No newline at end of file
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        return self.model.encode(document, batch_size=batch_size, normalize_embeddings=True).tolist()
+
+class LazyEmbedder(Embedder):
+    # Creates the wrapped embedder on first use, so importing torch or
+    # onnxruntime and loading the weights stay off the startup path. The
+    # model name is given up front: index signatures and the query cache
+    # key only need the name, a current index is opened without the model.
+    def __init__(self, factory: Callable[[], Embedder], model_name: str):
+        self.factory = factory
+        self.MODEL_NAME = model_name
+        self._embedder = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._embedder is not None
+
+    def load(self) -> Embedder:
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    self._embedder = self.factory()
+        return self._embedder
+
+    def dimension(self) -> int:
+        return self.load().dimension()
+
+    def embed_text(self, text: str):
+        return self.load().embed_text(text)
+
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        return self.load().embed_document(document, batch_size=batch_size)
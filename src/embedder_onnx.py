@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+from .constants import LOCAL_ONNX_MODEL_DIR
+from .embedder import Embedder
+
+class ONNXEmbedder(Embedder):
+    # Runs BAAI/bge-small-en-v1.5 through ONNX Runtime instead of PyTorch, so
+    # neither torch nor sentence_transformers is imported. Pooling matches the
+    # sentence_transformers config of the model: CLS token, then L2 norm.
+    #
+    # With quantize=True the weights are converted once to int8 (dynamic
+    # quantization) and the converted file is kept in cache_dir. The vectors
+    # drift slightly from the float model, so the int8 model gets its own
+    # MODEL_NAME and its own index and query cache.
+    MODEL_NAME = "BAAI/bge-small-en-v1.5"
+    ONNX_FILE = "onnx/model.onnx"
+    TOKENIZER_FILE = "tokenizer.json"
+    MAX_LENGTH = 512
+    # Intra-op threads per session. A fixed count keeps latency predictable
+    # when the API runs next to other workers on the same host.
+    THREADS = min(4, os.cpu_count() or 1)
+
+    def __init__(self, quantize: bool = False, threads: int = THREADS, cache_dir: str = LOCAL_ONNX_MODEL_DIR):
+        # Imported here, like torch for BAAIEmbedder, only this backend loads them.
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+            from huggingface_hub import hf_hub_download
+        except ImportError:
+            raise RuntimeError("onnxruntime, tokenizers and huggingface_hub are required for the ONNX embedder")
+
+        self.quantize = quantize
+        self.threads = max(1, threads)
+        self.MODEL_NAME = self.model_name(quantize)
+
+        model_path = hf_hub_download(ONNXEmbedder.MODEL_NAME, self.ONNX_FILE)
+        if quantize:
+            model_path = self._quantized(model_path, cache_dir)
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(ONNXEmbedder.MODEL_NAME, self.TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._inputs = {model_input.name for model_input in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    @classmethod
+    def model_name(cls, quantize: bool = False) -> str:
+        return f"{ONNXEmbedder.MODEL_NAME}:int8" if quantize else ONNXEmbedder.MODEL_NAME
+
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed_text(self, text: str):
+        return self._encode([text])[0].tolist()
+
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        vectors = []
+        for start in range(0, len(document), max(1, batch_size)):
+            vectors.extend(self._encode(document[start:start + batch_size]).tolist())
+        return vectors
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        # Padding is per batch, to the longest text in it.
+        encodings = self.tokenizer.encode_batch(texts)
+        feed = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: value for name, value in feed.items() if name in self._inputs})[0]
+
+        vectors = hidden[:, 0]
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    @staticmethod
+    def _quantized(model_path: str, cache_dir: str) -> str:
+        quantized_path = os.path.join(cache_dir, "bge-small-en-v1.5-int8.onnx")
+        if os.path.exists(quantized_path):
+            return quantized_path
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{quantized_path}.tmp"
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+        return quantized_path
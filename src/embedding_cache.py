@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+
+class QueryEmbeddingCache:
+    # Bounded LRU of query vectors keyed on the model name and the normalized
+    # query text. When db_path is set, vectors are also written to a SQLite
+    # file so the cache survives restarts.
+    CAPACITY = 1024
+    PERSISTED_CAPACITY = 100_000
+
+    def __init__(self, model_name: str, capacity: int = CAPACITY, db_path: Optional[str] = None, persisted_capacity: int = PERSISTED_CAPACITY):
+        self.model_name = model_name
+        self.capacity = max(1, capacity)
+        self.db_path = db_path
+        self.persisted_capacity = max(1, persisted_capacity)
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_db(db_path) if db_path else None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self._key(text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            vector = self._load(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.hits += 1
+                return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: List[float]):
+        key = self._key(text)
+
+        with self._lock:
+            self._remember(key, vector)
+            self._store(key, vector)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}\n{self.normalize(text)}"
+
+    def _remember(self, key: str, vector: List[float]):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _open_db(self, db_path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        db.commit()
+        return db
+
+    def _load(self, key: str) -> Optional[List[float]]:
+        if not self._db:
+            return None
+
+        row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return array("f", row[0]).tolist()
+
+    def _store(self, key: str, vector: List[float]):
+        if not self._db:
+            return
+
+        # REPLACE gives the row a new rowid, so the lowest rowids are always the
+        # least recently stored vectors.
+        cursor = self._db.execute(
+            "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+            (key, array("f", vector).tobytes())
+        )
+        self._db.execute(
+            "DELETE FROM query_embeddings WHERE rowid <= ?",
+            (cursor.lastrowid - self.persisted_capacity,)
+        )
+        self._db.commit()
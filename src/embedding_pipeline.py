@@ -1,7 +1,17 @@
+import threading
+
 from abc import ABC, abstractmethod
+from typing import Any, Dict
 
 from .vdb import VectorDB
 
+# Run states reported by EmbeddingPipeline.progress().
+STATUS_IDLE = "idle"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
 class EmbeddingPipeline(ABC):
     SUCCESS=True
     FAILURE=False
@@ -9,7 +19,53 @@ class EmbeddingPipeline(ABC):
     def __init__(self, vdb: VectorDB):
         self.vdb = vdb
         self.name = ""
+
+        # Progress of the current (or last) run, read from other threads.
+        self.status = STATUS_IDLE
+        self.files_total = 0
+        self.files_done = 0
+        self.failed_files: Dict[str, str] = {}
+        self._progress_lock = threading.Lock()
         
     @abstractmethod
     def start(self):
-        pass
\ No newline at end of file
+        pass
+
+    def index_state(self) -> Dict[str, str]:
+        # What the current index was built from, recorded in the index
+        # artifact so startup can skip a pipeline whose state is unchanged.
+        # Empty means unknown, the pipeline then always runs.
+        return {}
+
+    def progress(self) -> Dict[str, Any]:
+        with self._progress_lock:
+            return {
+                "name": self.name,
+                "status": self.status,
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "failed_files": dict(self.failed_files)
+            }
+
+    def set_status(self, status: str):
+        with self._progress_lock:
+            self.status = status
+
+    def _begin_run(self):
+        with self._progress_lock:
+            self.status = STATUS_RUNNING
+            self.files_total = 0
+            self.files_done = 0
+            self.failed_files = {}
+
+    def _add_files(self, count: int):
+        with self._progress_lock:
+            self.files_total += count
+
+    def _file_done(self, filename: str, error: Exception = None):
+        # A file that failed is reported and left for the next run, the
+        # other files carry on.
+        with self._progress_lock:
+            self.files_done += 1
+            if error is not None:
+                self.failed_files[filename] = str(error)
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+
+from concurrent.futures import Future
+
+from .embedder import Embedder
+
+class EmbeddingScheduler(Embedder):
+    # Micro-batches concurrent embed_text calls: a worker thread takes the
+    # first waiting query, collects whatever else arrives within
+    # max_wait_seconds (up to max_batch_size queries) and encodes them in one
+    # call. Callers block until their own vector is ready. Documents are
+    # already batched by the caller and skip the queue.
+    #
+    # The wait is dynamic: a query that arrives while nothing else is queued
+    # and the previous batch was a single query is encoded right away, so an
+    # idle service does not pay max_wait_seconds per query.
+    #
+    # Document batches from the embedding pipelines are limited to
+    # max_document_jobs on the model at once. Pipelines running concurrently
+    # then take turns batch by batch instead of contending for the CPU.
+    MAX_BATCH_SIZE = 32
+    MAX_WAIT_SECONDS = 0.005
+    MAX_DOCUMENT_JOBS = 1
+
+    def __init__(self, embedder: Embedder, max_batch_size: int = MAX_BATCH_SIZE, max_wait_seconds: float = MAX_WAIT_SECONDS, max_document_jobs: int = MAX_DOCUMENT_JOBS):
+        self.embedder = embedder
+        self.MODEL_NAME = embedder.MODEL_NAME
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self._document_slots = threading.BoundedSemaphore(max(1, max_document_jobs))
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._last_batch_size = 0
+        self.requests = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = {}
+        self.wait_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.document_batches = 0
+        self.document_wait_seconds = 0.0
+
+    def dimension(self) -> int:
+        return self.embedder.dimension()
+
+    def embed_text(self, text: str):
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        self._ensure_worker()
+        return future.result()
+
+    def embed_document(self, document: list[str], batch_size: int = 32):
+        queued_at = time.perf_counter()
+        with self._document_slots:
+            with self._stats_lock:
+                self.document_batches += 1
+                self.document_wait_seconds += time.perf_counter() - queued_at
+            return self.embedder.embed_document(document, batch_size=batch_size)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+                # Batch sizes counted per power of two bucket, "4" is 3 to 4.
+                "batch_sizes": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "avg_wait_ms": self.wait_seconds * 1000 / self.requests if self.requests else 0.0,
+                "avg_encode_ms": self.encode_seconds * 1000 / self.batches if self.batches else 0.0,
+                "document_batches": self.document_batches,
+                "avg_document_wait_ms": self.document_wait_seconds * 1000 / self.document_batches if self.document_batches else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+                self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-scheduler", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            queue_depth = self._queue.qsize() + 1
+            if queue_depth > 1 or self._last_batch_size > 1:
+                deadline = time.perf_counter() + self.max_wait_seconds
+                while len(batch) < self.max_batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+
+            self._encode(batch, queue_depth)
+            if stop:
+                return
+
+    def _encode(self, batch, queue_depth: int):
+        start = time.perf_counter()
+        try:
+            vectors = self.embedder.embed_document([text for text, _, _ in batch], batch_size=len(batch))
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._record(batch, queue_depth, start)
+
+        for (_, future, _), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def _record(self, batch, queue_depth: int, start: float):
+        bucket = 1
+        while bucket < len(batch):
+            bucket *= 2
+
+        with self._stats_lock:
+            self._last_batch_size = len(batch)
+            self.requests += len(batch)
+            self.batches += 1
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+            self.wait_seconds += sum(start - queued_at for _, _, queued_at in batch)
+            self.encode_seconds += time.perf_counter() - start
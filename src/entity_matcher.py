@@ -0,0 +1,185 @@
+import re
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+ROMAN_NUMERALS = {"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5"}
+
+def normalize_tokens(text: str) -> List[str]:
+    # "Krait Mk2", "krait mark II" and "Krait Mk II" all become
+    # ["krait", "mk", "2"], "Type-9" and "type9" become ["type", "9"].
+    return [token for token, _ in cased_tokens(text)]
+
+def cased_tokens(text: str) -> List[Tuple[str, bool]]:
+    # normalize_tokens, with whether each token was capitalized in the text.
+    text = re.sub(r"\b(mk|mark)(i{1,3}|iv|v)\b", r"\1 \2", text, flags=re.IGNORECASE)
+    text = re.sub(r"(?<=[a-z])(?=\d)|(?<=\d)(?=[a-z])", " ", text, flags=re.IGNORECASE)
+
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text, flags=re.IGNORECASE):
+        token = word.lower()
+        if token == "mark":
+            token = "mk"
+        # A lone "i" or "v" is only a numeral right after "mk".
+        if token in ROMAN_NUMERALS and (len(token) > 1 or (tokens and tokens[-1][0] == "mk")):
+            token = ROMAN_NUMERALS[token]
+        tokens.append((token, word[0].isupper()))
+    return tokens
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class EntityMatcher:
+    # Token trie over entity names and their aliases. match() scans a query
+    # left to right and keeps the longest name starting at each token, so
+    # "Python Mk II" wins over "Python". Tokens of FUZZY_MIN_LENGTH letters or
+    # more also match trie tokens one edit away (two from
+    # FUZZY_LONG_LENGTH), which absorbs typos such as "Anacoda". The first
+    # token of a name is never matched fuzzily against `common_words`, so
+    # "added" does not read as "Adder".
+    #
+    # Aliases in `anchored_aliases` are ordinary words ("lance", "courier"),
+    # they only match exactly and when anchored: capitalized in the query, or
+    # within ANCHOR_DISTANCE tokens of one of `anchor_words` ("ship").
+    FUZZY_MIN_LENGTH = 5
+    FUZZY_LONG_LENGTH = 8
+    FUZZY_CACHE_SIZE = 10_000
+    ANCHOR_DISTANCE = 3
+    TERMINAL = ""
+    # Marks the trie node of an anchored alias, never a token.
+    ANCHORED = "^"
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        aliases: Optional[Dict[str, str]] = None,
+        anchored_aliases: Iterable[str] = (),
+        anchor_words: Iterable[str] = (),
+        common_words: Iterable[str] = ()
+    ):
+        self.names = sorted(set(names))
+        self.root: Dict = {}
+        self.anchor_words = set(anchor_words)
+        self.common_words = set(common_words)
+        self._fuzzy_cache: Dict[Tuple[int, str], List[str]] = {}
+
+        entries: Dict[Tuple[str, ...], Set[str]] = {}
+        for alias, name in (aliases or {}).items():
+            if name in self.names:
+                entries.setdefault(tuple(normalize_tokens(alias)), set()).add(name)
+
+        # A full name always resolves to itself, an alias shared by several
+        # names is ambiguous and dropped.
+        for name in self.names:
+            entries[tuple(normalize_tokens(name))] = {name}
+
+        name_tokens = {tuple(normalize_tokens(name)) for name in self.names}
+        anchored = {tuple(normalize_tokens(alias)) for alias in anchored_aliases} - name_tokens
+        for tokens, candidates in entries.items():
+            if tokens and len(candidates) == 1:
+                self._insert(tokens, next(iter(candidates)), tokens in anchored)
+
+    def match(self, text: str) -> List[str]:
+        found = []
+        for _, _, name in self.spans(text):
+            if name not in found:
+                found.append(name)
+        return found
+
+    def spans(self, text: str) -> List[Tuple[int, int, str]]:
+        # (start, end, name) of each mention, positions in normalize_tokens(text).
+        cased = cased_tokens(text)
+        tokens = [token for token, _ in cased]
+        capitalized = [capitalized for _, capitalized in cased]
+        spans = []
+
+        position = 0
+        while position < len(tokens):
+            end, name = self._longest_match(tokens, position, capitalized)
+            if name is None:
+                position += 1
+                continue
+
+            spans.append((position, end, name))
+            position = end
+        return spans
+
+    def unmatched_tokens(self, text: str) -> List[str]:
+        # normalize_tokens(text) without the tokens of the mentions.
+        tokens = normalize_tokens(text)
+        for start, end, _ in reversed(self.spans(text)):
+            del tokens[start:end]
+        return tokens
+
+    def _insert(self, tokens: Tuple[str, ...], name: str, anchored: bool = False):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[self.TERMINAL] = name
+        if anchored:
+            node[self.ANCHORED] = True
+
+    def _longest_match(self, tokens: List[str], start: int, capitalized: List[bool]) -> Tuple[int, Optional[str]]:
+        best_end, best_name, best_cost = start, None, 0
+        states = [(self.root, start, 0)]
+
+        while states:
+            node, position, cost = states.pop()
+
+            name = node.get(self.TERMINAL)
+            if name is not None and node.get(self.ANCHORED) and not (cost == 0 and self._is_anchored(tokens, start, position, capitalized)):
+                name = None
+            if name is not None and (position > best_end or (position == best_end and cost < best_cost)):
+                best_end, best_name, best_cost = position, name, cost
+
+            if position == len(tokens):
+                continue
+
+            for child_token, child in self._children(node, tokens[position]):
+                states.append((child, position + 1, cost + (child_token != tokens[position])))
+
+        return best_end, best_name
+
+    def _is_anchored(self, tokens: List[str], start: int, end: int, capitalized: List[bool]) -> bool:
+        if all(capitalized[start:end]):
+            return True
+        nearby = tokens[max(0, start - self.ANCHOR_DISTANCE):start] + tokens[end:end + self.ANCHOR_DISTANCE]
+        return any(token in self.anchor_words for token in nearby)
+
+    def _children(self, node: Dict, token: str):
+        child = node.get(token)
+        if child is not None:
+            yield token, child
+            return
+
+        if len(token) < self.FUZZY_MIN_LENGTH or token.isdigit():
+            return
+        # A common word is only a typo once a multi-token name is under way.
+        if node is self.root and token in self.common_words:
+            return
+
+        # Queries reuse the same words, remember which trie tokens are close.
+        key = (id(node), token)
+        close_tokens = self._fuzzy_cache.get(key)
+        if close_tokens is None:
+            limit = 2 if len(token) >= self.FUZZY_LONG_LENGTH else 1
+            close_tokens = [
+                child_token for child_token in node
+                if child_token not in (self.TERMINAL, self.ANCHORED) and len(child_token) >= self.FUZZY_MIN_LENGTH and edit_distance(token, child_token, limit) <= limit
+            ]
+            if len(self._fuzzy_cache) >= self.FUZZY_CACHE_SIZE:
+                self._fuzzy_cache.clear()
+            self._fuzzy_cache[key] = close_tokens
+
+        for child_token in close_tokens:
+            yield child_token, node[child_token]
@@ -1,15 +1,70 @@
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup, Tag
-from typing import List
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer, Tag
+from typing import List, Type
 
 from .chunking import ContentChunk
+from .telemetry import traced
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+PARSER_HTML = "html.parser"
+PARSER_LXML = "lxml"
+PARSER_SELECTOLAX = "selectolax"
+
+PARSERS = [PARSER_HTML, PARSER_LXML, PARSER_SELECTOLAX]
 
 class BaseHTMLProcessor(ABC):
     ENTITY_TYPE = "generic"
+    # Entity name of pages the processor cannot name, left out of the
+    # entity names of the index.
+    UNKNOWN_ENTITY = "Unknown"
+    # Bump whenever a change to the processor alters the extracted chunks so
+    # that previously indexed content gets rebuilt.
+    VERSION = 1
+    # Ids of the page regions kept when pruning, empty keeps the whole page.
+    CONTENT_IDS: List[str] = []
+    # Tags that never carry content and are dropped by the selectolax backend.
+    IGNORED_TAGS = ["script", "style", "noscript", "iframe"]
     
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, "html.parser")
+    def __init__(self, html_content: str, parser: str = PARSER_HTML, prune: bool = False):
+        self.soup = self._build_soup(html_content, parser, prune and bool(self.CONTENT_IDS))
         self.entity_name = self._extract_entity_name()
+
+    @classmethod
+    def variant(cls, parser: str = PARSER_HTML, prune: bool = False) -> str:
+        # Chunks differ slightly between parsers, so caches and indexes are
+        # keyed on the processor version together with its parser settings.
+        return f"{cls.VERSION}-{parser}{'-pruned' if prune and cls.CONTENT_IDS else ''}"
+
+    def _build_soup(self, html_content: str, parser: str, prune: bool) -> BeautifulSoup:
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown HTML parser '{parser}', expected one of {PARSERS}")
+
+        if parser != PARSER_SELECTOLAX:
+            parse_only = SoupStrainer(id=self.CONTENT_IDS) if prune else None
+            return BeautifulSoup(html_content, parser, parse_only=parse_only)
+
+        if LexborHTMLParser is None:
+            raise ImportError("The selectolax parser requires the 'selectolax' package")
+
+        # Let lexbor do the heavy lifting on the full page, then only hand the
+        # regions we actually read to BeautifulSoup.
+        tree = LexborHTMLParser(html_content)
+        for node in tree.css(", ".join(self.IGNORED_TAGS)):
+            node.decompose()
+
+        if prune:
+            html_content = "".join(node.html for node in tree.css(", ".join(f"#{content_id}" for content_id in self.CONTENT_IDS)))
+        else:
+            html_content = tree.html
+
+        try:
+            return BeautifulSoup(html_content, PARSER_LXML)
+        except FeatureNotFound:
+            return BeautifulSoup(html_content, PARSER_HTML)
     
     @abstractmethod
     def _extract_entity_name(self) -> str:
@@ -19,6 +74,7 @@ class BaseHTMLProcessor(ABC):
     def _normalize_section(self, header: str) -> str:
         raise NotImplementedError("Subclasses must implement section normalization")
         
+    @traced("html_extract_chunks")
     def extract_chunks(self) -> List[ContentChunk]:
         chunks = []
         current_chunk = None
@@ -42,3 +98,10 @@ class BaseHTMLProcessor(ABC):
                 current_chunk.source += str(element)
         
         return chunks
+
+def parse_html_file(processor: Type[BaseHTMLProcessor], file_path: str, parser: str = PARSER_HTML, prune: bool = False) -> List[ContentChunk]:
+    # Module level so it can be dispatched to a process pool without pulling
+    # the embedder and vector DB imports into the worker processes.
+    with open(file_path, "r", encoding="utf-8") as file:
+        html_content = file.read()
+    return processor(html_content, parser=parser, prune=prune).extract_chunks()
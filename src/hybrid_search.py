@@ -0,0 +1,127 @@
+import asyncio
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .bm25 import BM25Index
+from .vdb import SearchResult, VectorDB
+
+SEARCH_DENSE = "dense"
+SEARCH_KEYWORD = "keyword"
+SEARCH_HYBRID = "hybrid"
+
+SEARCH_MODES = [SEARCH_DENSE, SEARCH_KEYWORD, SEARCH_HYBRID]
+
+class HybridRetriever:
+    # Fuses dense results from a VectorDB with BM25 keyword results using
+    # reciprocal rank fusion: score = sum(1 / (RRF_K + rank)) over the
+    # rankings a chunk appears in. Each retriever is asked for
+    # CANDIDATE_MULTIPLIER times the requested number of results.
+    #
+    # search_results_async runs the dense and keyword searches concurrently,
+    # each bounded by `timeout` seconds. If one of them fails or times out the
+    # other one's ranking is used alone.
+    RRF_K = 60
+    CANDIDATE_MULTIPLIER = 4
+    TIMEOUT = 10.0
+
+    def __init__(self, vdb: VectorDB, keyword_indexes: Dict[str, BM25Index], mode: str = SEARCH_HYBRID, timeout: float = TIMEOUT):
+        self.vdb = vdb
+        self.keyword_indexes = keyword_indexes
+        self.mode = self._check_mode(mode)
+        self.timeout = timeout
+
+    def search_results(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> List[SearchResult]:
+        mode = self.scoring(collection_name, mode)
+        keyword_index = self.keyword_indexes.get(collection_name)
+        if mode == SEARCH_DENSE:
+            return self.vdb.search_results(query, collection_name, limit=limit, query_vector=query_vector, filters=filters)
+
+        candidates = limit * self.CANDIDATE_MULTIPLIER
+        keyword_hits = keyword_index.search(query, limit=candidates, filters=self.vdb.normalize_filters(filters))
+
+        if mode == SEARCH_KEYWORD:
+            return self._with_payloads(keyword_hits[:limit], {}, collection_name)
+
+        dense_results = self.vdb.search_results(query, collection_name, limit=candidates, query_vector=query_vector, filters=filters)
+        return self._with_payloads(self._fuse(dense_results, keyword_hits, limit), {result.id: result for result in dense_results}, collection_name)
+
+    def search(self, query: str, collection_name: str, filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None):
+        return [result.payload["html_snippet"] for result in self.search_results(query, collection_name, filters=filters, mode=mode)]
+
+    async def search_results_async(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> List[SearchResult]:
+        mode = self.scoring(collection_name, mode)
+        keyword_index = self.keyword_indexes.get(collection_name)
+        if mode == SEARCH_DENSE:
+            return await asyncio.wait_for(self.vdb.search_results_async(query, collection_name, limit, query_vector, filters), self.timeout)
+
+        candidates = limit * self.CANDIDATE_MULTIPLIER
+        keyword_search = asyncio.to_thread(keyword_index.search, query, candidates, self.vdb.normalize_filters(filters))
+
+        if mode == SEARCH_KEYWORD:
+            keyword_hits = await asyncio.wait_for(keyword_search, self.timeout)
+            return await asyncio.to_thread(self._with_payloads, keyword_hits[:limit], {}, collection_name)
+
+        dense_results, keyword_hits = await asyncio.gather(
+            asyncio.wait_for(self.vdb.search_results_async(query, collection_name, candidates, query_vector, filters), self.timeout),
+            asyncio.wait_for(keyword_search, self.timeout),
+            return_exceptions=True
+        )
+        if isinstance(dense_results, BaseException) and isinstance(keyword_hits, BaseException):
+            raise dense_results
+        if isinstance(dense_results, BaseException):
+            print(f"[WARNING]: Dense search failed, using keyword results only: {dense_results!r}")
+            dense_results = []
+        if isinstance(keyword_hits, BaseException):
+            print(f"[WARNING]: Keyword search failed, using dense results only: {keyword_hits!r}")
+            keyword_hits = []
+
+        known = {result.id: result for result in dense_results}
+        return await asyncio.to_thread(self._with_payloads, self._fuse(dense_results, keyword_hits, limit), known, collection_name)
+
+    async def search_async(self, query: str, collection_name: str, filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None):
+        return [result.payload["html_snippet"] for result in await self.search_results_async(query, collection_name, filters=filters, mode=mode)]
+
+    def scoring(self, collection_name: str, mode: Optional[str] = None) -> str:
+        # The search mode that actually scores the results: collections
+        # without a keyword index are searched dense only.
+        mode = self._check_mode(mode or self.mode)
+        return SEARCH_DENSE if self.keyword_indexes.get(collection_name) is None else mode
+
+    def _check_mode(self, mode: str) -> str:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        return mode
+
+    def _fuse(self, dense_results: List[SearchResult], keyword_hits: List[Tuple[str, float]], limit: int) -> List[Tuple[str, float]]:
+        fused: Dict[str, float] = {}
+        for ranking in ([result.id for result in dense_results], [doc_id for doc_id, _ in keyword_hits]):
+            for rank, doc_id in enumerate(ranking, 1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.RRF_K + rank)
+
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def _with_payloads(self, scored_ids, known: Dict[str, SearchResult], collection_name: str) -> List[SearchResult]:
+        missing = [doc_id for doc_id, _ in scored_ids if doc_id not in known]
+        if missing:
+            known = dict(known)
+            known.update({result.id: result for result in self.vdb.retrieve(missing, collection_name)})
+
+        return [
+            SearchResult(id=doc_id, score=score, payload=known[doc_id].payload)
+            for doc_id, score in scored_ids if doc_id in known
+        ]
+
+async def search_per_entity(retriever, query: str, collection_name: str, entity_names: List[str], limit: int = 3, **kwargs) -> List[SearchResult]:
+    # One search per entity, run concurrently, so each ship of a comparison
+    # gets its own `limit` results instead of sharing them. Results are
+    # interleaved by rank.
+    searches = [
+        retriever.search_results_async(query, collection_name, limit=limit, filters={"entity_name": [name]}, **kwargs)
+        for name in entity_names
+    ]
+    rankings = await asyncio.gather(*searches)
+
+    results = []
+    for rank in range(max((len(ranking) for ranking in rankings), default=0)):
+        results.extend(ranking[rank] for ranking in rankings if rank < len(ranking))
+    return results
@@ -0,0 +1,56 @@
+import json
+import os
+
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+class IndexArtifact:
+    # Written by `python -m src.build_index` next to the stores it filled.
+    # Records, per pipeline, the state its index was built from (index
+    # signature, store and dataset fingerprint, see
+    # EmbeddingPipeline.index_state). A pipeline whose state still matches
+    # does not have to run at startup, not even to check its files.
+    #
+    # Bump VERSION whenever the stores change layout in a way the recorded
+    # states do not capture.
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = self.VERSION
+        self.created: Optional[str] = None
+        self.pipelines: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "IndexArtifact":
+        artifact = cls(path)
+        if os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    content = json.load(file)
+                artifact.version = content.get("version")
+                artifact.created = content.get("created")
+                artifact.pipelines = content.get("pipelines", {})
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"[WARNING]: Ignoring unreadable index artifact {path}: {e}")
+                artifact.pipelines = {}
+        return artifact
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.version = self.VERSION
+        self.created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": self.version, "created": self.created, "pipelines": self.pipelines}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def set_pipeline(self, name: str, state: Dict[str, str]):
+        self.pipelines[name] = state
+
+    def is_current(self, name: str, state: Dict[str, str]) -> bool:
+        # Pipelines that cannot describe their state always run.
+        return self.version == self.VERSION and bool(state) and self.pipelines.get(name) == state
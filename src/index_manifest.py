@@ -0,0 +1,72 @@
+import json
+import os
+
+from typing import Dict, List, Optional
+
+class IndexManifest:
+    # Tracks, per collection, the content hash of every indexed file and the
+    # point ids (with their chunk hashes) and entity names it produced, so a
+    # pipeline only has to re-embed what changed since the last run.
+
+    def __init__(self, path: str):
+        self.path = path
+        self.collections: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        manifest = cls(path)
+        if os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    manifest.collections = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING]: Ignoring unreadable index manifest {path}: {e}")
+                manifest.collections = {}
+        return manifest
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.collections, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def signature(self, collection_name: str) -> Optional[str]:
+        return self.collections.get(collection_name, {}).get("signature")
+
+    def reset(self, collection_name: str, signature: str):
+        self.collections[collection_name] = {"signature": signature, "files": {}}
+
+    def files(self, collection_name: str) -> List[str]:
+        return list(self.collections.get(collection_name, {}).get("files", {}).keys())
+
+    def file_hash(self, collection_name: str, filename: str) -> Optional[str]:
+        entry = self._files(collection_name).get(filename)
+        return entry["hash"] if entry else None
+
+    def is_current(self, collection_name: str, filename: str, file_hash: str) -> bool:
+        entry = self._files(collection_name).get(filename)
+        return bool(entry) and entry["hash"] == file_hash and "entities" in entry
+
+    def point_ids(self, collection_name: str, filename: str) -> List[str]:
+        entry = self._files(collection_name).get(filename)
+        return list(entry["chunks"].keys()) if entry else []
+
+    def entity_names(self, collection_name: str) -> List[str]:
+        names = set()
+        for entry in self._files(collection_name).values():
+            names.update(entry.get("entities", []))
+        return sorted(names)
+
+    def set_file(self, collection_name: str, filename: str, file_hash: str, chunks: Dict[str, str], entity_names: List[str]):
+        self._files(collection_name)[filename] = {"hash": file_hash, "chunks": chunks, "entities": entity_names}
+
+    def remove_file(self, collection_name: str, filename: str):
+        self._files(collection_name).pop(filename, None)
+
+    def _files(self, collection_name: str) -> Dict[str, Dict]:
+        collection = self.collections.setdefault(collection_name, {"signature": None, "files": {}})
+        return collection.setdefault("files", {})
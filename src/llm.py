@@ -1,6 +1,29 @@
+import asyncio
 import re
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional, Union
+
+@dataclass
+class LLMAnswer:
+    text: str
+    # Token usage reported by the provider for this request, if any.
+    usage: Optional[Dict[str, int]] = None
+
+class LLMStream:
+    # The tokens of an answer, iterated with `for` or `async for` depending
+    # on the call that made it. `usage` holds the token usage of this request
+    # once the stream is consumed, None when the provider reports none.
+    def __init__(self, tokens: Callable[["LLMStream"], Union[Iterator[str], AsyncIterator[str]]]):
+        self.usage: Optional[Dict[str, int]] = None
+        self._tokens = tokens(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tokens)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._tokens.__aiter__()
 
 class LLM(ABC):
     def __init__(self, provider: str, api_key: str, model: str, url=None):
@@ -12,5 +35,31 @@ class LLM(ABC):
         self.user_prompt = None
     
     @abstractmethod
-    def ask(self, context: str, query) -> str:
-        return
\ No newline at end of file
+    def ask(self, context: str, query) -> LLMAnswer:
+        return
+
+    def stream(self, context: str, query) -> LLMStream:
+        # Providers without streaming support yield the whole answer at once.
+        def tokens(stream: LLMStream) -> Iterator[str]:
+            answer = self.ask(context, query)
+            stream.usage = answer.usage
+            yield answer.text
+
+        return LLMStream(tokens)
+
+    async def ask_async(self, context: str, query) -> LLMAnswer:
+        # Providers without an async client block a worker thread instead of
+        # the event loop.
+        return await asyncio.to_thread(self.ask, context, query)
+
+    async def aclose(self):
+        # Releases the connections of the async calls, if any.
+        return
+
+    def stream_async(self, context: str, query) -> LLMStream:
+        async def tokens(stream: LLMStream) -> AsyncIterator[str]:
+            answer = await self.ask_async(context, query)
+            stream.usage = answer.usage
+            yield answer.text
+
+        return LLMStream(tokens)
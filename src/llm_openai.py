@@ -1,30 +1,171 @@
-from openai import OpenAI
+import asyncio
 
-from src.llm import LLM
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from openai import AsyncOpenAI, BadRequestError, OpenAI
+
+from src.llm import LLM, LLMAnswer, LLMStream
+from src.telemetry import METRICS, traced
 
 class OpenAILLM(LLM):
-    def __init__(self, provider, api_key, model, url):
+    # Seconds before a request to the provider is abandoned.
+    REQUEST_TIMEOUT = 60.0
+
+    # stream_usage asks for the usage in a last stream chunk
+    # (stream_options.include_usage). Providers that reject the option with a
+    # 400 get the request again without it, and every later stream goes
+    # without, their streams report no usage.
+    def __init__(self, provider, api_key, model, url, timeout: float = REQUEST_TIMEOUT, stream_usage: bool = True):
         super().__init__(provider, api_key, model, url)
 
+        self.timeout = timeout
+        self.stream_usage = stream_usage
         self.llm = OpenAI(
             api_key=self.api_key,
-            base_url=url
+            base_url=url,
+            timeout=timeout
+        )
+        self._async_llm = None
+        self._async_loop = None
+
+    # Every call returns its own usage (LLMAnswer.usage, LLMStream.usage),
+    # the same instance serves concurrent turns.
+    @traced("llm_ask")
+    def ask(self, context, query) -> LLMAnswer:
+        response = self.llm.chat.completions.create(
+            model=self.model,
+            messages=self._messages(context, query),
+            temperature=0.5
+        )
+        return LLMAnswer(response.choices[0].message.content, self._record_usage(response.usage))
+
+    def stream(self, context, query) -> LLMStream:
+        def tokens(stream: LLMStream) -> Iterator[str]:
+            try:
+                response = self.llm.chat.completions.create(**self._stream_request(context, query))
+            except BadRequestError as e:
+                if not self._drop_stream_usage(e):
+                    raise
+                response = self.llm.chat.completions.create(**self._stream_request(context, query))
+
+            for chunk in response:
+                if chunk.usage:
+                    stream.usage = self._record_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield token
+
+        return LLMStream(tokens)
+
+    @traced("llm_ask")
+    async def ask_async(self, context, query) -> LLMAnswer:
+        response = await (await self._async_client()).chat.completions.create(
+            model=self.model,
+            messages=self._messages(context, query),
+            temperature=0.5
         )
+        return LLMAnswer(response.choices[0].message.content, self._record_usage(response.usage))
 
-    def ask(self, context, query):
+    def stream_async(self, context, query) -> LLMStream:
+        async def tokens(stream: LLMStream) -> AsyncIterator[str]:
+            try:
+                response = await (await self._async_client()).chat.completions.create(**self._stream_request(context, query))
+            except BadRequestError as e:
+                if not self._drop_stream_usage(e):
+                    raise
+                response = await (await self._async_client()).chat.completions.create(**self._stream_request(context, query))
+
+            try:
+                async for chunk in response:
+                    if chunk.usage:
+                        stream.usage = self._record_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        yield token
+            finally:
+                # Closes the connection when the consumer stops early or the
+                # task is cancelled.
+                await response.close()
+
+        return LLMStream(tokens)
+
+    def _stream_request(self, context, query) -> Dict:
+        request = {
+            "model": self.model,
+            "messages": self._messages(context, query),
+            "temperature": 0.5,
+            "stream": True
+        }
+        if self.stream_usage:
+            # The last chunk then carries the usage, with no choices.
+            request["stream_options"] = {"include_usage": True}
+        return request
+
+    def _drop_stream_usage(self, error: BadRequestError) -> bool:
+        # True when the request is worth sending again without stream_options.
+        if not self.stream_usage:
+            return False
+
+        print(f"[WARNING]: {self.provider} rejected the stream request, retrying without stream usage: {error}")
+        self.stream_usage = False
+        return True
+
+    async def aclose(self):
+        previous, self._async_llm, self._async_loop = self._async_llm, None, None
+        if previous is not None:
+            await self._close_async_client(previous)
+
+    async def _async_client(self) -> AsyncOpenAI:
+        # The async client's connection pool belongs to the event loop it was
+        # first used on, a call from another loop (asyncio.run per turn)
+        # replaces it and closes the previous one.
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            previous = self._async_llm
+            self._async_llm = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.url,
+                timeout=self.timeout
+            )
+            self._async_loop = loop
+            if previous is not None:
+                await self._close_async_client(previous)
+        return self._async_llm
+
+    async def _close_async_client(self, client: AsyncOpenAI):
+        try:
+            await client.close()
+        except Exception as e:
+            # Connections of an already closed loop cannot be closed from
+            # this one, they are released with the client.
+            print(f"[WARNING]: Failed to close the previous {self.provider} client: {e}")
+
+    def _record_usage(self, usage) -> Optional[Dict[str, int]]:
+        if usage is None:
+            return None
+
+        METRICS.inc("llm_tokens_total", usage.prompt_tokens or 0, model=self.model, kind="prompt")
+        METRICS.inc("llm_tokens_total", usage.completion_tokens or 0, model=self.model, kind="completion")
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens
+        }
+
+    def _messages(self, context, query) -> List[Dict[str, str]]:
         prompt = "".join([
             self.system_prompt or "", 
             "\n",
             self.user_prompt or ""]
         ).format(context=context, query=query)
-        
-        response = self.llm.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.5
-        )
 
-        return response.choices[0].message.content
\ No newline at end of file
+        return [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": prompt},
+        ]
@@ -0,0 +1,52 @@
+import json
+import os
+
+from dataclasses import asdict, fields
+from typing import Iterable, List, Optional
+
+from .chunking import ContentChunk
+
+class ParsedChunkCache:
+    # Stores the section chunks (infobox included) produced by an HTML
+    # processor as JSON lines, keyed by the processor version and the hash of
+    # the source file, so re-chunking or re-embedding never re-parses HTML.
+    CHUNK_FIELDS = [field.name for field in fields(ContentChunk) if field.name != "chunk_id"]
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def get(self, entity_type: str, version: str, file_hash: str) -> Optional[List[ContentChunk]]:
+        path = self._path(entity_type, version, file_hash)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return [ContentChunk(**json.loads(line)) for line in file if line.strip()]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[WARNING]: Ignoring unreadable parse cache entry {path}: {e}")
+            return None
+
+    def put(self, entity_type: str, version: str, file_hash: str, chunks: List[ContentChunk]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        path = self._path(entity_type, version, file_hash)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for chunk in chunks:
+                data = asdict(chunk)
+                file.write(json.dumps({name: data[name] for name in self.CHUNK_FIELDS}, separators=(",", ":")))
+                file.write("\n")
+        os.replace(tmp_path, path)
+
+    def prune(self, entity_type: str, version: str, file_hashes: Iterable[str]):
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        keep = {os.path.basename(self._path(entity_type, version, file_hash)) for file_hash in file_hashes}
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(f"{entity_type}-") and filename not in keep:
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def _path(self, entity_type: str, version: str, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{entity_type}-v{version}-{file_hash}.jsonl")
@@ -0,0 +1,80 @@
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type
+
+from .bm25 import BM25Index
+from .constants import LOCAL_DOMAIN_INDEX_MANIFEST_FILE, RAW_DATA_FOLDER_NAME
+from .domain_embedding_pipeline import DomainEmbeddingPipeline
+from .embedding_pipeline import EmbeddingPipeline, STATUS_FAILED
+from .html_processor import BaseHTMLProcessor
+from .telemetry import METRICS, span
+from .vdb import VectorDB
+
+@dataclass
+class PipelineDomain:
+    # One dataset folder and the collection its pages are indexed into.
+    name: str
+    data_dir: str
+    processor: Type[BaseHTMLProcessor]
+    collection_name: str
+    pipeline_class: Type[DomainEmbeddingPipeline] = DomainEmbeddingPipeline
+    # Each domain has its own manifest, pipelines run concurrently.
+    manifest_path: Optional[str] = None
+
+    def has_data(self) -> bool:
+        return os.path.isdir(f"{self.data_dir}/{RAW_DATA_FOLDER_NAME}")
+
+    def create(self, vdb: VectorDB, keyword_index: Optional[BM25Index] = None, parse_workers: int = os.cpu_count() or 1) -> DomainEmbeddingPipeline:
+        return self.pipeline_class(
+            vdb,
+            name=self.name,
+            data_dir=self.data_dir,
+            processor=self.processor,
+            collection_name=self.collection_name,
+            manifest_path=self.manifest_path or LOCAL_DOMAIN_INDEX_MANIFEST_FILE.format(collection_name=self.collection_name),
+            parse_workers=parse_workers,
+            keyword_index=keyword_index
+        )
+
+class PipelineRegistry:
+    # The domains the app can index. discover() keeps the ones whose
+    # dataset folder exists, so a domain is enabled by adding its pages.
+    def __init__(self):
+        self._domains: Dict[str, PipelineDomain] = {}
+
+    def register(self, domain: PipelineDomain):
+        if domain.collection_name in self._domains:
+            raise ValueError(f"A pipeline is already registered for the collection '{domain.collection_name}'")
+        self._domains[domain.collection_name] = domain
+
+    def domains(self) -> List[PipelineDomain]:
+        return list(self._domains.values())
+
+    def discover(self) -> List[PipelineDomain]:
+        return [domain for domain in self._domains.values() if domain.has_data()]
+
+def run_pipelines(pipelines: List[EmbeddingPipeline]) -> bool:
+    # Runs every pipeline in its own thread. They share the vector DB and
+    # its embedder, an EmbeddingScheduler makes them take turns on the
+    # model. Each pipeline reports its own progress().
+    if not pipelines:
+        return EmbeddingPipeline.SUCCESS
+
+    with ThreadPoolExecutor(max_workers=len(pipelines), thread_name_prefix="pipeline") as executor:
+        results = list(executor.map(_run_pipeline, pipelines))
+    return all(result == EmbeddingPipeline.SUCCESS for result in results)
+
+def _run_pipeline(pipeline: EmbeddingPipeline) -> bool:
+    try:
+        with span("pipeline_start", pipeline=pipeline.name):
+            result = pipeline.start()
+    except Exception as e:
+        print(f"[ERROR]: {pipeline.name} stopped: {e}")
+        pipeline.set_status(STATUS_FAILED)
+        result = EmbeddingPipeline.FAILURE
+
+    if result == EmbeddingPipeline.FAILURE:
+        METRICS.inc("pipeline_failures_total", pipeline=pipeline.name)
+    return result
@@ -0,0 +1,393 @@
+import asyncio
+import os
+import threading
+import time
+
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .answer_cache import SemanticAnswerCache
+from .bm25 import BM25Index
+from .constants import (
+    EMBEDDER_BACKEND,
+    EMBEDDER_LLM_API_KEY,
+    EMBEDDER_THREADS,
+    EMBEDDING_MAX_BATCH_SIZE,
+    EMBEDDING_MAX_WAIT_MS,
+    ENGINEERING_COLLECTION_NAME,
+    ENGINEERING_DATA_DIR,
+    EQUIPMENT_COLLECTION_NAME,
+    EQUIPMENT_DATA_DIR,
+    INFERENCE_LLM_API_KEY,
+    INFERENCE_LLM_MODEL,
+    INFERENCE_LLM_PROVIDER,
+    INFERENCE_LLM_STREAM_USAGE,
+    INFERENCE_LLM_URL,
+    LOCAL_INDEX_ARTIFACT_FILE,
+    LOCAL_INDEX_MANIFEST_FILE,
+    LOCAL_KEYWORD_INDEX_DIR,
+    LOCAL_NUMPY_VECTOR_DB_DIR,
+    LOCAL_QUERY_CACHE_FILE,
+    LOCAL_VECTOR_DB_FILE,
+    QDRANT_URL,
+    SHIPS_COLLECTION_NAME,
+    SHIPS_DATA_DIR,
+    VECTOR_DB_BACKEND,
+    VECTOR_DB_DTYPE,
+    WEAPON_DATA_DIR,
+    WEAPONS_COLLECTION_NAME
+)
+from .context_builder import BuiltContext, ContextBuilder
+from .embedder import BAAIEmbedder, Embedder, LazyEmbedder
+from .embedding_cache import QueryEmbeddingCache
+from .embedding_pipeline import EmbeddingPipeline, STATUS_SKIPPED
+from .embedding_scheduler import EmbeddingScheduler
+from .entity_matcher import EntityMatcher
+from .hybrid_search import HybridRetriever, SEARCH_HYBRID, search_per_entity
+from .index_artifact import IndexArtifact
+from .llm import LLM
+from .llm_openai import OpenAILLM
+from .pipeline_registry import PipelineDomain, PipelineRegistry, run_pipelines
+from .reranker import BAAIReranker, RerankingRetriever
+from .telemetry import METRICS, Trace, record, span, trace
+from .vdb import SearchResult, VectorDB
+from .vdb_numpy import NumpyVectorDB, VECTOR_FLOAT32
+from .wiki_html_processor import EngineeringHTMLProcessor, EquipmentHTMLProcessor, WeaponHTMLProcessor
+
+from .ships.ships_embedding_pipeline import ShipsEmbeddingPipeline
+from .ships.ships_html_processor import ShipHTMLProcessor
+from .ships.ships_entities import build_ship_matcher
+from .ships.ships_spec_store import ShipSpecStore
+from .ships.ships_stat_questions import ShipStatQuestionAnswerer
+
+ANSWER_PROMPT = """
+    Use the following pieces of information enclosed in <context> tags to provide an answer to the question enclosed in <question> tags.
+
+    <context>
+    {context}
+    </context>
+
+    <question>
+    {query}
+    </question>
+    """
+
+# Embedder backends, selected with the EMBEDDER_BACKEND variable.
+EMBEDDER_TORCH = "torch"
+EMBEDDER_ONNX = "onnx"
+EMBEDDER_ONNX_INT8 = "onnx-int8"
+EMBEDDER_BACKENDS = [EMBEDDER_TORCH, EMBEDDER_ONNX, EMBEDDER_ONNX_INT8]
+
+# Vector DB backends, selected with the VECTOR_DB_BACKEND variable.
+VECTOR_DB_QDRANT = "qdrant"
+VECTOR_DB_NUMPY = "numpy"
+VECTOR_DB_BACKENDS = [VECTOR_DB_QDRANT, VECTOR_DB_NUMPY]
+
+# Where an answer came from.
+ORIGIN_STATS = "stats"
+ORIGIN_CACHE = "cache"
+ORIGIN_LLM = "llm"
+
+@dataclass
+class PreparedAnswer:
+    query: str
+    topic: List[str]
+    answer: Optional[str] = None
+    origin: Optional[str] = None
+    results: List[SearchResult] = field(default_factory=list)
+    context: Optional[BuiltContext] = None
+    query_vector: Optional[List[float]] = None
+    usage: Optional[Dict[str, int]] = None
+    # Timings of the spans recorded while answering.
+    trace: Trace = field(default_factory=Trace)
+
+    def summary(self) -> Dict[str, Any]:
+        # JSON friendly view, shared by the API and the Streamlit sidebar.
+        return {
+            "answer": self.answer,
+            "topic": self.topic,
+            "origin": self.origin,
+            "sources": [
+                {"id": result.id, "score": result.score, "entity_name": result.payload.get("entity_name"), "section_type": result.payload.get("section_type")}
+                for result in self.results if self.context is None or result.id in self.context.chunk_ids
+            ],
+            "context_tokens": self.context.tokens if self.context else 0,
+            "context_chunks": len(self.context.chunk_ids) if self.context else 0,
+            "context_dropped": self.context.duplicates + self.context.over_budget if self.context else 0,
+            "usage": self.usage,
+            "timings": self.trace.summary()
+        }
+
+class RAGService:
+    # The question answering pipeline without any UI: topic detection, spec
+    # answers, retrieval, context packing, the answer cache and the LLM.
+    # Streamlit and the HTTP API both drive one instance, so the embedder,
+    # the vector DB and the reranker are loaded once per process.
+    #
+    # Turns are stateless, the caller passes the previous topic back in so a
+    # follow-up that names no ship keeps talking about the same ones.
+    RETRIEVAL_TIMEOUT = 20.0
+    RESULTS_PER_SHIP = 3
+
+    def __init__(
+        self,
+        vdb: VectorDB,
+        retriever: HybridRetriever,
+        llm: LLM,
+        answer_cache: SemanticAnswerCache,
+        pipelines: List[EmbeddingPipeline],
+        collection_name: str = SHIPS_COLLECTION_NAME,
+        artifact_path: str = LOCAL_INDEX_ARTIFACT_FILE
+    ):
+        self.vdb = vdb
+        self.retriever = retriever
+        self.llm = llm
+        self.answer_cache = answer_cache
+        self.pipelines = pipelines
+        self.collection_name = collection_name
+        self.artifact_path = artifact_path
+
+        self.entity_matcher: EntityMatcher = build_ship_matcher([])
+        self.stat_answerer = ShipStatQuestionAnswerer(ShipSpecStore(), self.entity_matcher)
+        self._reranking_retriever = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls) -> "RAGService":
+        load_environment()
+
+        # The model is only loaded for the first query (or by warm_up), a
+        # prebuilt index does not need it at startup.
+        embedder = EmbeddingScheduler(
+            create_embedder(os.getenv(EMBEDDER_BACKEND, EMBEDDER_TORCH), lazy=True),
+            max_batch_size=int(os.getenv(EMBEDDING_MAX_BATCH_SIZE, EmbeddingScheduler.MAX_BATCH_SIZE)),
+            max_wait_seconds=float(os.getenv(EMBEDDING_MAX_WAIT_MS, EmbeddingScheduler.MAX_WAIT_SECONDS * 1000)) / 1000
+        )
+        vdb, keyword_indexes, pipelines = create_indexes(embedder, QueryEmbeddingCache(embedder.MODEL_NAME, db_path=LOCAL_QUERY_CACHE_FILE))
+
+        llm = OpenAILLM(
+            provider=os.getenv(INFERENCE_LLM_PROVIDER),
+            api_key=os.getenv(INFERENCE_LLM_API_KEY),
+            model=os.getenv(INFERENCE_LLM_MODEL),
+            url=os.getenv(INFERENCE_LLM_URL),
+            stream_usage=os.getenv(INFERENCE_LLM_STREAM_USAGE, "1") != "0"
+        )
+        llm.user_prompt = ANSWER_PROMPT
+
+        return cls(
+            vdb=vdb,
+            retriever=HybridRetriever(vdb, keyword_indexes),
+            llm=llm,
+            answer_cache=SemanticAnswerCache(),
+            pipelines=pipelines
+        )
+
+    def start(self) -> bool:
+        # Brings the indexes up to date, then loads what is derived from them.
+        # Pipelines the index artifact (see src/build_index.py) still
+        # describes are skipped, the others run concurrently.
+        artifact = IndexArtifact.load(self.artifact_path)
+        pending = []
+        for pipeline in self.pipelines:
+            if artifact.is_current(pipeline.name, pipeline.index_state()):
+                pipeline.set_status(STATUS_SKIPPED)
+                METRICS.inc("pipeline_skipped_total", pipeline=pipeline.name)
+                continue
+            pending.append(pipeline)
+        result = run_pipelines(pending)
+
+        names = []
+        spec_store = ShipSpecStore()
+        for pipeline in self.pipelines:
+            if isinstance(pipeline, ShipsEmbeddingPipeline):
+                names.extend(pipeline.entity_names())
+                spec_store = ShipSpecStore.load(pipeline.spec_store_path)
+        self.entity_matcher = build_ship_matcher(names)
+        self.stat_answerer = ShipStatQuestionAnswerer(spec_store, self.entity_matcher)
+        return result
+
+    def warm_up(self, rerank: bool = True) -> threading.Thread:
+        # Loads the models in the background, so the first question only
+        # waits for them when it comes before they are ready.
+        def load():
+            try:
+                self.vdb.embedder.dimension()
+                if rerank:
+                    self.retriever_for(rerank=True)
+            except Exception as e:
+                print(f"[WARNING]: Failed to load the models: {e}")
+
+        thread = threading.Thread(target=load, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.vdb.close()
+        if isinstance(self.vdb.embedder, EmbeddingScheduler):
+            self.vdb.embedder.close()
+
+    async def aclose(self):
+        # close() plus the LLM connections bound to the running event loop.
+        await self.llm.aclose()
+        self.close()
+
+    def detect_topic(self, query: str, topic: Optional[List[str]] = None) -> List[str]:
+        return self.entity_matcher.match(query) or list(topic or [])
+
+    def retriever_for(self, rerank: bool):
+        if not rerank:
+            return self.retriever
+
+        # The cross-encoder is only loaded once reranking is first used.
+        with self._lock:
+            if self._reranking_retriever is None:
+                self._reranking_retriever = RerankingRetriever(self.retriever, BAAIReranker())
+        return self._reranking_retriever
+
+    async def search(self, query: str, topic: Optional[List[str]] = None, mode: str = SEARCH_HYBRID, rerank: bool = True, limit: int = RESULTS_PER_SHIP) -> List[SearchResult]:
+        _, results = await self._retrieve(query, self.detect_topic(query, topic), mode, rerank, limit)
+        return results
+
+    async def prepare(self, query: str, topic: Optional[List[str]] = None, mode: str = SEARCH_HYBRID, rerank: bool = True, token_budget: int = ContextBuilder.TOKEN_BUDGET) -> PreparedAnswer:
+        # Everything up to the LLM call. The returned answer is already set
+        # when the spec store or the answer cache could answer.
+        named_ships = self.entity_matcher.match(query)
+        ships = named_ships or list(topic or [])
+        prepared = PreparedAnswer(query=query, topic=ships)
+
+        with trace(prepared.trace), span("prepare"):
+            # Numeric spec questions are answered straight from the spec store,
+            # without retrieval or an LLM call.
+            prepared.answer = self.stat_answerer.answer(query, named_ships)
+            if prepared.answer is not None:
+                prepared.origin = ORIGIN_STATS
+                METRICS.inc("answers_total", origin=ORIGIN_STATS)
+                return prepared
+
+            topic_line = f"The query relates to the ship: {', '.join(ships)}." if ships else ""
+            prepared.query_vector, prepared.results = await self._retrieve(f"{query}\n{topic_line}", ships, mode, rerank, self.RESULTS_PER_SHIP)
+            prepared.context = ContextBuilder(token_budget).build(prepared.results, topic_line)
+
+            prepared.answer = self.answer_cache.get(prepared.query_vector, prepared.context.chunk_ids)
+            if prepared.answer is not None:
+                prepared.origin = ORIGIN_CACHE
+                METRICS.inc("answers_total", origin=ORIGIN_CACHE)
+        return prepared
+
+    async def ask(self, query: str, topic: Optional[List[str]] = None, mode: str = SEARCH_HYBRID, rerank: bool = True, token_budget: int = ContextBuilder.TOKEN_BUDGET) -> PreparedAnswer:
+        prepared = await self.prepare(query, topic, mode, rerank, token_budget)
+        if prepared.answer is None:
+            with trace(prepared.trace):
+                answer = await self.llm.ask_async(prepared.context.text, query)
+            prepared.usage = answer.usage
+            self.finish(prepared, answer.text)
+        return prepared
+
+    def stream(self, prepared: PreparedAnswer) -> Iterator[str]:
+        # For UIs that render tokens as they arrive, call finish() with the
+        # full text once the stream is consumed. The time to the first token
+        # and to the end of the stream go to the turn's trace.
+        start = time.perf_counter()
+        first_token = True
+        stream = self.llm.stream(prepared.context.text, prepared.query)
+        for token in stream:
+            if first_token:
+                record("llm_first_token", time.perf_counter() - start, start, turn=prepared.trace)
+                first_token = False
+            yield token
+        record("llm_stream", time.perf_counter() - start, start, turn=prepared.trace)
+        prepared.usage = stream.usage
+
+    def finish(self, prepared: PreparedAnswer, answer: str):
+        prepared.answer = answer
+        prepared.origin = ORIGIN_LLM
+        METRICS.inc("answers_total", origin=ORIGIN_LLM)
+        self.answer_cache.put(prepared.query_vector, prepared.context.chunk_ids, answer)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "query_cache": self.vdb.query_cache.stats() if self.vdb.query_cache else None,
+            "answer_cache": self.answer_cache.stats(),
+            "reranker": self._reranking_retriever.stats() if self._reranking_retriever else None,
+            "embedding": self.vdb.embedder.stats() if isinstance(self.vdb.embedder, EmbeddingScheduler) else None,
+            "pipelines": [pipeline.progress() for pipeline in self.pipelines],
+            "metrics": METRICS.snapshot()
+        }
+
+    async def _retrieve(self, search_query: str, ships: List[str], mode: str, rerank: bool, limit: int):
+        retriever = self.retriever_for(rerank)
+
+        async def retrieve():
+            query_vector = await self.vdb.embed_query_async(search_query)
+            if len(ships) > 1:
+                # Comparisons search every ship concurrently, each with its own quota.
+                results = await search_per_entity(retriever, search_query, self.collection_name, ships, limit=limit, query_vector=query_vector, mode=mode)
+            else:
+                # Only score the chunks of the ship being discussed.
+                filters = {"entity_name": ships} if ships else None
+                results = await retriever.search_results_async(search_query, self.collection_name, limit=limit, query_vector=query_vector, filters=filters, mode=mode)
+            return query_vector, results
+
+        return await asyncio.wait_for(retrieve(), self.RETRIEVAL_TIMEOUT)
+
+def create_embedder(backend: str, lazy: bool = False) -> Embedder:
+    if lazy:
+        return LazyEmbedder(partial(create_embedder, backend), embedder_model_name(backend))
+    if backend == EMBEDDER_TORCH:
+        return BAAIEmbedder()
+    if backend in (EMBEDDER_ONNX, EMBEDDER_ONNX_INT8):
+        # Imported here so the torch backend does not need onnxruntime.
+        from .embedder_onnx import ONNXEmbedder
+
+        threads = int(os.getenv(EMBEDDER_THREADS, ONNXEmbedder.THREADS))
+        return ONNXEmbedder(quantize=backend == EMBEDDER_ONNX_INT8, threads=threads)
+    raise ValueError(f"Unknown embedder backend '{backend}', expected one of {EMBEDDER_BACKENDS}")
+
+def embedder_model_name(backend: str) -> str:
+    if backend == EMBEDDER_TORCH:
+        return BAAIEmbedder.MODEL_NAME
+    if backend in (EMBEDDER_ONNX, EMBEDDER_ONNX_INT8):
+        from .embedder_onnx import ONNXEmbedder
+
+        return ONNXEmbedder.model_name(quantize=backend == EMBEDDER_ONNX_INT8)
+    raise ValueError(f"Unknown embedder backend '{backend}', expected one of {EMBEDDER_BACKENDS}")
+
+def create_vector_db(backend: str, embedder: Embedder, query_cache: Optional[QueryEmbeddingCache] = None) -> VectorDB:
+    if backend == VECTOR_DB_QDRANT:
+        # Imported here, qdrant_client alone takes about a second to import.
+        from .vdb_qdrant import QdrantVectorDB
+
+        return QdrantVectorDB(embedder=embedder, db_path=LOCAL_VECTOR_DB_FILE, url=os.getenv(QDRANT_URL), query_cache=query_cache)
+    if backend == VECTOR_DB_NUMPY:
+        return NumpyVectorDB(embedder=embedder, db_path=LOCAL_NUMPY_VECTOR_DB_DIR, dtype=os.getenv(VECTOR_DB_DTYPE, VECTOR_FLOAT32), query_cache=query_cache)
+    raise ValueError(f"Unknown vector DB backend '{backend}', expected one of {VECTOR_DB_BACKENDS}")
+
+def create_registry() -> PipelineRegistry:
+    # Ships keeps the original manifest so existing indexes stay valid. The
+    # other domains only run once their dataset folder exists.
+    registry = PipelineRegistry()
+    registry.register(PipelineDomain("Ships Embedding Pipeline", SHIPS_DATA_DIR, ShipHTMLProcessor, SHIPS_COLLECTION_NAME, ShipsEmbeddingPipeline, LOCAL_INDEX_MANIFEST_FILE))
+    registry.register(PipelineDomain("Equipment Embedding Pipeline", EQUIPMENT_DATA_DIR, EquipmentHTMLProcessor, EQUIPMENT_COLLECTION_NAME))
+    registry.register(PipelineDomain("Weapons Embedding Pipeline", WEAPON_DATA_DIR, WeaponHTMLProcessor, WEAPONS_COLLECTION_NAME))
+    registry.register(PipelineDomain("Engineering Embedding Pipeline", ENGINEERING_DATA_DIR, EngineeringHTMLProcessor, ENGINEERING_COLLECTION_NAME))
+    return registry
+
+def create_indexes(embedder: Embedder, query_cache: Optional[QueryEmbeddingCache] = None, registry: Optional[PipelineRegistry] = None) -> Tuple[VectorDB, Dict[str, BM25Index], List[EmbeddingPipeline]]:
+    # The stores and the pipelines filling them, shared by the service and
+    # the build_index command. One keyword index per collection.
+    vdb = create_vector_db(os.getenv(VECTOR_DB_BACKEND, VECTOR_DB_QDRANT), embedder, query_cache)
+    domains = (registry or create_registry()).discover()
+    keyword_indexes = {domain.collection_name: BM25Index(f"{LOCAL_KEYWORD_INDEX_DIR}/{domain.collection_name}.npz") for domain in domains}
+    # The pipelines run side by side, they split the parse workers.
+    parse_workers = max(1, (os.cpu_count() or 1) // max(1, len(domains)))
+    pipelines = [domain.create(vdb, keyword_indexes[domain.collection_name], parse_workers) for domain in domains]
+    return vdb, keyword_indexes, pipelines
+
+def load_environment():
+    load_dotenv()
+
+    if os.getenv(EMBEDDER_LLM_API_KEY):
+        os.environ["HF_TOKEN"] = os.getenv(EMBEDDER_LLM_API_KEY)
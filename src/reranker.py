@@ -0,0 +1,144 @@
+import asyncio
+import math
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from .context_builder import payload_text
+from .hybrid_search import SEARCH_DENSE, SEARCH_HYBRID, HybridRetriever
+from .telemetry import record
+from .vdb import SearchResult
+
+class Reranker(ABC):
+    MODEL_NAME = ""
+
+    def __init__(self):
+        return
+
+    @abstractmethod
+    def score(self, query: str, documents: List[str], batch_size: int = 32) -> List[float]:
+        return
+
+class BAAIReranker(Reranker):
+    MODEL_NAME = "BAAI/bge-reranker-base"
+    # Query + chunk pairs are truncated to this many tokens, enough for the
+    # chunks produced by ChunkStrategy and it bounds the cost of one batch.
+    MAX_LENGTH = 512
+
+    def __init__(self):
+        # Imported here, torch is only loaded when reranking is first used.
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(self.MODEL_NAME, max_length=self.MAX_LENGTH)
+
+    def score(self, query: str, documents: List[str], batch_size: int = 32) -> List[float]:
+        if not documents:
+            return []
+        # Single-label cross-encoders return sigmoid scores in [0, 1].
+        return self.model.predict([(query, document) for document in documents], batch_size=batch_size).tolist()
+
+def candidate_text(payload: Dict[str, Any]) -> str:
+    return "\n".join([payload.get("entity_name", ""), *payload.get("headers", []), payload.get("infobox_text", ""), payload_text(payload)])
+
+class RerankingRetriever:
+    # Wraps a retriever (VectorDB or HybridRetriever): over-fetches
+    # CANDIDATE_POOL results, scores them in one batch with a cross-encoder and
+    # keeps the best `limit`. When the first-stage top result is a clear
+    # winner the ranking is trusted as is and the cross-encoder is not run.
+    # Scores are on a different scale per search mode, so is each test:
+    # - dense: the cosine similarity leads the runner-up by DENSE_MARGIN,
+    # - hybrid: the dense and the keyword search both ranked it first
+    #   (fused score 2 / (RRF_K + 1)),
+    # - keyword: the BM25 score leads by KEYWORD_MARGIN of the top score.
+    CANDIDATE_POOL = 20
+    DENSE_MARGIN = 0.1
+    KEYWORD_MARGIN = 0.5
+
+    def __init__(self, retriever, reranker: Reranker, candidate_pool: int = CANDIDATE_POOL, dense_margin: float = DENSE_MARGIN, keyword_margin: float = KEYWORD_MARGIN, batch_size: int = 32):
+        self.retriever = retriever
+        self.reranker = reranker
+        self.candidate_pool = candidate_pool
+        self.dense_margin = dense_margin
+        self.keyword_margin = keyword_margin
+        self.batch_size = batch_size
+
+        self.reranked = 0
+        self.skipped = 0
+        self.retrieve_seconds = 0.0
+        self.rerank_seconds = 0.0
+        self.last_retrieve_ms = 0.0
+        self.last_rerank_ms = 0.0
+        self._lock = threading.Lock()
+
+    def search_results(self, query: str, collection_name: str, limit: int = 3, **kwargs) -> List[SearchResult]:
+        start = time.perf_counter()
+        candidates = self.retriever.search_results(query, collection_name, limit=max(self.candidate_pool, limit), **kwargs)
+        return self._rerank(query, candidates, limit, self._scoring(collection_name, kwargs), time.perf_counter() - start)
+
+    def search(self, query: str, collection_name: str, **kwargs):
+        return [result.payload["html_snippet"] for result in self.search_results(query, collection_name, **kwargs)]
+
+    async def search_results_async(self, query: str, collection_name: str, limit: int = 3, **kwargs) -> List[SearchResult]:
+        start = time.perf_counter()
+        candidates = await self.retriever.search_results_async(query, collection_name, limit=max(self.candidate_pool, limit), **kwargs)
+        return await asyncio.to_thread(self._rerank, query, candidates, limit, self._scoring(collection_name, kwargs), time.perf_counter() - start)
+
+    async def search_async(self, query: str, collection_name: str, **kwargs):
+        return [result.payload["html_snippet"] for result in await self.search_results_async(query, collection_name, **kwargs)]
+
+    def _rerank(self, query: str, candidates: List[SearchResult], limit: int, scoring: str, retrieve_seconds: float) -> List[SearchResult]:
+        if len(candidates) <= limit or self._is_decisive(candidates, scoring):
+            self._record(retrieve_seconds, None)
+            return candidates[:limit]
+
+        start = time.perf_counter()
+        scores = self.reranker.score(query, [candidate_text(candidate.payload) for candidate in candidates], batch_size=self.batch_size)
+        rerank_seconds = time.perf_counter() - start
+        self._record(retrieve_seconds, rerank_seconds)
+        record("rerank", rerank_seconds, start)
+
+        ranked = sorted(zip(scores, range(len(candidates))), key=lambda item: item[0], reverse=True)[:limit]
+        return [
+            SearchResult(id=candidates[index].id, score=float(score), payload=candidates[index].payload)
+            for score, index in ranked
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            searches = self.reranked + self.skipped
+            return {
+                "reranked": self.reranked,
+                "skipped": self.skipped,
+                "avg_retrieve_ms": self.retrieve_seconds * 1000 / searches if searches else 0.0,
+                "avg_rerank_ms": self.rerank_seconds * 1000 / self.reranked if self.reranked else 0.0,
+                "last_retrieve_ms": self.last_retrieve_ms,
+                "last_rerank_ms": self.last_rerank_ms
+            }
+
+    def _scoring(self, collection_name: str, kwargs: Dict[str, Any]) -> str:
+        # A bare VectorDB only has cosine scores.
+        if isinstance(self.retriever, HybridRetriever):
+            return self.retriever.scoring(collection_name, kwargs.get("mode"))
+        return SEARCH_DENSE
+
+    def _is_decisive(self, candidates: List[SearchResult], scoring: str) -> bool:
+        top, runner_up = candidates[0].score, candidates[1].score
+        if scoring == SEARCH_DENSE:
+            return top - runner_up >= self.dense_margin
+        if scoring == SEARCH_HYBRID:
+            return math.isclose(top, 2.0 / (self.retriever.RRF_K + 1))
+        return top > 0 and (top - runner_up) / top >= self.keyword_margin
+
+    def _record(self, retrieve_seconds: float, rerank_seconds: Optional[float]):
+        with self._lock:
+            self.retrieve_seconds += retrieve_seconds
+            self.last_retrieve_ms = retrieve_seconds * 1000
+            if rerank_seconds is None:
+                self.skipped += 1
+                self.last_rerank_ms = 0.0
+            else:
+                self.reranked += 1
+                self.rerank_seconds += rerank_seconds
+                self.last_rerank_ms = rerank_seconds * 1000
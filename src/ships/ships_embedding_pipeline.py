@@ -1,45 +1,87 @@
 import os
 
-from .ships_html_processor import ShipHTMLProcessor
+from typing import Dict, List, Optional, Type
 
-from ..chunking import ChunkStrategy
-from ..constants import SHIPS_DATA_DIR, SHIPS_COLLECTION_NAME, RAW_DATA_FOLDER_NAME
-from ..embedding_pipeline import EmbeddingPipeline
+from .ships_html_processor import ShipHTMLProcessor, UNKNOWN_SHIP
+from .ships_spec_store import ShipSpecStore
+
+from ..bm25 import BM25Index
+from ..chunking import ChunkStrategy, ContentChunk
+from ..constants import SHIPS_DATA_DIR, SHIPS_COLLECTION_NAME, LOCAL_INDEX_MANIFEST_FILE, LOCAL_PARSE_CACHE_DIR, LOCAL_SHIP_SPECS_FILE
+from ..domain_embedding_pipeline import DomainEmbeddingPipeline
+from ..html_processor import PARSER_HTML
 from ..vdb import VectorDB
 
-class ShipsEmbeddingPipeline(EmbeddingPipeline):
-    def __init__(self, vdb: VectorDB):
-        super().__init__(vdb)
+class ShipsEmbeddingPipeline(DomainEmbeddingPipeline):
+    # The ships domain, which also keeps the spec store (the infobox numbers
+    # of every ship) in sync with the dataset.
+    def __init__(
+        self,
+        vdb: VectorDB,
+        manifest_path: str = LOCAL_INDEX_MANIFEST_FILE,
+        parse_workers: int = os.cpu_count() or 1,
+        parse_cache_dir: str = LOCAL_PARSE_CACHE_DIR,
+        html_parser: str = PARSER_HTML,
+        prune_html: bool = False,
+        spec_store_path: str = LOCAL_SHIP_SPECS_FILE,
+        keyword_index: Optional[BM25Index] = None,
+        chunk_strategy: Optional[ChunkStrategy] = None,
+        name: str = "Ships Embedding Pipeline",
+        data_dir: str = SHIPS_DATA_DIR,
+        processor: Type[ShipHTMLProcessor] = ShipHTMLProcessor,
+        collection_name: str = SHIPS_COLLECTION_NAME
+    ):
+        super().__init__(
+            vdb,
+            name=name,
+            data_dir=data_dir,
+            processor=processor,
+            collection_name=collection_name,
+            manifest_path=manifest_path,
+            parse_workers=parse_workers,
+            parse_cache_dir=parse_cache_dir,
+            html_parser=html_parser,
+            prune_html=prune_html,
+            keyword_index=keyword_index,
+            chunk_strategy=chunk_strategy
+        )
+
+        self.spec_store_path = spec_store_path
+        self._spec_store = None
+        self._specs_changed = False
+
+    def index_state(self) -> Dict[str, str]:
+        state = super().index_state()
+        if state:
+            state["specs"] = f"v{ShipSpecStore.VERSION}"
+        return state
+
+    def _load_stores(self):
+        self._spec_store = ShipSpecStore.load(self.spec_store_path)
+        self._specs_changed = False
+
+    def _store_paths(self) -> List[str]:
+        return [self.manifest_path, self.spec_store_path]
+
+    def _is_file_current(self, filename: str) -> bool:
+        return filename in self._spec_store
 
-        self.name = "Ships Embedding Pipeline"
+    def _files_removed(self, filenames: List[str]):
+        for filename in list(self._spec_store.rows):
+            if filename not in filenames:
+                self._spec_store.remove(filename)
+                self._specs_changed = True
 
-        self.dataset_dir = f"{SHIPS_DATA_DIR}/{RAW_DATA_FOLDER_NAME}"
+    def _file_indexed(self, filename: str, raw_chunks: List[ContentChunk]):
+        name = raw_chunks[0].entity_name if raw_chunks else UNKNOWN_SHIP
+        infobox = next((chunk.infobox for chunk in raw_chunks if chunk.infobox), None)
+        self._spec_store.set_ship(filename, name, infobox)
+        self._specs_changed = True
 
-    def start(self):
+    def _save_extra_stores(self):
         try:
-            self.vdb.init_collection(SHIPS_COLLECTION_NAME)
-        except Exception as e:
-            print(f"[ERROR]: Failed to initialize vector DB collection {SHIPS_COLLECTION_NAME}: {e}")
-            return EmbeddingPipeline.FAILURE
-
-        for filename in os.listdir(self.dataset_dir):
-            file_path = os.path.join(self.dataset_dir, filename)
-
-            if not os.path.isfile(file_path) or not filename.lower().endswith((".html", ".htm")):
-                continue
-
-            try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    html_content = file.read()
-                    self._process_ship_html(html_content)
-            except Exception as e:
-                print(f"[ERROR]: Failed to parse {filename}: {e}")
-                return EmbeddingPipeline.FAILURE
-        
-        return EmbeddingPipeline.SUCCESS
-
-    def _process_ship_html(self, html_content: str):
-        processor = ShipHTMLProcessor(html_content)
-        raw_chunks = processor.extract_chunks()
-        optimized_chunks = ChunkStrategy.split_chunks(raw_chunks)
-        self.vdb.add(optimized_chunks, SHIPS_COLLECTION_NAME)
+            if self._specs_changed:
+                self._spec_store.save()
+                self._specs_changed = False
+        except OSError as e:
+            print(f"[WARNING]: Failed to save the ship spec store: {e}")
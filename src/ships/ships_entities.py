@@ -0,0 +1,92 @@
+from typing import Dict, Iterable
+
+from ..entity_matcher import EntityMatcher, normalize_tokens
+
+MANUFACTURER_PREFIXES = ["alliance", "federal", "imperial"]
+
+# Community nicknames that cannot be derived from the ship names.
+SHIP_ALIASES = {
+    "conda": "Anaconda",
+    "fdl": "Fer-de-Lance",
+    "vette": "Federal Corvette",
+    "fas": "Federal Assault Ship",
+    "fds": "Federal Dropship",
+    "fgs": "Federal Gunship",
+    "chief": "Alliance Chieftain",
+    "dbx": "Diamondback Explorer",
+    "dbs": "Diamondback Scout",
+    "aspx": "Asp Explorer",
+    "asp x": "Asp Explorer",
+    "imp eagle": "Imperial Eagle",
+    "ieagle": "Imperial Eagle",
+    "imp clipper": "Imperial Clipper",
+    "imp courier": "Imperial Courier",
+    "imp cutter": "Imperial Cutter",
+    "beluga": "Beluga Liner",
+    "phantom": "Krait Phantom",
+    "condor": "F63 Condor",
+    "trident": "XG7 Trident",
+    "javelin": "XG8 Javelin",
+    "lance": "XG9 Lance",
+    "panther": "Panther Clipper Mk II",
+    "panther clipper": "Panther Clipper Mk II",
+    "pcm": "Panther Clipper Mk II",
+    "sidey": "Sidewinder Mk I",
+    "sidewinder": "Sidewinder Mk I",
+    "keelie": "Keelback",
+    "t6": "Type-6 Transporter",
+    "t7": "Type-7 Transporter",
+    "t8": "Type-8 Transporter",
+    "t9": "Type-9 Heavy",
+    "t10": "Type-10 Defender",
+}
+
+# Aliases that are also ordinary words, see EntityMatcher.
+ANCHORED_ALIASES = [
+    "chief", "lance", "courier", "phantom", "condor", "trident", "javelin", "panther", "beluga", "sidewinder",
+    "cutter", "gunship"
+]
+ANCHOR_WORDS = ["ship", "ships"]
+
+# Ordinary words one or two edits away from the first token of a ship name.
+COMMON_WORDS = {
+    "added", "ladder", "odder", "udder", "madder", "sadder",
+    "allowance", "appliance", "reliance", "dalliance",
+    "challenge", "challenges", "challenged",
+    "clipped", "clapper", "flipper", "slipper",
+    "condo",
+    "crusade",
+    "beagle",
+    "hauled", "haulers",
+    "feedback",
+    "trait",
+    "samba", "mambo",
+    "manually", "mandala",
+    "sides", "sided",
+    "taiwan",
+    "vetted",
+    "piper", "wiper",
+    "culture", "cultures", "cultured"
+}
+
+def ship_aliases(names: Iterable[str]) -> Dict[str, str]:
+    aliases = {}
+    for name in names:
+        tokens = normalize_tokens(name)
+
+        # "Federal Corvette" -> "Corvette"
+        if len(tokens) > 1 and tokens[0] in MANUFACTURER_PREFIXES:
+            aliases[" ".join(tokens[1:])] = name
+        # "Type-9 Heavy" -> "Type 9"
+        if len(tokens) > 2 and tokens[0] == "type" and tokens[1].isdigit():
+            aliases[" ".join(tokens[:2])] = name
+        # "Krait Mk II" -> "Krait 2"
+        if "mk" in tokens:
+            aliases[" ".join(token for token in tokens if token != "mk")] = name
+
+    aliases.update(SHIP_ALIASES)
+    return aliases
+
+def build_ship_matcher(names: Iterable[str]) -> EntityMatcher:
+    names = list(names)
+    return EntityMatcher(names, ship_aliases(names), anchored_aliases=ANCHORED_ALIASES, anchor_words=ANCHOR_WORDS, common_words=COMMON_WORDS)
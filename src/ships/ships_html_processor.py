@@ -1,9 +1,13 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from bs4 import Tag
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
 
-from ..html_processor import BaseHTMLProcessor, ContentChunk
+from ..chunking import UNDEFINED_INFOBOX_VALUE
+from ..html_processor import BaseHTMLProcessor, ContentChunk, PARSER_HTML, parse_html_file
+from ..telemetry import span
 
-NotDefined = "N/A"
+NotDefined = UNDEFINED_INFOBOX_VALUE
+UNKNOWN_SHIP = "Unknown Ship"
 
 @dataclass
 class ExtractedShipInfoBoxOverview:
@@ -53,94 +57,127 @@ class ExtractedShipInfoBox:
     outfitting: Optional[ExtractedShipInfoBoxOutfitting] = None
     hardpoints: Optional[ExtractedShipInfoBoxHardpoints] = None
 
-def has_aside_section(soup, name: str) -> bool:
-    return bool(soup.select_one(f"aside section h2:-soup-contains('{name}')"))
-
-def get_aside_value(soup, data_source: str) -> str:
-    div = soup.select_one(f"aside div[data-source='{data_source}'] div.pi-data-value.pi-font")
-    if div:
-        text = div.get_text()
-        return text if text else NotDefined
-    return NotDefined
-
-def get_value_for_label(soup, label):
-    # Find h3 label in aside, then get next sibling div with class pi-data-value
-    for h3 in soup.select("aside h3.pi-data-label"):
-        if label in h3.get_text():
-            value_divs = []
-            sib = h3.find_next_sibling()
-            while sib and 'pi-data-value' in sib.get('class', []):
-                value_divs.append(sib.get_text())
-                sib = sib.find_next_sibling()
-            if not value_divs:
-                return NotDefined
-            text = "\n".join([v.replace("×", "x") for v in value_divs if v])
-            return text
-    return NotDefined
-
-def extract_infobox_overview(soup) -> ExtractedShipInfoBoxOverview:
+class ShipInfoBoxIndex:
+    # Single pass over the <aside> elements that answers the same lookups as
+    # the original per-field CSS queries (kept in benchmarks/bench_infobox.py)
+    # without running a query over the whole document for every field.
+    def __init__(self, soup):
+        self.aside_values: Dict[str, str] = {}
+        self.labels: List[Tuple[str, str]] = []
+        self.section_titles: List[str] = []
+
+        for aside in soup.find_all("aside"):
+            self._index(aside)
+
+    def _index(self, aside: Tag):
+        # (element, inside a <section>, data-source of the closest ancestor)
+        stack = [(aside, False, None)]
+        while stack:
+            element, in_section, data_source = stack.pop()
+            classes = element.get("class", [])
+
+            if element.name == "section":
+                in_section = True
+            elif element.name == "h2" and in_section:
+                self.section_titles.append(element.get_text())
+            elif element.name == "h3" and "pi-data-label" in classes:
+                self.labels.append((element.get_text(), self._label_value(element)))
+            elif element.name == "div" and data_source and "pi-data-value" in classes and "pi-font" in classes:
+                if data_source not in self.aside_values:
+                    self.aside_values[data_source] = element.get_text()
+
+            if element.name == "div" and element.has_attr("data-source"):
+                data_source = element["data-source"]
+
+            children = [child for child in element.children if isinstance(child, Tag)]
+            for child in reversed(children):
+                stack.append((child, in_section, data_source))
+
+    def _label_value(self, h3: Tag) -> str:
+        value_divs = []
+        sib = h3.find_next_sibling()
+        while sib and 'pi-data-value' in sib.get('class', []):
+            value_divs.append(sib.get_text())
+            sib = sib.find_next_sibling()
+        if not value_divs:
+            return NotDefined
+        return "\n".join([v.replace("×", "x") for v in value_divs if v])
+
+    def aside_value(self, data_source: str) -> str:
+        return self.aside_values.get(data_source) or NotDefined
+
+    def value_for_label(self, label: str) -> str:
+        for text, value in self.labels:
+            if label in text:
+                return value
+        return NotDefined
+
+    def has_section(self, name: str) -> bool:
+        return any(name in title for title in self.section_titles)
+
+def extract_infobox_overview(index: ShipInfoBoxIndex) -> ExtractedShipInfoBoxOverview:
     overview = ExtractedShipInfoBoxOverview()
-    overview.manufacturer = get_aside_value(soup, "manufacturer")
-    overview.years_produced = get_aside_value(soup, "yearsproduced")
-    overview.ship_type = get_aside_value(soup, "type")
-    overview.cost = get_aside_value(soup, "cost")
-    overview.insurance = get_aside_value(soup, "insurance")
-    overview.expansion = get_aside_value(soup, "expansion")
+    overview.manufacturer = index.aside_value("manufacturer")
+    overview.years_produced = index.aside_value("yearsproduced")
+    overview.ship_type = index.aside_value("type")
+    overview.cost = index.aside_value("cost")
+    overview.insurance = index.aside_value("insurance")
+    overview.expansion = index.aside_value("expansion")
     return overview
 
-def extract_infobox_specifications(soup) -> ExtractedShipInfoBoxSpecifications:
+def extract_infobox_specifications(index: ShipInfoBoxIndex) -> ExtractedShipInfoBoxSpecifications:
     specs = ExtractedShipInfoBoxSpecifications()
-    specs.landing_pad_size = get_aside_value(soup, "landingpad")
-    specs.dimensions = get_aside_value(soup, "dimensions")
-    specs.pilot_seats = get_aside_value(soup, "seats")
-    specs.multicrew = get_aside_value(soup, "multicrew")
-    specs.fighter_hangar = get_aside_value(soup, "fighterhangar")
-    specs.hull_mass = get_aside_value(soup, "hullmass")
-    specs.mass_lock_factor = get_aside_value(soup, "masslock")
-    specs.armour = get_aside_value(soup, "armour")
-    specs.armour_hardness = get_aside_value(soup, "armourhardness")
-    specs.shields = get_aside_value(soup, "shields")
-    specs.heat_capacity = get_aside_value(soup, "heatcapacity")
-    specs.fuel_capacity = get_aside_value(soup, "fuelcapacity")
-    specs.manoeuvrability = get_aside_value(soup, "manoeuvrability")
-    specs.top_speed = get_aside_value(soup, "topspeed")
-    specs.boost_speed = get_aside_value(soup, "boostspeed")
-    specs.unladen_jump_range = get_aside_value(soup, "unladen")
-    specs.cargo_capacity = get_aside_value(soup, "cargocapacity")
-    # Try to get values by label as well (may overwrite above)
-    specs.top_speed = get_value_for_label(soup, "Top Speed")
-    specs.boost_speed = get_value_for_label(soup, "Boost Speed")
-    specs.unladen_jump_range = get_value_for_label(soup, "Unladen Jump Range")
-    specs.cargo_capacity = get_value_for_label(soup, "Cargo Capacity")
+    specs.landing_pad_size = index.aside_value("landingpad")
+    specs.dimensions = index.aside_value("dimensions")
+    specs.pilot_seats = index.aside_value("seats")
+    specs.multicrew = index.aside_value("multicrew")
+    specs.fighter_hangar = index.aside_value("fighterhangar")
+    specs.hull_mass = index.aside_value("hullmass")
+    specs.mass_lock_factor = index.aside_value("masslock")
+    specs.armour = index.aside_value("armour")
+    specs.armour_hardness = index.aside_value("armourhardness")
+    specs.shields = index.aside_value("shields")
+    specs.heat_capacity = index.aside_value("heatcapacity")
+    specs.fuel_capacity = index.aside_value("fuelcapacity")
+    specs.manoeuvrability = index.aside_value("manoeuvrability")
+    # Label lookups take precedence over the data-source values for these.
+    specs.top_speed = index.value_for_label("Top Speed")
+    specs.boost_speed = index.value_for_label("Boost Speed")
+    specs.unladen_jump_range = index.value_for_label("Unladen Jump Range")
+    specs.cargo_capacity = index.value_for_label("Cargo Capacity")
     return specs
 
-def extract_infobox_outfitting(soup) -> ExtractedShipInfoBoxOutfitting:
+def extract_infobox_outfitting(index: ShipInfoBoxIndex) -> ExtractedShipInfoBoxOutfitting:
     outfitting = ExtractedShipInfoBoxOutfitting()
-    outfitting.hardpoints = get_value_for_label(soup, "Hardpoints")
-    outfitting.internal_compartments = get_value_for_label(soup, "Internal Compartments")
-    outfitting.reserved_compartments = get_value_for_label(soup, "Reserved Compartments")
+    outfitting.hardpoints = index.value_for_label("Hardpoints")
+    outfitting.internal_compartments = index.value_for_label("Internal Compartments")
+    outfitting.reserved_compartments = index.value_for_label("Reserved Compartments")
     return outfitting
 
-def extract_infobox_hardpoints(soup) -> ExtractedShipInfoBoxHardpoints:
+def extract_infobox_hardpoints(index: ShipInfoBoxIndex) -> ExtractedShipInfoBoxHardpoints:
     hardpoints = ExtractedShipInfoBoxHardpoints()
-    hardpoints.utility_mount = get_value_for_label(soup, "Utility Mount")
-    hardpoints.weapon_mounts = get_value_for_label(soup, "Weapon Mounts")
+    hardpoints.utility_mount = index.value_for_label("Utility Mount")
+    hardpoints.weapon_mounts = index.value_for_label("Weapon Mounts")
     return hardpoints
 
 def extract_infobox(soup) -> ExtractedShipInfoBox:
+    index = ShipInfoBoxIndex(soup)
     return ExtractedShipInfoBox(
-        overview=extract_infobox_overview(soup),
-        specifications=extract_infobox_specifications(soup),
-        outfitting=extract_infobox_outfitting(soup) if has_aside_section(soup, "Outfitting") else None,
-        hardpoints=extract_infobox_hardpoints(soup) if has_aside_section(soup, "Hardpoints") else None
+        overview=extract_infobox_overview(index),
+        specifications=extract_infobox_specifications(index),
+        outfitting=extract_infobox_outfitting(index) if index.has_section("Outfitting") else None,
+        hardpoints=extract_infobox_hardpoints(index) if index.has_section("Hardpoints") else None
     )
 
 class ShipHTMLProcessor(BaseHTMLProcessor):
     ENTITY_TYPE = "ship"
+    UNKNOWN_ENTITY = UNKNOWN_SHIP
+    # The article title and body, the infobox <aside> lives in the body.
+    CONTENT_IDS = ["firstHeading", "mw-content-text"]
     
     def _extract_entity_name(self) -> str:
         name_element = self.soup.select_one("#firstHeading span")
-        return name_element.get_text(strip=True) if name_element else "Unknown Ship"
+        return name_element.get_text(strip=True) if name_element else UNKNOWN_SHIP
 
     def _normalize_section(self, header: str) -> str:
         header_lower = header.lower()
@@ -150,10 +187,15 @@ class ShipHTMLProcessor(BaseHTMLProcessor):
         return 'other'
 
     def extract_chunks(self) -> List[ContentChunk]:
+        # The base method records html_extract_chunks, the infobox gets its own span.
         chunks = super().extract_chunks()
-        infobox = extract_infobox(self.soup)
+        with span("ship_extract_infobox"):
+            infobox = extract_infobox(self.soup)
         
         for chunk in chunks:
             if chunk.section_type == 'overview':
-                chunk.infobox = infobox.__dict__ if infobox else None
+                chunk.infobox = asdict(infobox) if infobox else None
         return chunks
+
+def parse_ship_file(file_path: str, parser: str = PARSER_HTML, prune: bool = False) -> List[ContentChunk]:
+    return parse_html_file(ShipHTMLProcessor, file_path, parser=parser, prune=prune)
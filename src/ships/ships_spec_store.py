@@ -0,0 +1,195 @@
+import math
+import os
+import re
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+LANDING_PADS = ["small", "medium", "large"]
+
+# Labels of the infobox values with two variants. A value without any label
+# is the default one.
+DEFAULT_LABELS = ("default",)
+UPGRADED_LABELS = ("upgraded", "max")
+
+@dataclass
+class ShipStat:
+    column: str
+    label: str
+    unit: str
+    # (infobox group, infobox field, labels of the variant or None for the
+    # whole value, which number of that text to read)
+    source: tuple
+
+# Numeric columns of the store, read from the infobox extracted by
+# ShipHTMLProcessor. Values such as "220 m/s (default) 255 m/s (upgraded)"
+# give both a default and an upgraded/max column.
+SHIP_STATS = [
+    ShipStat("cost", "cost", "CR", ("overview", "cost", None, 0)),
+    ShipStat("insurance", "insurance", "CR", ("overview", "insurance", None, 0)),
+    ShipStat("hull_mass", "hull mass", "t", ("specifications", "hull_mass", None, 0)),
+    ShipStat("mass_lock_factor", "mass lock factor", "", ("specifications", "mass_lock_factor", None, 0)),
+    ShipStat("armour", "armour", "", ("specifications", "armour", None, 0)),
+    ShipStat("armour_hardness", "armour hardness", "", ("specifications", "armour_hardness", None, 0)),
+    ShipStat("shields", "shields", "MJ", ("specifications", "shields", None, 0)),
+    ShipStat("heat_capacity", "heat capacity", "", ("specifications", "heat_capacity", None, 0)),
+    ShipStat("fuel_capacity", "fuel capacity", "t", ("specifications", "fuel_capacity", None, 0)),
+    ShipStat("manoeuvrability", "manoeuvrability", "", ("specifications", "manoeuvrability", None, 0)),
+    ShipStat("pilot_seats", "pilot seats", "", ("specifications", "pilot_seats", None, -1)),
+    ShipStat("top_speed", "top speed", "m/s", ("specifications", "top_speed", DEFAULT_LABELS, 0)),
+    ShipStat("top_speed_upgraded", "upgraded top speed", "m/s", ("specifications", "top_speed", UPGRADED_LABELS, 0)),
+    ShipStat("boost_speed", "boost speed", "m/s", ("specifications", "boost_speed", DEFAULT_LABELS, 0)),
+    ShipStat("boost_speed_upgraded", "upgraded boost speed", "m/s", ("specifications", "boost_speed", UPGRADED_LABELS, 0)),
+    ShipStat("jump_range", "unladen jump range", "ly", ("specifications", "unladen_jump_range", DEFAULT_LABELS, 0)),
+    ShipStat("jump_range_upgraded", "upgraded unladen jump range", "ly", ("specifications", "unladen_jump_range", UPGRADED_LABELS, 0)),
+    ShipStat("cargo_capacity", "cargo capacity", "t", ("specifications", "cargo_capacity", DEFAULT_LABELS, 0)),
+    ShipStat("cargo_capacity_max", "maximum cargo capacity", "t", ("specifications", "cargo_capacity", UPGRADED_LABELS, 0)),
+]
+
+STATS_BY_COLUMN = {stat.column: stat for stat in SHIP_STATS}
+
+TEXT_COLUMNS = ["name", "source", "manufacturer", "ship_type", "landing_pad_size"]
+
+def parse_numbers(value: str) -> List[float]:
+    if not value:
+        return []
+    return [float(number.replace(",", "")) for number in re.findall(r"\d[\d,]*(?:\.\d+)?", value)]
+
+def labelled_values(value: str) -> Dict[str, str]:
+    # "164 t (default) 794 t (max)" -> {"default": "164 t", "max": "794 t"},
+    # a value without labels is all default: "312 m/s" -> {"default": "312 m/s"}.
+    parts = re.findall(r"([^()]*)\(\s*([a-z]+)\s*\)", value, flags=re.IGNORECASE)
+    if not parts:
+        return {DEFAULT_LABELS[0]: value}
+    return {label.lower(): text.strip() for text, label in parts}
+
+def parse_stat(value: Optional[str], labels: Optional[tuple], index: int) -> float:
+    if labels is not None:
+        values = labelled_values(value or "")
+        value = next((values[label] for label in labels if label in values), None)
+    numbers = parse_numbers(value or "")
+    if not numbers or index >= len(numbers) or index < -len(numbers):
+        return math.nan
+    return numbers[index]
+
+def spec_row(name: str, source: str, infobox: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    infobox = infobox or {}
+    overview = infobox.get("overview") or {}
+    specifications = infobox.get("specifications") or {}
+
+    row = {
+        "name": name,
+        "source": source,
+        "manufacturer": overview.get("manufacturer", ""),
+        "ship_type": overview.get("ship_type", ""),
+        "landing_pad_size": (specifications.get("landing_pad_size") or "").strip().lower()
+    }
+    for stat in SHIP_STATS:
+        group, field, labels, index = stat.source
+        row[stat.column] = parse_stat((infobox.get(group) or {}).get(field), labels, index)
+    return row
+
+class ShipSpecStore:
+    # Columnar store of the numeric ship specifications. Each column is a
+    # NumPy array indexed by ship, so filters are boolean masks and rankings
+    # a single argsort. Persisted as an .npz file, one array per column.
+    #
+    # Bump VERSION whenever spec_row reads the infobox differently, stores
+    # of another version are rebuilt from the dataset.
+    VERSION = 2
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "ShipSpecStore":
+        store = cls(path)
+        if not os.path.isfile(path):
+            return store
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING]: Ignoring unreadable ship spec store {path}: {e}")
+            return store
+
+        version = columns.pop("version", None)
+        if version is None or int(version) != cls.VERSION:
+            return store
+
+        for index, source in enumerate(columns.get("source", [])):
+            store.rows[str(source)] = {
+                name: (str(values[index]) if name in TEXT_COLUMNS else float(values[index]))
+                for name, values in columns.items()
+            }
+        return store
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # np.savez appends .npz to names without it, write to a matching tmp.
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, version=np.array(self.VERSION), **self.columns)
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, source: str) -> bool:
+        return source in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set_ship(self, source: str, name: str, infobox: Optional[Dict[str, Any]]):
+        self.rows[source] = spec_row(name, source, infobox)
+        self._columns = None
+
+    def remove(self, source: str):
+        if self.rows.pop(source, None) is not None:
+            self._columns = None
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            rows = [self.rows[source] for source in sorted(self.rows)]
+            self._columns = {
+                name: np.array([row[name] for row in rows], dtype=str) for name in TEXT_COLUMNS
+            }
+            self._columns.update({
+                stat.column: np.array([row[stat.column] for row in rows], dtype=np.float64) for stat in SHIP_STATS
+            })
+        return self._columns
+
+    @property
+    def names(self) -> np.ndarray:
+        return self.columns["name"]
+
+    def mask(self, landing_pad: Optional[str] = None, names: Optional[List[str]] = None) -> np.ndarray:
+        mask = np.ones(len(self.names), dtype=bool)
+        if landing_pad:
+            mask &= self.columns["landing_pad_size"] == landing_pad.lower()
+        if names is not None:
+            mask &= np.isin(self.names, names)
+        return mask
+
+    def rank(self, column: str, descending: bool = True, mask: Optional[np.ndarray] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        values = self.columns[column]
+        selected = ~np.isnan(values)
+        if mask is not None:
+            selected &= mask
+
+        indices = np.flatnonzero(selected)
+        order = np.argsort(-values[indices] if descending else values[indices], kind="stable")
+        return [self.row(index) for index in indices[order][:limit]]
+
+    def lookup(self, names: List[str]) -> List[Dict[str, Any]]:
+        by_name = {name: index for index, name in enumerate(self.names)}
+        return [self.row(by_name[name]) for name in names if name in by_name]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        return self.rows[str(self.columns["source"][index])]
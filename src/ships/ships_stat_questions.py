@@ -0,0 +1,221 @@
+import math
+import re
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ships_spec_store import LANDING_PADS, STATS_BY_COLUMN, ShipSpecStore
+
+from ..entity_matcher import EntityMatcher
+
+# Query phrases mapped to the store column they ask about, as regular
+# expressions over the lowercased words. Multi-word phrases are checked
+# before single words. Words that also describe weapons or services ("range",
+# "cost") only count inside a phrase.
+STAT_KEYWORDS = [
+    ("mass lock", "mass_lock_factor"),
+    ("armour hardness", "armour_hardness"),
+    ("armor hardness", "armour_hardness"),
+    ("hull mass", "hull_mass"),
+    ("cargo capacity", "cargo_capacity"),
+    ("cargo hold", "cargo_capacity"),
+    ("top speed", "top_speed"),
+    ("boost speed", "boost_speed"),
+    ("heat capacity", "heat_capacity"),
+    ("fuel capacity", "fuel_capacity"),
+    ("fuel tank", "fuel_capacity"),
+    ("pilot seats", "pilot_seats"),
+    ("unladen jump range", "jump_range"),
+    ("jump range", "jump_range"),
+    ("jump distance", "jump_range"),
+    (r"how far (?:\w+ ){0,6}jump", "jump_range"),
+    ("boost", "boost_speed"),
+    ("cargo", "cargo_capacity"),
+    ("speed", "top_speed"),
+    ("fastest", "top_speed"),
+    ("fast", "top_speed"),
+    ("quickest", "top_speed"),
+    ("slowest", "top_speed"),
+    (r"(?:cost|price) of", "cost"),
+    (r"how much (?:does|do|is) (?:\w+ ){0,4}cost$", "cost"),
+    ("expensive", "cost"),
+    ("cheapest", "cost"),
+    ("hardness", "armour_hardness"),
+    ("armour", "armour"),
+    ("armor", "armour"),
+    ("shields", "shields"),
+    ("shield", "shields"),
+    ("heaviest", "hull_mass"),
+    ("lightest", "hull_mass"),
+    ("mass", "hull_mass"),
+    ("manoeuvrability", "manoeuvrability"),
+    ("maneuverability", "manoeuvrability"),
+    ("agile", "manoeuvrability"),
+    ("nimble", "manoeuvrability"),
+    ("heat", "heat_capacity"),
+    ("fuel", "fuel_capacity"),
+    ("seats", "pilot_seats"),
+    ("crew", "pilot_seats"),
+]
+
+# Columns that have an upgraded/max or a default variant.
+UPGRADED_COLUMNS = {
+    "top_speed": "top_speed_upgraded",
+    "boost_speed": "boost_speed_upgraded",
+    "jump_range": "jump_range_upgraded",
+    "cargo_capacity": "cargo_capacity_max"
+}
+
+DESCENDING_WORDS = {"fastest", "quickest", "largest", "biggest", "most", "highest", "longest", "best", "greatest", "heaviest", "maximum", "max", "strongest", "toughest"}
+ASCENDING_WORDS = {"slowest", "smallest", "least", "lowest", "shortest", "cheapest", "lightest", "worst", "minimum", "min", "fewest", "weakest"}
+UPGRADED_WORDS = {"upgraded", "engineered", "max", "maximum", "maxed"}
+DEFAULT_WORDS = {"default", "stock", "base"}
+
+# Questions asking for judgement rather than a number go to the LLM.
+OPEN_ENDED_WORDS = {"why", "should", "recommend", "build", "outfit", "outfitting", "loadout", "role", "better", "worth", "explain", "history", "lore"}
+# So do questions about something other than the ship itself: its weapons
+# and modules, insuring it, engineers.
+OTHER_SUBJECT_WORDS = {
+    "weapon", "weapons", "laser", "lasers", "beam", "pulse", "burst", "multicannon", "multicannons", "cannon", "cannons",
+    "railgun", "railguns", "missile", "missiles", "torpedo", "torpedoes", "plasma", "fragment", "mine", "mines",
+    "turret", "turreted", "gimballed", "module", "modules", "booster", "boosters", "generator", "thruster", "thrusters",
+    "fsd", "scanner", "limpet", "limpets", "fighter", "fighters", "srv",
+    "insure", "insured", "insurance", "rebuy", "engineer", "engineers", "engineering"
+}
+
+COMPARISON_WORDS = {"compare", "comparison", "vs", "versus", "between", "and", "or"}
+# Words a direct answer may ignore. Any other word left once the stats, the
+# ships and the landing pad are read means the question asks for more than
+# a number, it goes to the LLM.
+FILLER_WORDS = {
+    "what", "whats", "which", "who", "is", "are", "s", "the", "a", "an", "of", "ship", "ships", "has", "have", "does",
+    "do", "how", "much", "far", "can", "could", "it", "its", "with", "in", "for", "to", "me", "tell", "show", "list",
+    "their", "there", "one", "ones"
+}
+KNOWN_WORDS = FILLER_WORDS | COMPARISON_WORDS | DESCENDING_WORDS | ASCENDING_WORDS | UPGRADED_WORDS | DEFAULT_WORDS
+
+COMPARISON_COLUMNS = ["top_speed", "boost_speed", "jump_range", "cargo_capacity_max", "shields", "armour", "hull_mass", "cost"]
+
+MAX_DIRECT_QUESTION_WORDS = 16
+RANKING_SIZE = 5
+
+class ShipStatQuestionAnswerer:
+    # Answers numeric spec questions ("fastest ship with a medium pad",
+    # "compare Python and Krait Mk II cargo", "jump range of the Anaconda")
+    # straight from the ShipSpecStore. answer() returns None for anything
+    # else, including questions with words it cannot read, so the caller
+    # falls back to retrieval and the LLM. `matcher` finds the ship names in
+    # the query.
+    def __init__(self, store: ShipSpecStore, matcher: EntityMatcher):
+        self.store = store
+        self.matcher = matcher
+
+    def answer(self, query: str, ships: List[str]) -> Optional[str]:
+        if not len(self.store):
+            return None
+
+        text = " ".join(self.matcher.unmatched_tokens(query))
+        words = set(text.split())
+        if words & (OTHER_SUBJECT_WORDS | OPEN_ENDED_WORDS) or len(words) > MAX_DIRECT_QUESTION_WORDS:
+            return None
+
+        columns, rest = self._stat_columns(text, words)
+        landing_pad, rest = self._landing_pad(rest)
+        if set(rest.split()) - KNOWN_WORDS:
+            return None
+
+        if words & DESCENDING_WORDS or words & ASCENDING_WORDS:
+            if columns and not ships:
+                return self._ranking(columns[0], self._descending(words, columns[0]), landing_pad)
+
+        if len(ships) > 1 and (columns or words & COMPARISON_WORDS):
+            return self._comparison(ships, columns or COMPARISON_COLUMNS)
+
+        if len(ships) == 1 and columns:
+            return self._single(ships[0], columns)
+
+        return None
+
+    def _stat_columns(self, text: str, words: set) -> Tuple[List[str], str]:
+        # The columns asked about, and the text left once their phrases are
+        # removed.
+        columns = []
+        for keyword, column in STAT_KEYWORDS:
+            pattern = rf"\b{keyword}\b"
+            if not re.search(pattern, text):
+                continue
+            # Drop the phrase so "hull mass" is not also read as "mass".
+            text = re.sub(pattern, " ", text)
+            if words & UPGRADED_WORDS and column in UPGRADED_COLUMNS:
+                column = UPGRADED_COLUMNS[column]
+            if column not in columns:
+                columns.append(column)
+        return columns, text
+
+    def _descending(self, words: set, column: str) -> bool:
+        if column == "cost" and "expensive" in words:
+            return "least" not in words
+        if words & {"slowest", "cheapest", "lightest"}:
+            return False
+        return not (words & ASCENDING_WORDS)
+
+    def _landing_pad(self, text: str) -> Tuple[Optional[str], str]:
+        # "large pad", "medium landing pad", "pad size small", "small ship",
+        # and the text left without it.
+        patterns = [r"\b(small|medium|large) (?:landing )?pads?\b", r"\b(?:landing )?pad (?:size )?(small|medium|large)\b", r"\b(small|medium|large) ships?\b"]
+        for pattern in patterns:
+            match = re.search(pattern, text)
+            if match and match.group(1) in LANDING_PADS:
+                return match.group(1), text[:match.start()] + " " + text[match.end():]
+        return None, text
+
+    def _ranking(self, column: str, descending: bool, landing_pad: Optional[str]) -> Optional[str]:
+        rows = self.store.rank(column, descending, self.store.mask(landing_pad=landing_pad), RANKING_SIZE)
+        if not rows:
+            return None
+
+        stat = STATS_BY_COLUMN[column]
+        scope = f" with a {landing_pad} landing pad" if landing_pad else ""
+        order = "highest" if descending else "lowest"
+        lines = [
+            f"The ship{scope} with the {order} {stat.label} is the **{rows[0]['name']}** ({format_stat(rows[0], column)}).",
+            "",
+            f"| # | Ship | {stat.label.capitalize()} |",
+            "|---|---|---|"
+        ]
+        lines.extend(f"| {rank} | {row['name']} | {format_stat(row, column)} |" for rank, row in enumerate(rows, 1))
+        return "\n".join(lines)
+
+    def _comparison(self, ships: List[str], columns: List[str]) -> Optional[str]:
+        rows = self.store.lookup(ships)
+        if len(rows) < 2:
+            return None
+
+        lines = [
+            "| Ship | " + " | ".join(STATS_BY_COLUMN[column].label.capitalize() for column in columns) + " |",
+            "|---|" + "---|" * len(columns)
+        ]
+        lines.extend(
+            f"| {row['name']} | " + " | ".join(format_stat(row, column) for column in columns) + " |"
+            for row in rows
+        )
+        return "\n".join(lines)
+
+    def _single(self, ship: str, columns: List[str]) -> Optional[str]:
+        rows = self.store.lookup([ship])
+        if not rows or all(math.isnan(rows[0][column]) for column in columns):
+            return None
+
+        row = rows[0]
+        return "\n".join(
+            f"- The {row['name']}'s {STATS_BY_COLUMN[column].label} is {format_stat(row, column)}."
+            for column in columns
+        )
+
+def format_stat(row: Dict[str, Any], column: str) -> str:
+    value = row[column]
+    if math.isnan(value):
+        return "N/A"
+
+    stat = STATS_BY_COLUMN[column]
+    number = f"{value:,.0f}" if value.is_integer() else f"{value:,.2f}"
+    return f"{number} {stat.unit}".strip()
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import math
+import os
+import resource
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Prefix of every exported metric name.
+NAMESPACE = "astro_mind"
+
+class MetricsRegistry:
+    # In-process counters and latency histograms, exported as Prometheus text
+    # or as a JSON friendly dict. Histograms use fixed buckets (in seconds)
+    # so recording is a bisect and two additions, safe from any thread.
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _label_key(labels)
+        index = next((index for index, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per bucket counts (the last one is +Inf), count, sum and max.
+            histogram = series.setdefault(key, [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0])
+            histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+            histogram[3] = max(histogram[3], seconds)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": count,
+                        "total_ms": total * 1000,
+                        "avg_ms": total * 1000 / count if count else 0.0,
+                        "p50_ms": self._quantile(buckets, count, 0.5) * 1000,
+                        "p95_ms": self._quantile(buckets, count, 0.95) * 1000,
+                        "max_ms": maximum * 1000
+                    }
+                    for key, (buckets, count, total, maximum) in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms, "process": process_stats()}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{NAMESPACE}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{NAMESPACE}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, (buckets, count, total, _) in series.items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + (math.inf,), buckets):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{metric}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {count}")
+
+        process = process_stats()
+        for name, kind, value in [
+            ("process_cpu_seconds_total", "counter", process["cpu_seconds"]),
+            ("process_max_resident_memory_bytes", "gauge", process["max_rss_mb"] * 2 ** 20),
+            ("process_threads", "gauge", process["threads"])
+        ]:
+            lines.append(f"# TYPE {NAMESPACE}_{name} {kind}")
+            lines.append(f"{NAMESPACE}_{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _quantile(self, buckets: List[int], count: int, quantile: float) -> float:
+        # Upper bound of the bucket holding the quantile, like
+        # histogram_quantile without the interpolation.
+        if not count:
+            return 0.0
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, buckets):
+            cumulative += bucket_count
+            if cumulative >= quantile * count:
+                return bound
+        return self.buckets[-1]
+
+class Trace:
+    # The spans recorded during one chat turn, in the order they finished.
+    # Spans from worker threads started with asyncio.to_thread land here too,
+    # the context variable holding the trace is copied into them.
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, started: Optional[float] = None):
+        started = time.perf_counter() - seconds if started is None else started
+        with self._lock:
+            self.spans.append({"name": name, "start_ms": (started - self.start) * 1000, "duration_ms": seconds * 1000})
+
+    def summary(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span["start_ms"])
+
+METRICS = MetricsRegistry()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("astro_mind_trace", default=None)
+# Names of the spans open in this context, a span nested in one of the same
+# name (an override calling super()) is not counted twice.
+_open_spans: ContextVar[Tuple[str, ...]] = ContextVar("astro_mind_open_spans", default=())
+
+@contextmanager
+def trace(existing: Optional[Trace] = None) -> Iterator[Trace]:
+    # Collects the spans of the enclosed code, continuing `existing` if given.
+    current = existing or Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+def record(name: str, seconds: float, started: Optional[float] = None, turn: Optional[Trace] = None, **labels):
+    # Adds a measured duration to the `{name}_seconds` histogram and to the
+    # current (or given) trace.
+    METRICS.observe(f"{name}_seconds", seconds, **labels)
+    turn = turn or _current_trace.get()
+    if turn is not None:
+        turn.add(name, seconds, started)
+
+@contextmanager
+def span(name: str, **labels):
+    if name in _open_spans.get():
+        yield
+        return
+
+    token = _open_spans.set(_open_spans.get() + (name,))
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        METRICS.inc(f"{name}_errors_total", **labels)
+        raise
+    finally:
+        _open_spans.reset(token)
+        record(name, time.perf_counter() - start, start, **labels)
+
+def traced(name: str, **labels):
+    # Decorator form of span() for plain and async functions.
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def process_stats() -> Dict[str, Any]:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        "max_rss_mb": usage.ru_maxrss / (2 ** 20 if os.uname().sysname == "Darwin" else 2 ** 10),
+        "threads": threading.active_count()
+    }
+
+def _label_key(labels: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: Tuple) -> str:
+    if not key:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,18 @@
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Part of anything derived from token counts (e.g. chunk boundaries) that
+# has to be rebuilt when the counting changes.
+TOKENIZER = "cl100k_base" if tiktoken else "chars4"
+
+_ENCODING = tiktoken.get_encoding(TOKENIZER) if tiktoken else None
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Without tiktoken, English text averages about 4 characters per token.
+    return max(1, round(len(text) / 4))
@@ -1,18 +1,51 @@
+import asyncio
+
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from .chunking import ContentChunk
 from .embedder import Embedder
+from .embedding_cache import QueryEmbeddingCache
+from .telemetry import traced
+
+@dataclass
+class SearchResult:
+    id: str
+    score: float
+    payload: Dict[str, Any]
 
 class VectorDB(ABC):
-    def __init__(self, embedder: Embedder):
+    # Payload fields search_results can filter on. A filter maps a field to a
+    # value or a list of accepted values, e.g. {"entity_name": ["Anaconda"]}.
+    FILTERABLE_FIELDS = ["entity_type", "entity_name", "section_type"]
+    # Bumped when the stored payload changes so existing indexes get rebuilt.
+    PAYLOAD_VERSION = 2
+
+    def __init__(self, embedder: Embedder, query_cache: Optional[QueryEmbeddingCache] = None):
         self.embedder = embedder
+        self.query_cache = query_cache
+
+    @traced("query_embed")
+    def embed_query(self, query: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embedder.embed_text(query)
+
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.embedder.embed_text(query)
+            self.query_cache.put(query, vector)
+        return vector
 
     @abstractmethod
     def init_collection(collection_name: str):
         pass
 
+    @abstractmethod
+    def has_collection(self, collection_name: str) -> bool:
+        pass
+
     @abstractmethod
     def close():
         pass
@@ -22,9 +55,66 @@ class VectorDB(ABC):
         pass
 
     @abstractmethod
-    def search(query: str, collection_name: str):
+    def delete(self, ids: List[str], collection_name: str):
+        pass
+
+    @abstractmethod
+    def search_results(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        pass
+
+    @abstractmethod
+    def retrieve(self, ids: List[str], collection_name: str) -> List[SearchResult]:
+        pass
+
+    def flush(self, collection_name: str):
+        # Stores that buffer writes persist them here, the pipelines call it
+        # once their run is over.
         pass
 
+    def missing(self, ids: List[str], collection_name: str) -> List[str]:
+        # The ids the store does not hold. Stores that write every add
+        # through cannot fall behind the index manifest.
+        return []
+
+    @staticmethod
+    def chunk_payload(chunk: ContentChunk) -> Dict[str, Any]:
+        return {
+            "entity_type": chunk.entity_type,
+            "entity_name": chunk.entity_name,
+            "section_type": chunk.section_type,
+            "headers": chunk.headers,
+            "infobox": chunk.infobox,
+            "infobox_text": chunk.infobox_text(),
+            "text": chunk.raw_text,
+            "html_snippet": chunk.source
+        }
+
+    def search(self, query: str, collection_name: str, filters: Optional[Dict[str, Any]] = None):
+        return [result.payload["html_snippet"] for result in self.search_results(query, collection_name, filters=filters)]
+
+    async def search_results_async(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        # Embedding and the local Qdrant client are blocking, they run in a
+        # worker thread so several searches can overlap.
+        return await asyncio.to_thread(self.search_results, query, collection_name, limit, query_vector, filters)
+
+    async def search_async(self, query: str, collection_name: str, filters: Optional[Dict[str, Any]] = None):
+        return [result.payload["html_snippet"] for result in await self.search_results_async(query, collection_name, filters=filters)]
+
+    async def embed_query_async(self, query: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, query)
+
+    @classmethod
+    def normalize_filters(cls, filters: Optional[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        normalized = {}
+        for field, values in (filters or {}).items():
+            if field not in cls.FILTERABLE_FIELDS:
+                raise ValueError(f"Cannot filter on '{field}', expected one of {cls.FILTERABLE_FIELDS}")
+
+            if values is None:
+                continue
+            normalized[field] = list(values) if isinstance(values, (list, tuple, set)) else [values]
+        return normalized
+
     # def load(self, force=False):
     #     self.load_ships_data(force)
 
@@ -0,0 +1,417 @@
+import glob
+import json
+import os
+import threading
+import uuid
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .chunking import ContentChunk
+from .embedder import Embedder
+from .embedding_cache import QueryEmbeddingCache
+from .telemetry import span, traced
+from .vdb import SearchResult, VectorDB
+
+VECTOR_FLOAT32 = "float32"
+VECTOR_FLOAT16 = "float16"
+VECTOR_INT8 = "int8"
+VECTOR_DTYPES = [VECTOR_FLOAT32, VECTOR_FLOAT16, VECTOR_INT8]
+
+class _Collection:
+    # The arrays of one collection, row i of every array is the same point.
+    #
+    # vectors: L2 normalized, stored as float32, float16 or int8. int8 rows
+    #     are scaled to use the full [-127, 127] range, scales holds the
+    #     factor back to float.
+    # payloads, offsets: the JSON payloads concatenated, row i is
+    #     payloads[offsets[i]:offsets[i + 1]]. Only the hits get decoded.
+    # codes, values: per filterable field, the index of each row's value in
+    #     the sorted list of distinct values.
+    def __init__(self, dtype: str, dimension: int):
+        self.dtype = dtype
+        self.dimension = dimension
+        self.ids = np.array([], dtype=str)
+        self.vectors = np.zeros((0, dimension), dtype=dtype)
+        self.scales = np.zeros(0, dtype=np.float32)
+        self.payloads = np.zeros(0, dtype=np.uint8)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.codes = {field: np.zeros(0, dtype=np.int32) for field in VectorDB.FILTERABLE_FIELDS}
+        self.values = {field: [] for field in VectorDB.FILTERABLE_FIELDS}
+        self._rows = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self) -> Dict[str, int]:
+        # Built on first use, searches alone never need it.
+        if self._rows is None:
+            self._rows = {str(point_id): row for row, point_id in enumerate(self.ids)}
+        return self._rows
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.payloads[self.offsets[row]:self.offsets[row + 1]].tobytes())
+
+    def quantize(self, vectors: np.ndarray):
+        if self.dtype != VECTOR_INT8:
+            return vectors.astype(self.dtype), np.ones(len(vectors), dtype=np.float32)
+
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def append(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]) -> "_Collection":
+        vectors, scales = self.quantize(vectors)
+        encoded = [json.dumps(payload, ensure_ascii=False).encode("utf-8") for payload in payloads]
+        lengths = np.array([len(payload) for payload in encoded], dtype=np.int64)
+
+        collection = _Collection(self.dtype, self.dimension)
+        collection.ids = np.concatenate([self.ids, np.array(ids, dtype=str)])
+        collection.vectors = np.concatenate([self.vectors, vectors])
+        collection.scales = np.concatenate([self.scales, scales])
+        collection.payloads = np.concatenate([self.payloads, np.frombuffer(b"".join(encoded), dtype=np.uint8)])
+        collection.offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(lengths)])
+        for field in VectorDB.FILTERABLE_FIELDS:
+            row_values = [str(payload.get(field)) for payload in payloads]
+            collection.values[field] = sorted(set(self.values[field]) | set(row_values))
+            positions = {value: code for code, value in enumerate(collection.values[field])}
+            # Codes are re-mapped as new values can shift the sorted positions.
+            remap = np.array([positions[value] for value in self.values[field]], dtype=np.int32)
+            codes = np.array([positions[value] for value in row_values], dtype=np.int32)
+            collection.codes[field] = np.concatenate([remap[self.codes[field]] if len(remap) else self.codes[field], codes])
+        return collection
+
+    def remove(self, ids: List[str]) -> "_Collection":
+        rows = self.rows()
+        keep = np.ones(len(self), dtype=bool)
+        keep[[rows[point_id] for point_id in ids if point_id in rows]] = False
+
+        starts, ends = self.offsets[:-1][keep], self.offsets[1:][keep]
+        lengths = ends - starts
+
+        collection = _Collection(self.dtype, self.dimension)
+        collection.ids = self.ids[keep]
+        collection.vectors = self.vectors[keep]
+        collection.scales = self.scales[keep]
+        collection.payloads = np.concatenate([self.payloads[start:end] for start, end in zip(starts, ends)]) if len(starts) else np.zeros(0, dtype=np.uint8)
+        collection.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        collection.codes = {field: codes[keep] for field, codes in self.codes.items()}
+        collection.values = dict(self.values)
+        return collection
+
+    def mask(self, filters: Dict[str, List[Any]]) -> Optional[np.ndarray]:
+        mask = None
+        for field, accepted in filters.items():
+            accepted = set(map(str, accepted))
+            accepted_codes = [code for code, value in enumerate(self.values[field]) if value in accepted]
+            field_mask = np.isin(self.codes[field], accepted_codes)
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray], block_rows: int) -> np.ndarray:
+        # float32 vectors are multiplied in place on the memory map. Other
+        # dtypes are converted to float32 by blocks, which bounds the extra
+        # memory of one search to block_rows rows.
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+
+        if vectors.dtype == np.float32:
+            return vectors @ query
+
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), block_rows):
+            scores[start:start + block_rows] = vectors[start:start + block_rows].astype(np.float32) @ query
+        if self.dtype == VECTOR_INT8:
+            scores *= scales
+        return scores
+
+    def save(self, directory: str, generation: int):
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, str(generation))
+
+        np.save(f"{prefix}.ids.npy", self.ids)
+        np.save(f"{prefix}.vectors.npy", self.vectors)
+        np.save(f"{prefix}.scales.npy", self.scales)
+        np.save(f"{prefix}.payloads.npy", self.payloads)
+        np.save(f"{prefix}.offsets.npy", self.offsets)
+        np.savez(
+            f"{prefix}.fields.npz",
+            **{f"codes_{field}": codes for field, codes in self.codes.items()},
+            **{f"values_{field}": np.array(values, dtype=str) for field, values in self.values.items()}
+        )
+
+    @classmethod
+    def load(cls, directory: str, generation: int, dtype: str, dimension: int) -> "_Collection":
+        # The arrays are read only memory maps, every process opening the
+        # collection shares the same page cache pages.
+        prefix = os.path.join(directory, str(generation))
+
+        collection = cls(dtype, dimension)
+        collection.ids = np.load(f"{prefix}.ids.npy", mmap_mode="r")
+        collection.vectors = np.load(f"{prefix}.vectors.npy", mmap_mode="r")
+        collection.scales = np.load(f"{prefix}.scales.npy", mmap_mode="r")
+        collection.payloads = np.load(f"{prefix}.payloads.npy", mmap_mode="r")
+        collection.offsets = np.load(f"{prefix}.offsets.npy", mmap_mode="r")
+        with np.load(f"{prefix}.fields.npz", allow_pickle=False) as fields:
+            for field in VectorDB.FILTERABLE_FIELDS:
+                collection.codes[field] = fields[f"codes_{field}"]
+                collection.values[field] = [str(value) for value in fields[f"values_{field}"]]
+        return collection
+
+class _PendingWrites:
+    # The adds and removes of one collection since its last save. Re-adding
+    # an id replaces the buffered point, deleting it drops it.
+    def __init__(self):
+        self.added: Dict[str, Tuple[np.ndarray, Dict[str, Any]]] = {}
+        self.removed: Set[str] = set()
+
+    def apply(self, collection: _Collection) -> _Collection:
+        # One remove and one append for the whole run, however many files
+        # were synced: every array is copied once.
+        rows = collection.rows()
+        removed = [point_id for point_id in rows if point_id in self.removed or point_id in self.added]
+        if removed:
+            collection = collection.remove(removed)
+        if self.added:
+            ids = list(self.added)
+            collection = collection.append(
+                ids,
+                np.stack([self.added[point_id][0] for point_id in ids]),
+                [self.added[point_id][1] for point_id in ids]
+            )
+        return collection
+
+class NumpyVectorDB(VectorDB):
+    # Exact search over memory-mapped NumPy arrays, one directory per
+    # collection under db_path. A search is one matrix-vector product and an
+    # argpartition, filters are masks over integer codes of the payload
+    # fields. Nothing is copied into the process besides the id list and the
+    # filter codes, so many API workers can serve the same files.
+    #
+    # Every save writes a new generation of files and then points meta.json
+    # at it. Open collections notice the new generation on their next search,
+    # files of older generations stay readable until the last map is closed.
+    #
+    # add() and delete() are buffered in memory and applied at once by
+    # flush() (the pipeline calls it once per run), searches see the points
+    # of the last flush. missing() counts buffered writes, adds lost to a
+    # crash are embedded again on the next run. init_collection() is
+    # written right away.
+    #
+    # float16 halves the memory of float32 but NumPy converts it slowly,
+    # searches are several times slower. int8 quarters it and stays close to
+    # float32 speed, at a small recall cost.
+    EMBED_BATCH_SIZE = 32
+    # Rows converted to float32 at once when searching float16 or int8.
+    BLOCK_ROWS = 1024
+    META_FILE = "meta.json"
+
+    def __init__(self, embedder: Embedder, db_path: str, dtype: str = VECTOR_FLOAT32, embed_batch_size: int = EMBED_BATCH_SIZE, query_cache: Optional[QueryEmbeddingCache] = None, read_only: bool = False):
+        super().__init__(embedder, query_cache)
+
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype '{dtype}', expected one of {VECTOR_DTYPES}")
+
+        self.db_path = db_path
+        self.dtype = dtype
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.read_only = read_only
+        self._collections: Dict[str, _Collection] = {}
+        self._meta_mtimes: Dict[str, int] = {}
+        self._pending: Dict[str, _PendingWrites] = {}
+        # Reentrant, writes hold it while looking up the collection.
+        self._lock = threading.RLock()
+
+    def close(self):
+        if not self.read_only:
+            for collection_name in list(self._pending):
+                self.flush(collection_name)
+        self._collections = {}
+        if self.query_cache:
+            self.query_cache.close()
+
+    def init_collection(self, collection_name: str):
+        self._check_writable()
+        with self._lock:
+            self._collections[collection_name] = _Collection(self.dtype, self.embedder.dimension())
+            self._pending.pop(collection_name, None)
+            self._save(collection_name)
+
+    def has_collection(self, collection_name: str) -> bool:
+        # A collection stored with another dtype counts as missing, so the
+        # pipeline rebuilds it.
+        return self._collection(collection_name) is not None
+
+    @traced("vdb_add", backend="numpy")
+    def add(self, chunks: List[ContentChunk], collection_name: str):
+        self._check_writable()
+        # Embedding texts of similar length together keeps padding small.
+        ordered = sorted(chunks, key=lambda chunk: len(chunk.raw_text))
+
+        vectors = []
+        for start in range(0, len(ordered), self.embed_batch_size):
+            batch = ordered[start:start + self.embed_batch_size]
+            with span("embed_documents"):
+                vectors.extend(self.embedder.embed_document([chunk.raw_text for chunk in batch], batch_size=self.embed_batch_size))
+
+        if not ordered:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        for chunk in ordered:
+            chunk.chunk_id = chunk.chunk_id or str(uuid.uuid4())
+
+        with self._lock:
+            self._require(collection_name)
+            pending = self._pending.setdefault(collection_name, _PendingWrites())
+            # Re-adding an id replaces the point, as a Qdrant upsert would.
+            for chunk, vector in zip(ordered, vectors):
+                pending.removed.discard(chunk.chunk_id)
+                pending.added[chunk.chunk_id] = (vector, self.chunk_payload(chunk))
+
+    def delete(self, ids: List[str], collection_name: str):
+        if not ids:
+            return
+
+        self._check_writable()
+        with self._lock:
+            rows = self._require(collection_name).rows()
+            pending = self._pending.setdefault(collection_name, _PendingWrites())
+            for point_id in ids:
+                pending.added.pop(point_id, None)
+                if point_id in rows:
+                    pending.removed.add(point_id)
+
+    def flush(self, collection_name: str):
+        if collection_name not in self._pending:
+            return
+
+        with self._lock:
+            pending = self._pending.get(collection_name)
+            if pending is None:
+                return
+            if pending.added or pending.removed:
+                self._collections[collection_name] = pending.apply(self._collections[collection_name])
+                self._save(collection_name)
+            self._pending.pop(collection_name, None)
+
+    def missing(self, ids: List[str], collection_name: str) -> List[str]:
+        collection = self._collection(collection_name)
+        if collection is None:
+            return list(ids)
+
+        rows = collection.rows()
+        pending = self._pending.get(collection_name) or _PendingWrites()
+        return [
+            point_id for point_id in ids
+            if point_id not in pending.added and (point_id not in rows or point_id in pending.removed)
+        ]
+
+    @traced("vdb_search", backend="numpy")
+    def search_results(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        normalized_filters = self.normalize_filters(filters)
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+
+        collection = self._require(collection_name)
+        query_array = np.asarray(query_vector, dtype=np.float32)
+        query_array /= max(float(np.linalg.norm(query_array)), 1e-12)
+
+        # With a filter only the matching rows are scored.
+        rows = None
+        mask = collection.mask(normalized_filters)
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+        scores = collection.scores(query_array, rows, self.BLOCK_ROWS)
+
+        candidates = np.arange(len(scores))
+        if len(scores) > limit:
+            candidates = np.argpartition(-scores, limit - 1)[:limit]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        results = []
+        for candidate in candidates:
+            row = int(candidate if rows is None else rows[candidate])
+            results.append(SearchResult(id=str(collection.ids[row]), score=float(scores[candidate]), payload=collection.payload(row)))
+        return results
+
+    def retrieve(self, ids: List[str], collection_name: str) -> List[SearchResult]:
+        if not ids:
+            return []
+
+        collection = self._require(collection_name)
+        rows = collection.rows()
+        return [SearchResult(id=point_id, score=0.0, payload=collection.payload(rows[point_id])) for point_id in ids if point_id in rows]
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"The vector DB at {self.db_path} is opened read only")
+
+    def _require(self, collection_name: str) -> _Collection:
+        collection = self._collection(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        return collection
+
+    def _collection(self, collection_name: str) -> Optional[_Collection]:
+        # Collections with unsaved writes are not reloaded under them.
+        if collection_name in self._pending:
+            return self._collections[collection_name]
+
+        meta_path = os.path.join(self.db_path, collection_name, self.META_FILE)
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        if self._meta_mtimes.get(collection_name) != mtime:
+            with self._lock:
+                if self._meta_mtimes.get(collection_name) != mtime:
+                    self._collections[collection_name] = self._load(collection_name)
+                    self._meta_mtimes[collection_name] = mtime
+        return self._collections[collection_name]
+
+    def _load(self, collection_name: str, attempts: int = 3) -> Optional[_Collection]:
+        directory = os.path.join(self.db_path, collection_name)
+        for attempt in range(attempts):
+            try:
+                with open(os.path.join(directory, self.META_FILE), "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+                if meta["dtype"] != self.dtype:
+                    return None
+                return _Collection.load(directory, meta["generation"], meta["dtype"], meta["dimension"])
+            except FileNotFoundError:
+                # A writer replaced the generation between reading meta.json
+                # and opening its files, read meta.json again.
+                if attempt + 1 < attempts:
+                    continue
+                print(f"[WARNING]: Vector collection {directory} kept changing while loading it")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARNING]: Ignoring unreadable vector collection {directory}: {e}")
+                break
+        return None
+
+    def _save(self, collection_name: str):
+        collection = self._collections[collection_name]
+        directory = os.path.join(self.db_path, collection_name)
+        meta_path = os.path.join(directory, self.META_FILE)
+
+        generation = 1
+        if os.path.isfile(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as file:
+                generation = json.load(file).get("generation", 0) + 1
+
+        collection.save(directory, generation)
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"generation": generation, "dtype": collection.dtype, "dimension": collection.dimension, "count": len(collection)}, file)
+        os.replace(tmp_path, meta_path)
+
+        # Processes that still map the previous files keep reading them,
+        # the data is only released once they are closed.
+        for path in glob.glob(os.path.join(directory, "*.*.np[yz]")):
+            if not os.path.basename(path).startswith(f"{generation}."):
+                os.remove(path)
+
+        self._meta_mtimes[collection_name] = os.stat(meta_path).st_mtime_ns
@@ -1,62 +1,153 @@
 import uuid
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    VectorParams
+)
 
 from .chunking import ContentChunk
 from .embedder import Embedder
-from .vdb import VectorDB
+from .embedding_cache import QueryEmbeddingCache
+from .telemetry import span, traced
+from .vdb import SearchResult, VectorDB
 
 class QdrantVectorDB(VectorDB):
-    def __init__(self, embedder: Embedder, db_path: str):
-        super().__init__(embedder)
+    EMBED_BATCH_SIZE = 32
+    UPSERT_BATCH_SIZE = 256
+
+    def __init__(self, embedder: Embedder, db_path: str, embed_batch_size: int = EMBED_BATCH_SIZE, upsert_batch_size: int = UPSERT_BATCH_SIZE, query_cache: Optional[QueryEmbeddingCache] = None, url: Optional[str] = None):
+        super().__init__(embedder, query_cache)
         
-        self.client = QdrantClient(path=db_path)
+        # Local mode locks db_path to one process, a server url can be shared.
+        self.client = QdrantClient(url=url) if url else QdrantClient(path=db_path)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self._indexed_collections = set()
     
     def close(self):
         # QdrantClient doesn't have an explicit close method in local mode
         # but we can set the client to None to release references
         self.client = None
+        if self.query_cache:
+            self.query_cache.close()
 
     def init_collection(self, collection_name: str):
-        self.client.recreate_collection(
+        if self.client.collection_exists(collection_name):
+            self.client.delete_collection(collection_name)
+
+        self.client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(
-                size=self.embedder.model.get_sentence_embedding_dimension(),
+                size=self.embedder.dimension(),
                 distance=Distance.COSINE
             )
         )
+        self._indexed_collections.discard(collection_name)
+        self._ensure_payload_indexes(collection_name)
+
+    def _ensure_payload_indexes(self, collection_name: str):
+        # Keyword indexes let Qdrant only score the points matching a filter.
+        # Collections created before the indexes existed get them on first use.
+        if collection_name in self._indexed_collections:
+            return
 
+        indexed_fields = self.client.get_collection(collection_name).payload_schema or {}
+        for field in self.FILTERABLE_FIELDS:
+            if field not in indexed_fields:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD
+                )
+        self._indexed_collections.add(collection_name)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.collection_exists(collection_name)
+
+    @traced("vdb_add", backend="qdrant")
     def add(self, chunks: List[ContentChunk], collection_name: str):
+        # Embedding texts of similar length together keeps padding small.
+        ordered = sorted(chunks, key=lambda chunk: len(chunk.raw_text))
+
         points = []
-        for chunk in chunks:
-            points.append(PointStruct(
-                id=str(uuid.uuid4()),
-                vector=self.embedder.embed_text(chunk.raw_text),
-                payload={
-                    "entity_type": chunk.entity_type,
-                    "entity_name": chunk.entity_name,
-                    "section_type": chunk.section_type,
-                    "headers": chunk.headers,
-                    "infobox": chunk.infobox,
-                    "html_snippet": chunk.source
-                }
-            ))
-        self.client.upsert(
+        for start in range(0, len(ordered), self.embed_batch_size):
+            batch = ordered[start:start + self.embed_batch_size]
+            with span("embed_documents"):
+                vectors = self.embedder.embed_document([chunk.raw_text for chunk in batch], batch_size=self.embed_batch_size)
+
+            for chunk, vector in zip(batch, vectors):
+                points.append(PointStruct(
+                    id=chunk.chunk_id or str(uuid.uuid4()),
+                    vector=vector,
+                    payload=self.chunk_payload(chunk)
+                ))
+
+            if len(points) >= self.upsert_batch_size:
+                self._upsert(points, collection_name)
+                points = []
+
+        if points:
+            self._upsert(points, collection_name)
+
+    def _upsert(self, points: List[PointStruct], collection_name: str):
+        for start in range(0, len(points), self.upsert_batch_size):
+            self.client.upsert(
+                collection_name=collection_name,
+                points=points[start:start + self.upsert_batch_size]
+            )
+    
+    def delete(self, ids: List[str], collection_name: str):
+        if not ids:
+            return
+
+        self.client.delete(
             collection_name=collection_name,
-            points=points
+            points_selector=PointIdsList(points=list(ids))
         )
-    
-    def search(self, query, collection_name):
-        query_vector = self.embedder.embed_text(query)
 
-        search_result = self.client.search(
+    @traced("vdb_search", backend="qdrant")
+    def search_results(self, query: str, collection_name: str, limit: int = 3, query_vector: Optional[List[float]] = None, filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+
+        query_filter = self._build_filter(filters)
+        if query_filter:
+            self._ensure_payload_indexes(collection_name)
+
+        response = self.client.query_points(
             collection_name=collection_name,
-            query_vector=query_vector,
-            limit=3,
+            query=query_vector,
+            query_filter=query_filter,
+            limit=limit,
             with_payload=True
         )
     
-        return [hit.payload["html_snippet"] for hit in search_result]
+        return [SearchResult(id=str(hit.id), score=hit.score, payload=hit.payload) for hit in response.points]
+
+    def retrieve(self, ids: List[str], collection_name: str) -> List[SearchResult]:
+        if not ids:
+            return []
+
+        points = self.client.retrieve(
+            collection_name=collection_name,
+            ids=list(ids),
+            with_payload=True
+        )
+
+        return [SearchResult(id=str(point.id), score=0.0, payload=point.payload) for point in points]
+
+    def _build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        conditions = [
+            FieldCondition(key=field, match=MatchAny(any=values))
+            for field, values in self.normalize_filters(filters).items()
+        ]
+        return Filter(must=conditions) if conditions else None
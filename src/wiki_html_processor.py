@@ -0,0 +1,36 @@
+from typing import List, Tuple
+
+from .html_processor import BaseHTMLProcessor
+
+class WikiHTMLProcessor(BaseHTMLProcessor):
+    # A page of the Elite Dangerous wiki, the source of every dataset folder.
+    # Sections are named by the first SECTIONS keyword found in their
+    # header, "other" when none matches.
+    ENTITY_TYPE = "wiki"
+    UNKNOWN_ENTITY = "Unknown Page"
+    # The article title and body.
+    CONTENT_IDS = ["firstHeading", "mw-content-text"]
+    SECTIONS: List[Tuple[str, str]] = [("overview", "overview")]
+
+    def _extract_entity_name(self) -> str:
+        name_element = self.soup.select_one("#firstHeading span")
+        return name_element.get_text(strip=True) if name_element else self.UNKNOWN_ENTITY
+
+    def _normalize_section(self, header: str) -> str:
+        header_lower = header.lower()
+        return next((section for keyword, section in self.SECTIONS if keyword in header_lower), "other")
+
+class EquipmentHTMLProcessor(WikiHTMLProcessor):
+    ENTITY_TYPE = "equipment"
+    UNKNOWN_ENTITY = "Unknown Equipment"
+    SECTIONS = [("overview", "overview"), ("specif", "specifications"), ("engineer", "engineering")]
+
+class WeaponHTMLProcessor(WikiHTMLProcessor):
+    ENTITY_TYPE = "weapon"
+    UNKNOWN_ENTITY = "Unknown Weapon"
+    SECTIONS = [("overview", "overview"), ("specif", "specifications"), ("experimental", "experimental_effects"), ("engineer", "engineering")]
+
+class EngineeringHTMLProcessor(WikiHTMLProcessor):
+    ENTITY_TYPE = "engineering"
+    UNKNOWN_ENTITY = "Unknown Engineer"
+    SECTIONS = [("overview", "overview"), ("unlock", "unlocking"), ("blueprint", "blueprints"), ("location", "location")]
@@ -0,0 +1,65 @@
+import pytest
+
+from fastapi.testclient import TestClient
+
+from src.api import create_app
+from src.api_client import AstroMindClient
+from src.embedding_pipeline import EmbeddingPipeline
+from src.rag_service import ORIGIN_LLM, PreparedAnswer
+
+TOKENS = ["The Adder ", "is a small ", "multipurpose ship."]
+
+class StreamingService:
+    # Stands in for RAGService: no models, the answer is always TOKENS.
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    def start(self):
+        return EmbeddingPipeline.SUCCESS
+
+    def warm_up(self, rerank: bool = True):
+        return None
+
+    async def aclose(self):
+        return None
+
+    async def prepare(self, query, topic=None, mode=None, rerank=True, token_budget=None):
+        return PreparedAnswer(query=query, topic=["Adder"])
+
+    def stream(self, prepared):
+        for token in TOKENS:
+            if self.fail:
+                raise RuntimeError("the LLM went away")
+            yield token
+
+    def finish(self, prepared, answer):
+        prepared.answer = answer
+        prepared.origin = ORIGIN_LLM
+
+def api_client(http_client: TestClient) -> AstroMindClient:
+    client = AstroMindClient("http://testserver")
+    client.client = http_client
+    return client
+
+def test_ask_streams_server_sent_events():
+    with TestClient(create_app(StreamingService())) as http_client:
+        response = http_client.post("/ask", params={"stream": "true"}, json={"query": "Is the Adder any good?"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.count("event: token") == len(TOKENS)
+    assert response.text.rstrip().splitlines()[-2] == "event: done"
+
+def test_client_stream_yields_tokens_then_turn():
+    with TestClient(create_app(StreamingService())) as http_client:
+        answer = api_client(http_client).stream("Is the Adder any good?")
+        assert list(answer) == TOKENS
+
+    assert answer.turn["answer"] == "".join(TOKENS)
+    assert answer.turn["origin"] == ORIGIN_LLM
+    assert answer.turn["topic"] == ["Adder"]
+
+def test_client_stream_raises_stream_errors():
+    with TestClient(create_app(StreamingService(fail=True))) as http_client:
+        answer = api_client(http_client).stream("Is the Adder any good?")
+        with pytest.raises(RuntimeError, match="the LLM went away"):
+            list(answer)
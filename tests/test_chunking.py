@@ -0,0 +1,21 @@
+from src.chunking import ContentChunk, SentenceChunkStrategy, split_sentences
+
+def chunk(section_type, text):
+    return ContentChunk("Ships", "Adder", section_type, [section_type], text, f"<p>{text}</p>")
+
+def test_split_sentences_keeps_abbreviations_and_continuations():
+    text = "The Krait Mk. II is fast. It carries e.g. Fighters. Speed is 300 m/s. then it stops!\nNew line"
+    assert split_sentences(text) == [
+        "The Krait Mk. II is fast.",
+        "It carries e.g. Fighters.",
+        "Speed is 300 m/s. then it stops!",
+        "New line"
+    ]
+
+def test_merged_chunk_keeps_the_first_section_type():
+    strategy = SentenceChunkStrategy(min_chunk_size=50)
+    merged = strategy.merge_chunks([chunk("overview", "Short intro."), chunk("outfitting", "A much longer outfitting section. " * 5)])
+
+    assert len(merged) == 1
+    assert merged[0].section_type == "overview"
+    assert merged[0].headers == ["overview", "outfitting"]
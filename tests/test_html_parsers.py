@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from bs4 import FeatureNotFound
+
+from benchmarks.bench_parsers import normalize
+from src.constants import RAW_DATA_FOLDER_NAME, SHIPS_DATA_DIR
+from src.html_processor import PARSERS, PARSER_HTML
+from src.ships.ships_html_processor import ShipHTMLProcessor
+
+DATASET_DIR = os.path.join(os.path.dirname(__file__), "..", SHIPS_DATA_DIR, RAW_DATA_FOLDER_NAME)
+# A few pages, benchmarks.bench_parsers checks the whole dataset.
+PAGES = sorted(os.listdir(DATASET_DIR))[::10] if os.path.isdir(DATASET_DIR) else []
+
+@pytest.mark.skipif(not PAGES, reason="the ship dataset is not available")
+@pytest.mark.parametrize("prune", [False, True])
+@pytest.mark.parametrize("parser", [parser for parser in PARSERS if parser != PARSER_HTML])
+def test_parser_backends_extract_the_same_chunks(parser, prune):
+    for filename in PAGES:
+        with open(os.path.join(DATASET_DIR, filename), "r", encoding="utf-8") as file:
+            html = file.read()
+
+        try:
+            chunks = ShipHTMLProcessor(html, parser=parser, prune=prune).extract_chunks()
+        except (ImportError, FeatureNotFound) as e:
+            pytest.skip(f"{parser} is not installed: {e}")
+
+        expected = ShipHTMLProcessor(html, parser=PARSER_HTML, prune=prune).extract_chunks()
+        assert normalize(chunks) == normalize(expected), filename
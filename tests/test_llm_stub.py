@@ -0,0 +1,62 @@
+import asyncio
+
+from benchmarks.llm_stub import NO_CONTEXT_ANSWER, StubLLMServer, stub_answer
+from src.llm_openai import OpenAILLM
+from src.rag_service import ANSWER_PROMPT
+
+CONTEXT = "The Adder is a small multipurpose ship. It has a large cargo hold for its size."
+
+def test_stub_answer_echoes_first_context_sentence():
+    prompt = ANSWER_PROMPT.format(context=CONTEXT, query="Is the Adder good for trading?")
+    assert stub_answer(prompt) == "The Adder is a small multipurpose ship."
+
+def test_stub_answer_without_context():
+    assert stub_answer(ANSWER_PROMPT.format(context="", query="Is the Adder good for trading?")) == NO_CONTEXT_ANSWER
+
+def test_stub_server_answers_from_context():
+    with StubLLMServer() as url:
+        llm = OpenAILLM(provider="stub", api_key="stub", model="stub", url=url)
+        llm.user_prompt = ANSWER_PROMPT
+        assert llm.ask(CONTEXT, "Is the Adder good for trading?").text == "The Adder is a small multipurpose ship."
+        assert "".join(llm.stream(CONTEXT, "Is the Adder good for trading?")) == "The Adder is a small multipurpose ship."
+
+def test_usage_belongs_to_each_call():
+    with StubLLMServer() as url:
+        llm = OpenAILLM(provider="stub", api_key="stub", model="stub", url=url)
+        llm.user_prompt = ANSWER_PROMPT
+        short = llm.stream(CONTEXT, "Adder?")
+        long = llm.stream(CONTEXT * 5, "Adder?")
+        # Interleaved like two concurrent turns on the shared instance.
+        long_tokens = iter(long)
+        next(long_tokens)
+        "".join(short)
+        "".join(long_tokens)
+        assert short.usage["prompt_tokens"] < long.usage["prompt_tokens"]
+        assert llm.ask(CONTEXT, "Adder?").usage == short.usage
+
+def test_stream_without_usage_when_stream_options_are_rejected():
+    with StubLLMServer(reject_stream_options=True) as url:
+        llm = OpenAILLM(provider="stub", api_key="stub", model="stub", url=url)
+        llm.user_prompt = ANSWER_PROMPT
+        for _ in range(2):
+            stream = llm.stream(CONTEXT, "Is the Adder good for trading?")
+            assert "".join(stream) == "The Adder is a small multipurpose ship."
+            assert stream.usage is None
+        assert not llm.stream_usage
+
+def test_async_client_is_closed_when_replaced():
+    with StubLLMServer() as url:
+        llm = OpenAILLM(provider="stub", api_key="stub", model="stub", url=url)
+        llm.user_prompt = ANSWER_PROMPT
+        clients = []
+
+        async def turn():
+            answer = await llm.ask_async(CONTEXT, "Is the Adder good for trading?")
+            clients.append(llm._async_llm)
+            return answer.text
+
+        # A fresh event loop per turn, as asyncio.run from Streamlit.
+        assert asyncio.run(turn()) == asyncio.run(turn()) == "The Adder is a small multipurpose ship."
+        assert clients[0].is_closed() and not clients[1].is_closed()
+        asyncio.run(llm.aclose())
+        assert clients[1].is_closed()
@@ -0,0 +1,55 @@
+from src.bm25 import BM25Index
+from src.hybrid_search import SEARCH_DENSE, HybridRetriever
+from src.reranker import Reranker, RerankingRetriever
+from src.vdb import SearchResult
+
+class CountingReranker(Reranker):
+    def __init__(self):
+        self.calls = 0
+
+    def score(self, query, documents, batch_size=32):
+        self.calls += 1
+        return [float(index) for index in range(len(documents))]
+
+class CannedDense:
+    def __init__(self, scores):
+        self.scores = scores
+
+    def search_results(self, query, collection_name, limit=3, **kwargs):
+        return results(self.scores)
+
+class CannedHybrid(HybridRetriever):
+    def __init__(self, scores):
+        super().__init__(None, {"Ships": BM25Index()})
+        self.scores = scores
+
+    def search_results(self, query, collection_name, limit=3, **kwargs):
+        return results(self.scores)
+
+def results(scores):
+    return [SearchResult(id=str(index), score=score, payload={}) for index, score in enumerate(scores)]
+
+def rerank_calls(retriever, collection_name="Ships", **kwargs):
+    reranker = CountingReranker()
+    RerankingRetriever(retriever, reranker).search_results("Adder cargo", collection_name, limit=1, **kwargs)
+    return reranker.calls
+
+def rrf(*ranks):
+    return sum(1.0 / (HybridRetriever.RRF_K + rank) for rank in ranks)
+
+def test_dense_skips_on_a_clear_cosine_lead():
+    assert rerank_calls(CannedDense([0.82, 0.66, 0.65])) == 0
+    assert rerank_calls(CannedDense([0.70, 0.65, 0.64])) == 1
+
+def test_hybrid_skips_when_both_rankings_agree():
+    assert rerank_calls(CannedHybrid([rrf(1, 1), rrf(2, 2), rrf(3, 3)])) == 0
+    assert rerank_calls(CannedHybrid([rrf(1, 2), rrf(2, 1), rrf(3, 3)])) == 1
+
+def test_keyword_skips_on_a_relative_bm25_lead():
+    assert rerank_calls(CannedHybrid([12.0, 5.0, 4.0]), mode="keyword") == 0
+    assert rerank_calls(CannedHybrid([12.0, 10.0, 4.0]), mode="keyword") == 1
+
+def test_hybrid_without_keyword_index_uses_cosine_scores():
+    retriever = CannedHybrid([0.82, 0.66, 0.65])
+    assert retriever.scoring("Equipments") == SEARCH_DENSE
+    assert rerank_calls(retriever, "Equipments") == 0
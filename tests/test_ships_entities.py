@@ -0,0 +1,40 @@
+import pytest
+
+from src.ships.ships_entities import build_ship_matcher
+
+SHIP_NAMES = [
+    "Adder", "Alliance Chieftain", "Anaconda", "Asp Explorer", "Beluga Liner", "F63 Condor", "Federal Corvette",
+    "Federal Gunship", "Fer-de-Lance", "Hauler", "Imperial Courier", "Imperial Cutter", "Krait Mk II", "Krait Phantom",
+    "Panther Clipper Mk II", "Python", "Sidewinder Mk I", "Vulture", "XG7 Trident", "XG8 Javelin", "XG9 Lance"
+]
+
+@pytest.fixture(scope="module")
+def matcher():
+    return build_ship_matcher(SHIP_NAMES)
+
+@pytest.mark.parametrize("query, ships", [
+    ("How fast is the Conda?", ["Anaconda"]),
+    ("What is the best FDL build?", ["Fer-de-Lance"]),
+    ("Krait Mk2 or Python?", ["Krait Mk II", "Python"]),
+    ("Is the Anacoda good for exploration?", ["Anaconda"]),
+    ("How good is the asp explorr?", ["Asp Explorer"]),
+    ("Is the Courier a good ship?", ["Imperial Courier"]),
+    ("Compare the Cutter and the Corvette", ["Imperial Cutter", "Federal Corvette"]),
+    ("how many seats does the lance ship have", ["XG9 Lance"]),
+    ("What is the Chief good at?", ["Alliance Chieftain"])
+])
+def test_match_ships(matcher, query, ships):
+    assert matcher.match(query) == ships
+
+@pytest.mark.parametrize("query", [
+    "I added a shield booster",
+    "What culture do pilots have?",
+    "cargo can be hauled",
+    "find the chief engineer",
+    "use a lance for mining",
+    "become a courier",
+    "who sells a cutter for mining fragments",
+    "does the trident of the federation matter"
+])
+def test_ignore_ordinary_words(matcher, query):
+    assert matcher.match(query) == []
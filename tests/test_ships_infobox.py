@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_infobox import legacy_extract_infobox
+from src.constants import RAW_DATA_FOLDER_NAME, SHIPS_DATA_DIR
+from src.ships.ships_html_processor import extract_infobox
+
+DATASET_DIR = os.path.join(os.path.dirname(__file__), "..", SHIPS_DATA_DIR, RAW_DATA_FOLDER_NAME)
+# Every fifth page keeps the test fast, benchmarks.bench_infobox checks them all.
+PAGES = sorted(os.listdir(DATASET_DIR))[::5] if os.path.isdir(DATASET_DIR) else []
+
+@pytest.mark.skipif(not PAGES, reason="the ship dataset is not available")
+@pytest.mark.parametrize("filename", PAGES)
+def test_single_pass_infobox_matches_legacy_queries(filename):
+    with open(os.path.join(DATASET_DIR, filename), "r", encoding="utf-8") as file:
+        soup = BeautifulSoup(file.read(), "html.parser")
+
+    assert extract_infobox(soup) == legacy_extract_infobox(soup)
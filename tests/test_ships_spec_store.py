@@ -0,0 +1,45 @@
+import math
+
+from src.ships.ships_spec_store import ShipSpecStore, spec_row
+
+PANTHER_CLIPPER = {
+    "overview": {"cost": "N/A"},
+    "specifications": {"cargo_capacity": "1238 t (max) ", "top_speed": "263-279 m/s", "landing_pad_size": "Large"}
+}
+IMPERIAL_CUTTER = {
+    "overview": {"cost": "208,969,451 CR"},
+    "specifications": {"cargo_capacity": "164 t (default) 794 t (max) ", "top_speed": "200 m/s (default) 228 m/s (upgraded) ", "landing_pad_size": "Large"}
+}
+
+def test_spec_row_reads_labelled_values():
+    row = spec_row("Panther Clipper Mk II", "panther.html", PANTHER_CLIPPER)
+    assert math.isnan(row["cargo_capacity"])
+    assert row["cargo_capacity_max"] == 1238
+
+    row = spec_row("Imperial Cutter", "cutter.html", IMPERIAL_CUTTER)
+    assert (row["cargo_capacity"], row["cargo_capacity_max"]) == (164, 794)
+    assert (row["top_speed"], row["top_speed_upgraded"]) == (200, 228)
+
+def test_spec_row_reads_unlabelled_values_as_default():
+    row = spec_row("Panther Clipper Mk II", "panther.html", PANTHER_CLIPPER)
+    assert row["top_speed"] == 263
+    assert math.isnan(row["top_speed_upgraded"])
+
+def test_rank_maximum_cargo():
+    store = ShipSpecStore()
+    store.set_ship("panther.html", "Panther Clipper Mk II", PANTHER_CLIPPER)
+    store.set_ship("cutter.html", "Imperial Cutter", IMPERIAL_CUTTER)
+    assert [row["name"] for row in store.rank("cargo_capacity_max")] == ["Panther Clipper Mk II", "Imperial Cutter"]
+    assert [row["name"] for row in store.rank("cargo_capacity")] == ["Imperial Cutter"]
+
+def test_store_of_another_version_is_rebuilt(tmp_path):
+    store = ShipSpecStore(str(tmp_path / "specs.npz"))
+    store.set_ship("cutter.html", "Imperial Cutter", IMPERIAL_CUTTER)
+    store.save()
+    assert "cutter.html" in ShipSpecStore.load(store.path)
+
+    ShipSpecStore.VERSION += 1
+    try:
+        assert len(ShipSpecStore.load(store.path)) == 0
+    finally:
+        ShipSpecStore.VERSION -= 1
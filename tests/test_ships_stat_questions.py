@@ -0,0 +1,68 @@
+import pytest
+
+from src.ships.ships_entities import build_ship_matcher
+from src.ships.ships_spec_store import ShipSpecStore
+from src.ships.ships_stat_questions import ShipStatQuestionAnswerer
+
+def infobox(cost: str, top_speed: str, jump_range: str, cargo: str, shields: str, landing_pad: str):
+    return {
+        "overview": {"cost": cost},
+        "specifications": {
+            "top_speed": top_speed,
+            "unladen_jump_range": jump_range,
+            "cargo_capacity": cargo,
+            "shields": shields,
+            "landing_pad_size": landing_pad
+        }
+    }
+
+SHIPS = {
+    "Anaconda": infobox("146,969,450 CR", "183 m/s (default) 209 m/s (upgraded) ", "14.13 ly (default) 34.48 ly (upgraded) ", "114 t (default) 470 t (max) ", "350 MJ", "Large"),
+    "Python": infobox("56,978,180 CR", "234 m/s (default) 267 m/s (upgraded) ", "9.12 ly (default) 32.96 ly (upgraded) ", "82 t (default) 294 t (max) ", "260 MJ", "Medium"),
+    "Vulture": infobox("4,925,615 CR", "210 m/s (default) 237 m/s (upgraded) ", "7.93 ly (default) 22.36 ly (upgraded) ", "4 t (default) 16 t (max) ", "240 MJ", "Small"),
+    "Imperial Cutter": infobox("208,969,451 CR", "200 m/s (default) 228 m/s (upgraded) ", "8.22 ly (default) 25.37 ly (upgraded) ", "164 t (default) 794 t (max) ", "600 MJ", "Large")
+}
+
+@pytest.fixture(scope="module")
+def answerer():
+    store = ShipSpecStore()
+    for name, ship_infobox in SHIPS.items():
+        store.set_ship(f"{name}.html", name, ship_infobox)
+    return ShipStatQuestionAnswerer(store, build_ship_matcher(SHIPS))
+
+def ask(answerer, query):
+    return answerer.answer(query, answerer.matcher.match(query))
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is the jump range of the Vulture?", "unladen jump range is 7.93 ly"),
+    ("How far can the Anaconda jump?", "unladen jump range is 14.13 ly"),
+    ("What is the price of the Anaconda?", "cost is 146,969,450 CR"),
+    ("How much does the Vulture cost?", "cost is 4,925,615 CR"),
+    ("What is the cost of the Vulture?", "cost is 4,925,615 CR"),
+    ("What is the cargo capacity of the Python?", "cargo capacity is 82 t"),
+    ("What is the maximum cargo capacity of the Python?", "maximum cargo capacity is 294 t")
+])
+def test_answer_stat_questions(answerer, query, expected):
+    assert expected in ask(answerer, query)
+
+def test_ranking_keeps_the_landing_pad(answerer):
+    answer = ask(answerer, "What is the fastest large ship?")
+    assert "large landing pad" in answer and "**Imperial Cutter**" in answer
+    assert "Python" not in answer and "Vulture" not in answer
+
+def test_ranking_by_landing_pad(answerer):
+    assert "**Python**" in ask(answerer, "Which ship with a medium pad is the fastest?")
+
+@pytest.mark.parametrize("query", [
+    "What is the range of the beam laser on the Vulture?",
+    "How much does it cost to insure the Anaconda?",
+    "What is the rebuy of the Anaconda?",
+    "What does the engineer charge for a cost of the Vulture upgrade?",
+    "What is the cost of a multicannon for the Vulture?",
+    "Does the Vulture have enough range for exploration?",
+    "Does the Anaconda have good shields?",
+    "What is the fastest ship for bounty hunting?",
+    "Which ship has the most cargo after the Beluga update?"
+])
+def test_fall_through_to_retrieval(answerer, query):
+    assert ask(answerer, query) is None
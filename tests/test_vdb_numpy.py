@@ -0,0 +1,51 @@
+import json
+import os
+
+from src.chunking import ContentChunk
+from src.embedder import Embedder
+from src.vdb_numpy import NumpyVectorDB
+
+class WordEmbedder(Embedder):
+    # One dimension per known word, enough to tell the chunks apart.
+    WORDS = ["adder", "anaconda", "python", "cutter", "cargo", "shields"]
+
+    def dimension(self):
+        return len(self.WORDS)
+
+    def embed_text(self, text):
+        return [float(word in text.lower()) + 0.01 for word in self.WORDS]
+
+    def embed_document(self, document, batch_size=32):
+        return [self.embed_text(text) for text in document]
+
+def chunk(chunk_id, text):
+    return ContentChunk("Ships", text.split()[0], "overview", [], text, "test.html", chunk_id=chunk_id)
+
+def generation(db_path):
+    with open(os.path.join(db_path, "Ships", NumpyVectorDB.META_FILE), "r", encoding="utf-8") as file:
+        return json.load(file)["generation"]
+
+def test_writes_are_applied_once_on_flush(tmp_path):
+    vdb = NumpyVectorDB(WordEmbedder(), str(tmp_path))
+    vdb.init_collection("Ships")
+    vdb.add([chunk("1", "Adder cargo"), chunk("2", "Anaconda shields")], "Ships")
+    vdb.add([chunk("3", "Python cargo")], "Ships")
+    vdb.delete(["2"], "Ships")
+    vdb.add([chunk("1", "Adder shields")], "Ships")
+
+    # Nothing is written before flush, missing() already counts the buffer.
+    assert generation(tmp_path) == 1
+    assert vdb.missing(["1", "2", "3"], "Ships") == ["2"]
+
+    vdb.flush("Ships")
+    assert generation(tmp_path) == 2
+    results = vdb.search_results("", "Ships", limit=3, query_vector=WordEmbedder().embed_text("adder shields"))
+    assert [result.id for result in results][:1] == ["1"]
+    assert sorted(result.id for result in results) == ["1", "3"]
+
+    vdb.delete(["3", "4"], "Ships")
+    vdb.close()
+
+    reopened = NumpyVectorDB(WordEmbedder(), str(tmp_path), read_only=True)
+    assert reopened.missing(["1", "3"], "Ships") == ["3"]
+    assert reopened.retrieve(["1"], "Ships")[0].payload["text"] == "Adder shields"